@@ -1,59 +1,140 @@
 import logging
-from flask import Flask, request, jsonify
+import time
+from flask import Flask
 from flask_cors import CORS
 import os
 from flask_migrate import Migrate
 from extensions import db
-from models import User, Vehicle, Maintenance, MaintenanceImage
-import firebase_admin
-from firebase_admin import credentials, auth
+from config import Config
+from database import build_engine_options, configure_database
+from services.storage_outbox import init_storage_outbox, start_storage_outbox_worker
+from services.cost_summary import init_cost_summary
+from services.search import ensure_search_index, init_search
+from services.response_cache import init_response_cache
+from services.metrics import init_metrics
+from services.admission import init_admission
+from services.sync import init_sync
+from services.token_cache import token_cache, token_cache_max_ttl
+from services.user_cache import user_cache
+import models  # noqa: F401 - registra as tabelas no metadata (db.create_all / autogenerate)
 
-# --- Corrija o nome do bucket removendo o prefixo 'gs://' ---
-FIREBASE_STORAGE_BUCKET = 'garagem60storage.firebasestorage.app' # REMOVA o 'gs://'
-# -------------------------------------------------------------
+logger = logging.getLogger(__name__)
 
-def create_app():
+
+class StartupTimer:
+    """Mede as etapas do create_app() para o relatório de inicialização."""
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.phases = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def report(self):
+        return {'total_ms': round((self._last - self.started) * 1000, 2), 'phases_ms': self.phases}
+
+
+def create_app(config_overrides=None):
+    timer = StartupTimer()
     app = Flask(__name__)
 
     # Configuração do CORS mais permissiva para desenvolvimento
     CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
-    # Configuração do banco de dados
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///garagem.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-    # Inicializar Firebase Admin SDK
-    try:
-        # Caminho para o arquivo da chave de serviço
-        cred_path = os.path.join(os.path.dirname(__file__), 'firebase-service-account.json')
-        cred = credentials.Certificate(cred_path)
-        # A inicialização agora usará o nome correto do bucket
-        firebase_admin.initialize_app(cred, {
-            'storageBucket': FIREBASE_STORAGE_BUCKET
-        })
-        print(f"Firebase Admin SDK inicializado com sucesso. Bucket: {FIREBASE_STORAGE_BUCKET}")
-    except Exception as e:
-        print(f"Erro ao inicializar Firebase Admin SDK: {e}")
+    # Configuração (variáveis de ambiente via config.Config, sobrescritas por config_overrides)
+    app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
+
+    token_cache.configure(max_size=app.config['TOKEN_CACHE_MAX_SIZE'], max_ttl=token_cache_max_ttl(app.config))
+    user_cache.configure(ttl=app.config['USER_CACHE_TTL'])
+    init_response_cache(app)
+    # Limite por usuário e de requisições simultâneas (aplicado em firebase_token_required)
+    init_admission(app)
+
+    # Instrumentação por requisição + endpoint /metrics (formato Prometheus)
+    init_metrics(app)
+    timer.mark('config')
+
+    # O Firebase Admin SDK não é inicializado aqui: services/firebase.py cria o app
+    # do SDK no primeiro uso (verificação de token, Storage)
 
     # Inicialização do banco de dados com o app
     db.init_app(app)
 
+    # Migrações versionadas (Alembic). Aplicar com `flask db upgrade` ou `python migrate_db.py`.
+    # render_as_batch permite ALTER TABLE no SQLite (recria a tabela quando necessário)
+    Migrate(app, db, directory=os.path.join(os.path.dirname(__file__), 'migrations'), render_as_batch=True)
+
+    timer.mark('database')
+
     # Registro de rotas
     from routes.auth_routes import auth_bp
     from routes.vehicle_routes import vehicle_bp
     from routes.maintenance_routes import maintenance_bp
+    from routes.analytics_routes import analytics_bp
+    from routes.sync_routes import sync_bp
+    from routes.storage_routes import storage_bp
+    from routes.ops_routes import ops_bp, health_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(vehicle_bp, url_prefix='/api/vehicles')
     app.register_blueprint(maintenance_bp, url_prefix='/api/maintenances')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    app.register_blueprint(ops_bp, url_prefix='/ops')
+    app.register_blueprint(health_bp)  # /healthz e /readyz
+    app.register_blueprint(storage_bp)  # /storage/o/<caminho> (só com STORAGE_BACKEND=local)
+    timer.mark('blueprints')
 
-    # Criação das tabelas
-    with app.app_context():
-        db.create_all()
-        print("Tabelas do banco de dados verificadas/criadas.")
+    # Perfil da engine (pool, pragmas do SQLite) + log das configurações efetivas
+    configure_database(app)
+
+    # Criação das tabelas só quando pedida (DB_CREATE_ALL); em produção o schema vem das migrações
+    if app.config['DB_CREATE_ALL']:
+        with app.app_context():
+            db.create_all()
+            ensure_search_index()
+            print("Tabelas do banco de dados verificadas/criadas.")
+        timer.mark('create_all')
+
+    # Outbox de exclusões no Storage: comando `flask drain-storage-outbox` + worker em segundo
+    # plano, iniciado só por quem serve o app (wsgi.py / init_worker_process), nunca nas migrações
+    init_storage_outbox(app)
+
+    # Comando `flask rebuild-cost-summary` (recalcula os agregados de custo)
+    init_cost_summary(app)
 
+    # Comando `flask rebuild-search-index` (índice de busca FTS5, SQLite)
+    init_search(app)
+
+    # Comando `flask purge-sync-tombstones` (exclusões antigas do sync incremental)
+    init_sync(app)
+    timer.mark('services')
+
+    app.extensions['startup_report'] = timer.report()
+    logger.info(f"App inicializado em {timer.report()['total_ms']}ms: {timer.phases}")
     return app
 
+def init_worker_process(app):
+    """
+    Preparação de cada worker depois do fork (gunicorn com preload_app): descarta
+    as conexões do banco herdadas do processo mestre e inicia as threads em
+    segundo plano, que não sobrevivem ao fork.
+    """
+    start = time.perf_counter()
+    with app.app_context():
+        db.engine.dispose()
+    start_storage_outbox_worker(app)
+    logger.info(f"Worker pid={os.getpid()} pronto em {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
 if __name__ == '__main__':
-    app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Servidor de desenvolvimento. Em produção: gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app({'DB_CREATE_ALL': True})
+    start_storage_outbox_worker(app)
+    app.run(debug=True, host='0.0.0.0', port=5000)
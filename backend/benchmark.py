@@ -0,0 +1,616 @@
+# Benchmark dos endpoints da API com dados gerados e sem dependências externas.
+#
+# Monta o app via create_app() sobre um banco SQLite novo, populado com uma
+# massa de dados configurável, troca a verificação de token do Firebase por um
+# stub (token "bench:<firebase_uid>") e usa o armazenamento local. Cada cenário
+# (uma rota) é disparado por N clientes concorrentes e o resultado traz
+# latência p50/p95/p99, vazão e quantidade de queries SQL por requisição.
+#
+# Uso (a partir da pasta backend):
+#   python benchmark.py                                   -> execução padrão
+#   python benchmark.py --users 50 --vehicles 3 --maintenances 40 --images 2
+#   python benchmark.py --concurrency 16 --requests 500 --only maintenances.
+#   python benchmark.py --output bench/depois.json --compare bench/antes.json
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+
+import firebase_admin
+from firebase_admin import auth, credentials
+from sqlalchemy import event
+
+BENCH_TOKEN_PREFIX = 'bench:'
+BENCH_UID_PREFIX = 'bench-user-'
+INSERT_CHUNK_SIZE = 5000
+
+SERVICE_TYPES = ['Troca de óleo', 'Revisão', 'Alinhamento', 'Balanceamento', 'Freios', 'Suspensão',
+                 'Embreagem', 'Correia dentada', 'Bateria', 'Pneus', 'Injeção eletrônica', 'Ar-condicionado']
+WORKSHOPS = ['Auto Center Silva', 'Oficina do Zé', 'Mecânica Central', 'Garagem 60', 'Box Motors']
+MECHANICS = ['João', 'Carlos', 'Ana', 'Pedro', 'Marcos', None]
+PARTS = ['Filtro de óleo', 'Pastilhas de freio', 'Amortecedores', 'Vela de ignição', 'Correia', None]
+BRANDS = [('carro', 'Fiat', 'Uno'), ('carro', 'VW', 'Gol'), ('carro', 'Chevrolet', 'Onix'),
+          ('moto', 'Honda', 'CG 160'), ('moto', 'Yamaha', 'Fazer'), ('caminhão', 'Volvo', 'FH')]
+SEARCH_TERMS = ['oleo', 'freio', 'revis', 'correia', 'bateria', 'silva', 'pneus']
+
+
+# --- Stubs de autenticação ---
+
+class _BenchCredential(credentials.Base):
+    """Credencial vazia: o app padrão do SDK existe, mas nunca fala com o Google."""
+
+    def get_credential(self):
+        return None
+
+
+class _BenchFirebaseUser:
+    def __init__(self, uid):
+        self.uid = uid
+        self.email = f'{uid}@bench.local'
+        self.display_name = uid
+
+
+def install_auth_stub():
+    """
+    Substitui as chamadas ao Firebase Auth usadas pelo backend. O token
+    "bench:<uid>" é aceito como válido para o uid; qualquer outro é inválido.
+    """
+    def verify_id_token(id_token, check_revoked=False, app=None):
+        if not id_token.startswith(BENCH_TOKEN_PREFIX):
+            raise auth.InvalidIdTokenError('Token fora do formato do benchmark', None)
+        now = int(time.time())
+        uid = id_token[len(BENCH_TOKEN_PREFIX):]
+        # Mesmas claims de um ID token real (e-mail e nome vão no próprio token)
+        return {'uid': uid, 'email': f'{uid}@bench.local', 'name': uid, 'iat': now, 'exp': now + 3600}
+
+    # O backend inicializa o SDK no primeiro uso; com o app padrão já registrado
+    # aqui, nenhuma credencial real é lida
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        firebase_admin.initialize_app(_BenchCredential(), {'projectId': 'bench'})
+
+    auth.verify_id_token = verify_id_token
+    auth.get_user = lambda uid, app=None: _BenchFirebaseUser(uid)
+    auth.revoke_refresh_tokens = lambda uid, app=None: None
+
+
+def auth_headers(user):
+    return {'Authorization': f'Bearer {BENCH_TOKEN_PREFIX}{user.uid}'}
+
+
+# --- Contagem de queries por thread ---
+
+class ThreadQueryCounter:
+    """
+    Um único listener na engine somando os comandos SQL por thread. Diferente do
+    QueryCounter dos testes (tests/query_budget.py), que instala/remove o listener
+    a cada uso, serve para muitas threads medindo requisições ao mesmo tempo.
+    """
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+# --- Massa de dados ---
+
+class BenchUser:
+    def __init__(self, uid, user_id):
+        self.uid = uid
+        self.id = user_id
+        self.vehicle_ids = []
+        self.maintenance_ids = []
+        # Registros criados pelos cenários de escrita (consumidos pelos de exclusão)
+        self.created_maintenance_ids = []
+        self.created_vehicle_ids = []
+        # Miniaturas gravadas pelo cenário de upload (lidas pelo de arquivos locais)
+        self.thumbnail_urls = []
+
+
+def image_url(maintenance_id, index):
+    path = f'maintenances%2F{maintenance_id}%2Fimg_{index}.jpg'
+    return f'https://firebasestorage.googleapis.com/v0/b/bench.appspot.com/o/{path}?alt=media&token=bench'
+
+
+def _insert_chunks(table, rows):
+    from extensions import db
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + INSERT_CHUNK_SIZE])
+
+
+def _seed_updated_at(now, n):
+    # Alterações espalhadas pelos últimos 30 dias: o sync incremental de 1 dia pega ~1/30 das linhas
+    return now - timedelta(days=n % 30)
+
+
+def seed_dataset(app, users, vehicles, maintenances, images, seed):
+    """
+    Popula o banco com 'users' usuários, 'vehicles' veículos por usuário,
+    'maintenances' manutenções por veículo e 'images' imagens por manutenção.
+    Insere em lote pelo Core (os triggers do FTS5 acompanham) e recalcula os
+    agregados de custo no final. Retorna a lista de BenchUser.
+    """
+    from extensions import db
+    from models import User, Vehicle, Maintenance, MaintenanceImage
+    from services.cost_summary import rebuild_cost_summary
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = now.date()
+
+    with app.app_context():
+        _insert_chunks(User.__table__, [{
+            'firebase_uid': f'{BENCH_UID_PREFIX}{n}', 'username': f'Usuário {n}',
+            'email': f'{BENCH_UID_PREFIX}{n}@bench.local', 'created_at': now, 'data_version': 0,
+        } for n in range(users)])
+        bench_users = {user_id: BenchUser(uid, user_id) for user_id, uid in
+                       db.session.query(User.id, User.firebase_uid).order_by(User.id)}
+
+        vehicle_rows = []
+        for user_id in bench_users:
+            for n in range(vehicles):
+                vehicle_type, brand, model = rng.choice(BRANDS)
+                vehicle_rows.append({
+                    'user_id': user_id, 'type': vehicle_type, 'brand': brand, 'model': model,
+                    'year': rng.randint(2000, today.year), 'license_plate': f'BEN{user_id:04d}{n:02d}',
+                    'color': rng.choice(['Prata', 'Preto', 'Branco', None]), 'created_at': now, 'data_version': 0,
+                    'updated_at': _seed_updated_at(now, len(vehicle_rows)),
+                })
+        _insert_chunks(Vehicle.__table__, vehicle_rows)
+        vehicle_ids = db.session.query(Vehicle.id, Vehicle.user_id).order_by(Vehicle.id).all()
+        for vehicle_id, user_id in vehicle_ids:
+            bench_users[user_id].vehicle_ids.append(vehicle_id)
+
+        def warranty():
+            # Metade com garantia; parte já vencida e parte vencendo nos próximos meses
+            return today + timedelta(days=rng.randint(-365, 365)) if rng.random() < 0.5 else None
+
+        maintenance_rows = []
+        for vehicle_id, _ in vehicle_ids:
+            for _ in range(maintenances):
+                maintenance_rows.append({
+                    'vehicle_id': vehicle_id, 'service_type': rng.choice(SERVICE_TYPES),
+                    'workshop': rng.choice(WORKSHOPS), 'mechanic': rng.choice(MECHANICS),
+                    'labor_warranty_date': warranty(), 'labor_cost': round(rng.uniform(50, 800), 2),
+                    'parts': rng.choice(PARTS), 'parts_store': rng.choice(['Loja A', 'Loja B', None]),
+                    'parts_warranty_date': warranty(), 'parts_cost': round(rng.uniform(0, 1500), 2),
+                    'service_date': now - timedelta(days=rng.randint(0, 3 * 365), minutes=rng.randint(0, 1440)),
+                    'created_at': now, 'updated_at': _seed_updated_at(now, len(maintenance_rows)),
+                })
+        _insert_chunks(Maintenance.__table__, maintenance_rows)
+        maintenance_ids = (db.session.query(Maintenance.id, Vehicle.user_id)
+                           .join(Vehicle, Vehicle.id == Maintenance.vehicle_id).order_by(Maintenance.id).all())
+        for maintenance_id, user_id in maintenance_ids:
+            bench_users[user_id].maintenance_ids.append(maintenance_id)
+
+        _insert_chunks(MaintenanceImage.__table__, [
+            {'maintenance_id': maintenance_id, 'image_url': image_url(maintenance_id, n), 'created_at': now}
+            for maintenance_id, _ in maintenance_ids for n in range(images)
+        ])
+        db.session.commit()
+        rebuild_cost_summary()
+
+    return list(bench_users.values())
+
+
+# --- Cenários ---
+
+# rule/method identificam a rota no url_map (para detectar rotas sem cenário).
+# build(user, i) devolve (path, kwargs do client.open) ou None para pular;
+# after(user, response) recebe a resposta (ex.: guardar ids criados).
+Scenario = namedtuple('Scenario', ['name', 'method', 'rule', 'build', 'after', 'write'])
+
+
+def _scenario(name, method, rule, build, after=None, write=False):
+    return Scenario(name, method, rule, build, after, write)
+
+
+def _pick(rng_seed, values):
+    return values[rng_seed % len(values)] if values else None
+
+
+def _maintenance_payload(vehicle_id, i):
+    return {
+        'vehicle_id': vehicle_id, 'service_type': SERVICE_TYPES[i % len(SERVICE_TYPES)],
+        'workshop': WORKSHOPS[i % len(WORKSHOPS)], 'mechanic': 'Bench', 'labor_cost': 120.0,
+        'parts_cost': 80.0, 'service_date': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'labor_warranty_date': (datetime.utcnow() + timedelta(days=90)).strftime('%d/%m/%Y'),
+        'images': [image_url(f'novo{i}', 0)],
+    }
+
+
+def _bench_photo():
+    """Foto JPEG de 12 MP gerada uma vez (None sem Pillow: o cenário de upload é pulado)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    import io
+    output = io.BytesIO()
+    Image.linear_gradient('L').resize((4000, 3000)).convert('RGB').save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+
+def _upload_payload(photo):
+    import io
+    return {'content_type': 'multipart/form-data', 'data': {'images': [(io.BytesIO(photo), 'bench.jpg')]}}
+
+
+def _pop(values):
+    try:
+        return values.pop()
+    except IndexError:
+        return None
+
+
+def build_scenarios(import_rows):
+    def created(attribute, key):
+        def after(user, response):
+            if response.status_code == 201:
+                getattr(user, attribute).append(response.get_json()[key]['id'])
+        return after
+
+    def delete_created(attribute, prefix):
+        def build(user, i):
+            target = _pop(getattr(user, attribute))
+            return (f'{prefix}/{target}', {}) if target is not None else None
+        return build
+
+    delta_since = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    photo = _bench_photo()
+
+    def uploaded(user, response):
+        if response.status_code == 201:
+            user.thumbnail_urls.extend(image['thumbnail_url'] for image in response.get_json()['images'])
+
+    def local_file(user, i):
+        url = _pick(i, user.thumbnail_urls)
+        # Só o caminho: o test client não aceita a URL absoluta gerada com o host da requisição
+        return (url[url.index('/storage/o/'):], {}) if url else None
+
+    return [
+        # Leituras
+        _scenario('auth.sync_user', 'POST', '/api/auth/sync_user',
+                  lambda user, i: ('/api/auth/sync_user', {'json': {}})),
+        _scenario('vehicles.list', 'GET', '/api/vehicles/',
+                  lambda user, i: ('/api/vehicles/', {})),
+        _scenario('vehicles.list_page', 'GET', '/api/vehicles/',
+                  lambda user, i: ('/api/vehicles/?limit=20', {})),
+        _scenario('vehicles.detail', 'GET', '/api/vehicles/<int:vehicle_id>',
+                  lambda user, i: (f'/api/vehicles/{_pick(i, user.vehicle_ids)}', {})),
+        _scenario('vehicles.dashboard', 'GET', '/api/vehicles/dashboard',
+                  lambda user, i: ('/api/vehicles/dashboard', {})),
+        _scenario('maintenances.list', 'GET', '/api/maintenances/vehicle/<int:vehicle_id>',
+                  lambda user, i: (f'/api/maintenances/vehicle/{_pick(i, user.vehicle_ids)}', {})),
+        _scenario('maintenances.list_page', 'GET', '/api/maintenances/vehicle/<int:vehicle_id>',
+                  lambda user, i: (f'/api/maintenances/vehicle/{_pick(i, user.vehicle_ids)}?limit=20', {})),
+        _scenario('maintenances.detail', 'GET', '/api/maintenances/<int:maintenance_id>',
+                  lambda user, i: (f'/api/maintenances/{_pick(i * 7919, user.maintenance_ids)}', {})),
+        _scenario('maintenances.search', 'GET', '/api/maintenances/search',
+                  lambda user, i: (f'/api/maintenances/search?q={_pick(i, SEARCH_TERMS)}', {})),
+        _scenario('maintenances.warranties', 'GET', '/api/maintenances/warranties/expiring',
+                  lambda user, i: ('/api/maintenances/warranties/expiring?days=90', {})),
+        _scenario('maintenances.export_csv', 'GET', '/api/maintenances/export',
+                  lambda user, i: ('/api/maintenances/export?format=csv', {})),
+        _scenario('maintenances.export_ndjson_gzip', 'GET', '/api/maintenances/export',
+                  lambda user, i: ('/api/maintenances/export?format=ndjson&gzip=1', {})),
+        _scenario('sync.full', 'GET', '/api/sync',
+                  lambda user, i: ('/api/sync', {})),
+        _scenario('sync.delta', 'GET', '/api/sync',
+                  lambda user, i: (f'/api/sync?since={delta_since}', {})),
+        _scenario('analytics.costs', 'GET', '/api/analytics/costs',
+                  lambda user, i: ('/api/analytics/costs', {})),
+        _scenario('ops.cache_stats', 'GET', '/ops/cache-stats',
+                  lambda user, i: ('/ops/cache-stats', {})),
+        _scenario('ops.metrics', 'GET', '/metrics',
+                  lambda user, i: ('/metrics', {})),
+        _scenario('ops.admission', 'GET', '/ops/admission',
+                  lambda user, i: ('/ops/admission', {})),
+        _scenario('ops.startup', 'GET', '/ops/startup',
+                  lambda user, i: ('/ops/startup', {})),
+        _scenario('ops.healthz', 'GET', '/healthz',
+                  lambda user, i: ('/healthz', {})),
+        _scenario('ops.readyz', 'GET', '/readyz',
+                  lambda user, i: ('/readyz', {})),
+        # Escritas (depois das leituras; as exclusões consomem o que os cenários de criação geraram)
+        _scenario('maintenances.add', 'POST', '/api/maintenances/add',
+                  lambda user, i: ('/api/maintenances/add', {'json': _maintenance_payload(_pick(i, user.vehicle_ids), i)}),
+                  after=created('created_maintenance_ids', 'maintenance'), write=True),
+        _scenario('maintenances.update', 'PUT', '/api/maintenances/<int:maintenance_id>',
+                  lambda user, i: (f'/api/maintenances/{_pick(i * 7919, user.maintenance_ids)}',
+                                   {'json': {'mechanic': f'Bench {i}', 'labor_cost': 100.0 + i % 50}}),
+                  write=True),
+        _scenario('maintenances.import', 'POST', '/api/maintenances/import',
+                  lambda user, i: ('/api/maintenances/import', {'json': {'maintenances': [
+                      _maintenance_payload(_pick(i + n, user.vehicle_ids), i + n) for n in range(import_rows)]}}),
+                  write=True),
+        _scenario('maintenances.upload_images', 'POST', '/api/maintenances/<int:maintenance_id>/images',
+                  lambda user, i: ((f'/api/maintenances/{_pick(i * 7919, user.maintenance_ids)}/images',
+                                    _upload_payload(photo)) if photo else None),
+                  after=uploaded, write=True),
+        # Leitura das miniaturas gravadas pelo upload (por isso depois dele)
+        _scenario('storage.local_file', 'GET', '/storage/o/<path:path>', local_file),
+        _scenario('maintenances.delete', 'DELETE', '/api/maintenances/<int:maintenance_id>',
+                  delete_created('created_maintenance_ids', '/api/maintenances'), write=True),
+        _scenario('vehicles.add', 'POST', '/api/vehicles/',
+                  lambda user, i: ('/api/vehicles/', {'json': {
+                      'type': 'carro', 'brand': 'Bench', 'model': 'Teste', 'year': 2020,
+                      'license_plate': f'NEW{i:05d}'}}),
+                  after=created('created_vehicle_ids', 'vehicle'), write=True),
+        _scenario('vehicles.delete', 'DELETE', '/api/vehicles/<int:vehicle_id>',
+                  delete_created('created_vehicle_ids', '/api/vehicles'), write=True),
+        # Por último: descarta os tokens do usuário em cache (as requisições seguintes verificam de novo)
+        _scenario('auth.revoke', 'POST', '/api/auth/revoke',
+                  lambda user, i: ('/api/auth/revoke', {}), write=True),
+    ]
+
+
+def uncovered_routes(app, scenarios):
+    covered = {(scenario.method, scenario.rule) for scenario in scenarios}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if (method, rule.rule) not in covered:
+                missing.append(f'{method} {rule.rule}')
+    return missing
+
+
+# --- Execução ---
+
+def percentile(sorted_values, pct):
+    """Percentil pelo método nearest-rank (lista já ordenada)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(app, scenario, users, requests, concurrency, counter):
+    """Dispara 'requests' requisições do cenário com 'concurrency' threads (um test client por thread)."""
+    samples = []
+    samples_lock = threading.Lock()
+
+    def worker(worker_index):
+        client = app.test_client()
+        local_samples = []
+        for i in range(worker_index, requests, concurrency):
+            user = users[i % len(users)]
+            request_args = scenario.build(user, i)
+            if request_args is None:
+                continue
+            path, kwargs = request_args
+            counter.reset()
+            start = time.perf_counter()
+            response = client.open(path, method=scenario.method, headers=auth_headers(user), **kwargs)
+            response.get_data()  # Consome o corpo (inclusive respostas em streaming)
+            elapsed = time.perf_counter() - start
+            local_samples.append((elapsed, response.status_code, counter.count, len(response.get_data())))
+            if scenario.after:
+                scenario.after(user, response)
+            response.close()
+        with samples_lock:
+            samples.extend(local_samples)
+
+    threads = [threading.Thread(target=worker, args=(n,), name=f'bench-{n}') for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+    return summarize(scenario, samples, wall_time)
+
+
+def summarize(scenario, samples, wall_time):
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = sorted(sample[2] for sample in samples)
+    statuses = Counter(sample[1] for sample in samples)
+    count = len(samples)
+    return {
+        'method': scenario.method,
+        'rule': scenario.rule,
+        'requests': count,
+        'errors': sum(n for status, n in statuses.items() if status >= 400),
+        'status_codes': {str(status): n for status, n in sorted(statuses.items())},
+        'wall_time_s': round(wall_time, 4),
+        'throughput_rps': round(count / wall_time, 2) if wall_time and count else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / count, 3) if count else None,
+            'p50': _round(percentile(latencies, 50)),
+            'p95': _round(percentile(latencies, 95)),
+            'p99': _round(percentile(latencies, 99)),
+            'max': _round(latencies[-1] if latencies else None),
+        },
+        'queries': {
+            'mean': round(sum(queries) / count, 2) if count else None,
+            'p50': percentile(queries, 50),
+            'max': queries[-1] if queries else None,
+        },
+        'response_bytes_mean': round(sum(sample[3] for sample in samples) / count) if count else None,
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results, baseline=None):
+    header = f"{'cenário':<34}{'req':>6}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    if baseline:
+        header += f"{'Δp95':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        latency = result['latency_ms']
+        line = (f"{name:<34}{result['requests']:>6}{result['errors']:>5}{result['throughput_rps']:>9.1f}"
+                f"{_fmt(latency['p50'])}{_fmt(latency['p95'])}{_fmt(latency['p99'])}{_fmt(result['queries']['mean'], 1)}")
+        if baseline:
+            previous = baseline.get('scenarios', {}).get(name, {}).get('latency_ms', {}).get('p95')
+            line += f"{_delta(previous, latency['p95']):>9}"
+        print(line)
+
+
+def _fmt(value, digits=2):
+    return f'{value:>9.{digits}f}' if value is not None else f"{'-':>9}"
+
+
+def _delta(previous, current):
+    if not previous or current is None:
+        return '-'
+    return f'{(current - previous) / previous * 100:+.0f}%'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dos endpoints da API (SQLite + stubs offline).')
+    parser.add_argument('--users', type=int, default=20, help='usuários gerados')
+    parser.add_argument('--vehicles', type=int, default=3, help='veículos por usuário')
+    parser.add_argument('--maintenances', type=int, default=30, help='manutenções por veículo')
+    parser.add_argument('--images', type=int, default=2, help='imagens por manutenção')
+    parser.add_argument('--seed', type=int, default=42, help='semente do gerador de dados')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes concorrentes')
+    parser.add_argument('--requests', type=int, default=200, help='requisições por cenário')
+    parser.add_argument('--warmup', type=int, default=10, help='requisições de aquecimento por cenário de leitura')
+    parser.add_argument('--import-rows', type=int, default=20, help='linhas por requisição de importação')
+    parser.add_argument('--only', default='', help='prefixos de cenários separados por vírgula (ex.: vehicles.,analytics.)')
+    parser.add_argument('--no-writes', action='store_true', help='executa só os cenários de leitura')
+    parser.add_argument('--response-cache', default='memory', choices=['memory', 'shared', 'none'],
+                        help='RESPONSE_CACHE_BACKEND usado no benchmark')
+    parser.add_argument('--log-level', default='WARNING', help='nível de log do app durante o benchmark')
+    parser.add_argument('--database', help='arquivo SQLite (padrão: temporário, removido no final)')
+    parser.add_argument('--output', help='arquivo JSON com os resultados (padrão: bench-results/<data>.json)')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparar o p95')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    install_auth_stub()
+
+    workdir = tempfile.mkdtemp(prefix='garagem-bench-')
+    database = os.path.abspath(args.database) if args.database else os.path.join(workdir, 'bench.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+
+    from app import create_app
+    from extensions import db
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+        'DB_CREATE_ALL': True,
+        'STORAGE_BACKEND': 'local',
+        'LOCAL_STORAGE_DIR': os.path.join(workdir, 'storage'),
+        'STORAGE_OUTBOX_WORKER': False,
+        'RESPONSE_CACHE_BACKEND': args.response_cache,
+        'DB_POOL_SIZE': max(5, args.concurrency),
+        # Cada cliente do benchmark dispara sem pausa com o mesmo usuário: o limite por
+        # usuário recusaria quase tudo. O teto de concorrência fica acima da do benchmark.
+        'RATE_LIMIT_BACKEND': 'none',
+        'MAX_CONCURRENT_REQUESTS': max(64, args.concurrency),
+        # Rotas internas liberadas para o test client (origem 127.0.0.1)
+        'OPS_ALLOWED_IPS': '127.0.0.1',
+    })
+    # Os logs INFO por requisição distorcem as medições
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    started = time.perf_counter()
+    users = seed_dataset(app, args.users, args.vehicles, args.maintenances, args.images, args.seed)
+    seed_time = time.perf_counter() - started
+    print(f"Massa gerada em {seed_time:.1f}s: {len(users)} usuários, {len(users) * args.vehicles} veículos, "
+          f"{len(users) * args.vehicles * args.maintenances} manutenções")
+
+    scenarios = build_scenarios(args.import_rows)
+    missing = uncovered_routes(app, scenarios)
+    if missing:
+        print(f"Aviso: rotas sem cenário no benchmark: {', '.join(missing)}")
+
+    prefixes = [prefix.strip() for prefix in args.only.split(',') if prefix.strip()]
+    selected = [scenario for scenario in scenarios
+                if (not prefixes or any(scenario.name.startswith(prefix) for prefix in prefixes))
+                and not (args.no_writes and scenario.write)]
+
+    with app.app_context():
+        counter = ThreadQueryCounter(db.engine)
+    results = {}
+    for scenario in selected:
+        if args.warmup and not scenario.write:
+            run_scenario(app, scenario, users, args.warmup, min(args.concurrency, args.warmup), counter)
+        results[scenario.name] = run_scenario(app, scenario, users, args.requests, args.concurrency, counter)
+        result = results[scenario.name]
+        print(f"  {scenario.name}: {result['requests']} req, p95 {result['latency_ms']['p95']} ms")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print()
+    print_report(results, baseline)
+
+    report = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed_time_s': round(seed_time, 3),
+        },
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'database')},
+        'dataset': {
+            'users': len(users),
+            'vehicles': len(users) * args.vehicles,
+            'maintenances': len(users) * args.vehicles * args.maintenances,
+            'images': len(users) * args.vehicles * args.maintenances * args.images,
+        },
+        'uncovered_routes': missing,
+        'scenarios': results,
+    }
+    output = args.output or os.path.join('bench-results', datetime.utcnow().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em {output}")
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    """
+    Configuração padrão do app. Cada valor pode ser sobrescrito por uma
+    variável de ambiente de mesmo nome ou pelo dicionário passado a create_app().
+    """
+
+    # --- Banco de dados ---
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///garagem.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pragmas aplicados a cada nova conexão SQLite
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    SQLITE_MMAP_SIZE = _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    SQLITE_CACHE_SIZE = _env_int('SQLITE_CACHE_SIZE', -64000)  # negativo = KiB (64 MB)
+
+    # Pool de conexões (para SQLite em arquivo e bancos servidor)
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)
+    DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', True)
+
+    # Cria as tabelas com db.create_all() no boot. Desligado por padrão: o schema
+    # vem das migrações (python migrate_db.py / flask db upgrade)
+    DB_CREATE_ALL = _env_bool('DB_CREATE_ALL', False)
+
+    # --- Servidor ---
+    # App carregado no processo mestre antes do fork (gunicorn preload_app; o
+    # gunicorn.conf.py exporta esta variável). As threads em segundo plano e as
+    # conexões do banco só são abertas em cada worker, depois do fork.
+    PRELOAD_APP = _env_bool('PRELOAD_APP', False)
+
+    # --- Firebase ---
+    # O Admin SDK é inicializado no primeiro uso (services/firebase.py)
+    FIREBASE_CREDENTIALS_PATH = os.environ.get(
+        'FIREBASE_CREDENTIALS_PATH', os.path.join(os.path.dirname(__file__), 'firebase-service-account.json'))
+    FIREBASE_STORAGE_BUCKET = os.environ.get('FIREBASE_STORAGE_BUCKET', 'garagem60storage.firebasestorage.app')
+
+    # --- Autenticação ---
+    # Cache de ID tokens já verificados (evita refazer a verificação criptográfica)
+    # As entradas vivem no máximo TOKEN_CACHE_MAX_TTL segundos (0 = até o 'exp' do token). Sem valor
+    # definido o limite é automático: 300s com FIREBASE_CHECK_REVOKED ativo, para que uma revogação
+    # seja percebida mesmo com o token ainda em cache, e nenhum sem ele (ver token_cache_max_ttl).
+    TOKEN_CACHE_MAX_SIZE = _env_int('TOKEN_CACHE_MAX_SIZE', 2048)
+    FIREBASE_CHECK_REVOKED = _env_bool('FIREBASE_CHECK_REVOKED', False)
+    TOKEN_CACHE_MAX_TTL = _env_int('TOKEN_CACHE_MAX_TTL', None)
+
+    # Cache firebase_uid -> user.id usado pelo decorator para resolver o usuário local
+    USER_CACHE_TTL = _env_int('USER_CACHE_TTL', 300)
+
+    # --- Controle de admissão (firebase_token_required) ---
+    # Desligado, nenhuma requisição é recusada por carga
+    ADMISSION_CONTROL_ENABLED = _env_bool('ADMISSION_CONTROL_ENABLED', True)
+    # Limite por usuário (token bucket por firebase_uid): taxa sustentada e rajada; acima -> 429.
+    # 'memory' (por processo), 'shared' (Redis em RATE_LIMIT_URL; 'local://' fica no processo) ou 'none'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_URL = os.environ.get('RATE_LIMIT_URL', 'local://')
+    RATE_LIMIT_PER_MINUTE = _env_int('RATE_LIMIT_PER_MINUTE', 600)
+    RATE_LIMIT_BURST = _env_int('RATE_LIMIT_BURST', 60)
+    # Requisições autenticadas simultâneas por processo (0 desliga). As excedentes esperam numa
+    # fila de até ADMISSION_QUEUE_SIZE por até ADMISSION_QUEUE_TIMEOUT_MS; depois -> 503.
+    # Sem valor: 64 com threads (o número de threads já limita) e, com workers gevent,
+    # GUNICORN_WORKER_CONNECTIONS (o teto do próprio worker), já que cada requisição
+    # esperando o Firebase custa só um greenlet.
+    MAX_CONCURRENT_REQUESTS = _env_int('MAX_CONCURRENT_REQUESTS', None)
+    # Conexões simultâneas por worker gevent (mesma variável lida pelo gunicorn.conf.py)
+    GUNICORN_WORKER_CONNECTIONS = _env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+    ADMISSION_QUEUE_SIZE = _env_int('ADMISSION_QUEUE_SIZE', 128)
+    ADMISSION_QUEUE_TIMEOUT_MS = _env_int('ADMISSION_QUEUE_TIMEOUT_MS', 2000)
+    # Retry-After (s) das respostas 503
+    ADMISSION_RETRY_AFTER_SECONDS = _env_int('ADMISSION_RETRY_AFTER_SECONDS', 1)
+
+    # --- Armazenamento de imagens ---
+    # 'firebase' (bucket padrão do Firebase Storage) ou 'local' (arquivos em LOCAL_STORAGE_DIR)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'firebase')
+    LOCAL_STORAGE_DIR = os.environ.get('LOCAL_STORAGE_DIR', os.path.join(os.path.dirname(__file__), 'local_storage'))
+    # Prefixo das URLs dos arquivos locais, servidos pelo app em /storage/o/<caminho>
+    # (vazio = host da requisição do upload)
+    LOCAL_STORAGE_BASE_URL = os.environ.get('LOCAL_STORAGE_BASE_URL', '')
+
+    # Exclusões em lote: caminhos por requisição batch e threads em paralelo
+    STORAGE_DELETE_BATCH_SIZE = _env_int('STORAGE_DELETE_BATCH_SIZE', 100)
+    STORAGE_DELETE_WORKERS = _env_int('STORAGE_DELETE_WORKERS', 8)
+
+    # Outbox de exclusões no Storage (processada em segundo plano)
+    STORAGE_OUTBOX_WORKER = _env_bool('STORAGE_OUTBOX_WORKER', True)
+    STORAGE_OUTBOX_POLL_SECONDS = _env_int('STORAGE_OUTBOX_POLL_SECONDS', 30)
+    STORAGE_OUTBOX_BATCH_SIZE = _env_int('STORAGE_OUTBOX_BATCH_SIZE', 100)
+    STORAGE_OUTBOX_LEASE_SECONDS = _env_int('STORAGE_OUTBOX_LEASE_SECONDS', 300)
+    STORAGE_OUTBOX_MAX_ATTEMPTS = _env_int('STORAGE_OUTBOX_MAX_ATTEMPTS', 8)
+    STORAGE_OUTBOX_BACKOFF_SECONDS = _env_int('STORAGE_OUTBOX_BACKOFF_SECONDS', 10)
+    STORAGE_OUTBOX_MAX_BACKOFF_SECONDS = _env_int('STORAGE_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+
+    # --- Upload de imagens (POST /api/maintenances/<id>/images) ---
+    # O servidor reencoda cada imagem (JPEG, lado maior até IMAGE_MAX_DIMENSION, sem EXIF)
+    # e gera uma miniatura quadrada de THUMBNAIL_SIZE px, num pool de IMAGE_WORKERS threads
+    IMAGE_UPLOAD_MAX_FILES = _env_int('IMAGE_UPLOAD_MAX_FILES', 10)
+    IMAGE_UPLOAD_MAX_BYTES = _env_int('IMAGE_UPLOAD_MAX_BYTES', 25 * 1024 * 1024)
+    IMAGE_MAX_PIXELS = _env_int('IMAGE_MAX_PIXELS', 50_000_000)  # Recusa "bombas de descompressão"
+    IMAGE_MAX_DIMENSION = _env_int('IMAGE_MAX_DIMENSION', 1920)
+    IMAGE_JPEG_QUALITY = _env_int('IMAGE_JPEG_QUALITY', 82)
+    THUMBNAIL_SIZE = _env_int('THUMBNAIL_SIZE', 320)
+    THUMBNAIL_JPEG_QUALITY = _env_int('THUMBNAIL_JPEG_QUALITY', 70)
+    IMAGE_WORKERS = _env_int('IMAGE_WORKERS', 4)
+
+    # --- Cache de respostas das rotas de leitura ---
+    # 'memory' (LRU por processo), 'shared' (Redis em RESPONSE_CACHE_URL; 'local://' usa
+    # um substituto em memória) ou 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'local://')
+    RESPONSE_CACHE_TTL = _env_int('RESPONSE_CACHE_TTL', 300)
+    RESPONSE_CACHE_MAX_ENTRIES = _env_int('RESPONSE_CACHE_MAX_ENTRIES', 5000)
+    RESPONSE_CACHE_MAX_BYTES = _env_int('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+
+    # --- Importação em lote de manutenções ---
+    IMPORT_MAX_ROWS = _env_int('IMPORT_MAX_ROWS', 10000)
+    # Linhas por INSERT em lote (executemany)
+    IMPORT_CHUNK_SIZE = _env_int('IMPORT_CHUNK_SIZE', 1000)
+
+    # --- Exportação do histórico ---
+    # Linhas lidas do banco por bloco durante a exportação em streaming
+    EXPORT_CHUNK_SIZE = _env_int('EXPORT_CHUNK_SIZE', 500)
+
+    # --- Métricas e instrumentação ---
+    # Instrumentação por requisição (tempo total, auth, busca do usuário, SQL, serialização) em /metrics
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED', True)
+    # Requisições mais lentas que isso (ms) são logadas com o detalhamento por fase; 0 desliga
+    SLOW_REQUEST_LOG_MS = _env_int('SLOW_REQUEST_LOG_MS', 1000)
+    # Acesso às rotas internas (/metrics e /ops/*): 'Authorization: Bearer <OPS_TOKEN>' ou origem em
+    # OPS_ALLOWED_IPS (IPs/redes CIDR separados por vírgula). Sem nenhum dos dois, ficam fechadas.
+    # Atrás de um proxy reverso o endereço visto é o do proxy: nesse caso use o token.
+    OPS_TOKEN = os.environ.get('OPS_TOKEN', '')
+    OPS_ALLOWED_IPS = os.environ.get('OPS_ALLOWED_IPS', '')
+
+    # --- Sincronização incremental (GET /api/sync) ---
+    # A marca d'água devolvida fica esse tanto (s) atrás do relógio do servidor, para
+    # não perder escritas de transações que ainda não tinham feito commit
+    SYNC_WATERMARK_LAG_SECONDS = _env_int('SYNC_WATERMARK_LAG_SECONDS', 30)
+    # Tombstones de exclusão mais antigos que isso são removidos (`flask purge-sync-tombstones`);
+    # um cliente com 'since' anterior a essa janela recebe a sincronização completa
+    SYNC_TOMBSTONE_RETENTION_DAYS = _env_int('SYNC_TOMBSTONE_RETENTION_DAYS', 90)
@@ -0,0 +1,160 @@
+import logging
+import sqlite3
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def gevent_patched():
+    """True se o processo roda com o monkey patching do gevent (worker cooperativo do gunicorn)."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def build_engine_options(config):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS a partir do perfil configurado."""
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+    if is_sqlite(uri):
+        if make_url(uri).database in (None, '', ':memory:'):
+            # Banco em memória: o Flask-SQLAlchemy já usa um pool de conexão única
+            return {}
+        # Mantém as conexões abertas entre requisições (o cache de páginas e o mmap
+        # continuam quentes) e deixa o próprio SQLite esperar pelo lock de escrita.
+        # Com gevent o pool é o mesmo: as escritas do processo são serializadas
+        # por serialize_sqlite_writes (configure_database).
+        options.update({
+            'poolclass': QueuePool,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'connect_args': {
+                'check_same_thread': False,
+                'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000.0,
+            },
+        })
+    else:
+        options.update({
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+        })
+    return options
+
+
+# Comandos que não pedem o lock de escrita do SQLite (o resto -- INSERT, UPDATE,
+# DELETE, WITH, SAVEPOINT... -- é tratado como escrita)
+_READ_ONLY_PREFIXES = ('SELECT', 'PRAGMA', 'EXPLAIN')
+
+
+def serialize_sqlite_writes(engine, timeout):
+    """
+    Com gevent, a espera pelo lock de escrita do SQLite (busy_timeout) acontece em C
+    e não cede aos outros greenlets: se quem segura o lock é outro greenlet do mesmo
+    processo, o worker inteiro para até o timeout. Um lock cooperativo por processo
+    (o threading já está patcheado) deixa uma transação de escrita por vez no
+    processo; as leituras (WAL) seguem em paralelo em todas as conexões do pool e
+    a espera dentro do SQLite fica só entre processos diferentes.
+    """
+    write_lock = threading.Lock()
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def acquire_write_lock(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get('sqlite_write_lock') or statement.lstrip().upper().startswith(_READ_ONLY_PREFIXES):
+            return
+        if not write_lock.acquire(timeout=timeout):
+            raise sqlite3.OperationalError('database is locked')
+        conn.info['sqlite_write_lock'] = True
+
+    def release_write_lock(info):
+        if info.pop('sqlite_write_lock', False):
+            write_lock.release()
+
+    # O release não cede o greenlet atual: o COMMIT/ROLLBACK de verdade roda antes
+    # que outro greenlet consiga começar a escrever
+    @event.listens_for(engine, 'commit')
+    def release_on_commit(conn):
+        release_write_lock(conn.info)
+
+    @event.listens_for(engine, 'rollback')
+    def release_on_rollback(conn):
+        release_write_lock(conn.info)
+
+    @event.listens_for(engine.pool, 'checkin')
+    def release_on_checkin(dbapi_connection, connection_record):
+        # Conexão devolvida sem commit/rollback explícito (ex.: invalidada)
+        release_write_lock(connection_record.info)
+
+
+def _sqlite_pragmas(config):
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+    ]
+
+
+def configure_database(app):
+    """
+    Aplica o perfil de engine ao app: opções de pool e pragmas do SQLite
+    em cada nova conexão. Deve ser chamado depois de db.init_app(app).
+    """
+    config = app.config
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    pragmas = _sqlite_pragmas(config) if is_sqlite(uri) else []
+
+    with app.app_context():
+        engine = db.get_engine(app)
+
+    if pragmas:
+        state = {'logged': False}
+
+        @event.listens_for(engine, 'connect')
+        def apply_sqlite_pragmas(dbapi_connection, connection_record):
+            if not isinstance(dbapi_connection, sqlite3.Connection):
+                return
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas:
+                    cursor.execute(f'PRAGMA {name}={value}')
+                if not state['logged']:
+                    # Lê de volta o que o SQLite realmente aplicou (ex.: WAL pode não ser suportado)
+                    effective = {}
+                    for name, _ in pragmas:
+                        row = cursor.execute(f'PRAGMA {name}').fetchone()
+                        effective[name] = row[0] if row else None
+                    logger.info(f"Pragmas SQLite efetivos: {effective}")
+                    state['logged'] = True
+            finally:
+                cursor.close()
+
+        if gevent_patched():
+            serialize_sqlite_writes(engine, config['DB_POOL_TIMEOUT'])
+            logger.info("Worker gevent com SQLite: escritas serializadas por processo")
+
+    pool_info = {key: value for key, value in config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+                 if key not in ('poolclass', 'connect_args')}
+    logger.info(
+        f"Banco de dados: {engine.url!r} | pool={type(engine.pool).__name__} {pool_info}"
+        + (f" | pragmas={dict(pragmas)}" if pragmas else '')
+    )
+    return engine
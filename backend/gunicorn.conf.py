@@ -0,0 +1,73 @@
+# Configuração do gunicorn (a partir da pasta backend):
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Todos os valores podem ser ajustados por variáveis de ambiente.
+#
+# Modo cooperativo (GUNICORN_WORKER_CLASS=gevent): o monkey patching torna
+# cooperativo todo I/O de rede (Firebase Auth, Storage, PostgreSQL via
+# psycogreen), então um único processo mantém centenas de requisições em
+# andamento enquanto elas esperam pela rede, com as mesmas rotas e o mesmo
+# código. O teto de admissão (MAX_CONCURRENT_REQUESTS) passa a ser
+# worker_connections e, com SQLite, as escritas são serializadas por processo.
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent':
+    # Precisa acontecer antes de qualquer outro import (sockets, ssl, threading)
+    from gevent import monkey
+    monkey.patch_all()
+
+import multiprocessing
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+workers = _env_int('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)
+# gthread: cada worker atende várias requisições em paralelo (as rotas esperam mais
+# pelo banco e pelo Firebase do que usam CPU)
+threads = _env_int('GUNICORN_THREADS', 4)
+# gevent: requisições simultâneas por worker
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+# Recicla os workers periodicamente (0 desliga); o jitter evita reinícios simultâneos
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 0)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 0)
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Carrega o app no mestre antes do fork: imports e create_app() acontecem uma vez e
+# os novos workers começam a atender em milissegundos. O valor é repassado ao app
+# (Config.PRELOAD_APP) para que ele não abra threads/conexões no mestre.
+preload_app = _env_bool('PRELOAD_APP', True)
+os.environ['PRELOAD_APP'] = '1' if preload_app else '0'
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            # Driver do PostgreSQL cooperativo (dependência opcional)
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            pass
+    if preload_app:
+        from app import init_worker_process
+        from wsgi import app
+        init_worker_process(app)
@@ -0,0 +1,111 @@
+"""Esquema base: cria as tabelas que faltarem e as colunas antigas de maintenance
+
+Substitui o script avulso migrate_db.py. Bancos criados por versões antigas
+(sem as colunas de oficina/garantia/custos) e bancos já criados por
+db.create_all() são levados ao mesmo esquema, sem recriar o que já existe.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# Colunas adicionadas a maintenance depois da primeira versão (antes via migrate_db.py)
+MAINTENANCE_LATE_COLUMNS = [
+    ('workshop', sa.String(100)),
+    ('mechanic', sa.String(100)),
+    ('labor_warranty_date', sa.String(20)),
+    ('labor_cost', sa.Float()),
+    ('parts', sa.String(200)),
+    ('parts_store', sa.String(100)),
+    ('parts_warranty_date', sa.String(20)),
+    ('parts_cost', sa.Float()),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if 'user' not in tables:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('firebase_uid', sa.String(length=128), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('cpf', sa.String(length=14), nullable=True),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('firebase_uid'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('cpf'),
+        )
+
+    if 'vehicle' not in tables:
+        op.create_table(
+            'vehicle',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('type', sa.String(length=20), nullable=False),
+            sa.Column('brand', sa.String(length=50), nullable=False),
+            sa.Column('model', sa.String(length=50), nullable=False),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('license_plate', sa.String(length=15), nullable=False),
+            sa.Column('color', sa.String(length=30), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'maintenance' not in tables:
+        op.create_table(
+            'maintenance',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('vehicle_id', sa.Integer(), nullable=False),
+            sa.Column('service_type', sa.String(length=100), nullable=False),
+            sa.Column('workshop', sa.String(length=100), nullable=False),
+            sa.Column('mechanic', sa.String(length=100), nullable=True),
+            sa.Column('labor_warranty_date', sa.String(length=20), nullable=True),
+            sa.Column('labor_cost', sa.Float(), nullable=True),
+            sa.Column('parts', sa.String(length=200), nullable=True),
+            sa.Column('parts_store', sa.String(length=100), nullable=True),
+            sa.Column('parts_warranty_date', sa.String(length=20), nullable=True),
+            sa.Column('parts_cost', sa.Float(), nullable=True),
+            sa.Column('service_date', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['vehicle_id'], ['vehicle.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    else:
+        existing = {col['name'] for col in inspector.get_columns('maintenance')}
+        for name, type_ in MAINTENANCE_LATE_COLUMNS:
+            if name not in existing:
+                op.add_column('maintenance', sa.Column(name, type_, nullable=True))
+
+    if 'maintenance_image' not in tables:
+        op.create_table(
+            'maintenance_image',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('maintenance_id', sa.Integer(), nullable=False),
+            sa.Column('image_url', sa.String(length=255), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['maintenance_id'], ['maintenance.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    # Esquema base: não há para onde voltar sem perder dados
+    pass
@@ -0,0 +1,39 @@
+"""Índices nas chaves estrangeiras e nas colunas de filtro/ordenação
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# (nome, tabela, colunas)
+INDEXES = [
+    ('ix_vehicle_user_id', 'vehicle', ['user_id']),
+    # Filtro por veículo + ordenação por data (listagem e paginação por keyset)
+    ('ix_maintenance_vehicle_service_date', 'maintenance', ['vehicle_id', 'service_date', 'id']),
+    ('ix_maintenance_service_date', 'maintenance', ['service_date']),
+    ('ix_maintenance_image_maintenance_id', 'maintenance_image', ['maintenance_id']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,42 @@
+"""Outbox de exclusões no Storage (storage_deletion)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'storage_deletion' in sa.inspect(op.get_bind()).get_table_names():
+        return  # Já criada por db.create_all()
+
+    op.create_table(
+        'storage_deletion',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_url', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_by', sa.String(length=36), nullable=True),
+        sa.Column('last_error', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_storage_deletion_status_next_attempt', 'storage_deletion',
+                    ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_storage_deletion_status_next_attempt', table_name='storage_deletion')
+    op.drop_table('storage_deletion')
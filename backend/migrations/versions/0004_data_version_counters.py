@@ -0,0 +1,34 @@
+"""Contadores de versão (data_version) em user e vehicle para ETags
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['user', 'vehicle']
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        columns = {col['name'] for col in inspector.get_columns(table)}
+        if 'data_version' not in columns:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('data_version')
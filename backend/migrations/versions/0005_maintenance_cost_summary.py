@@ -0,0 +1,57 @@
+"""Agregados de custo das manutenções (maintenance_cost_summary)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+MONTH_EXPRESSIONS = {
+    'sqlite': "strftime('%Y-%m', service_date)",
+    'postgresql': "to_char(service_date, 'YYYY-MM')",
+    'mysql': "date_format(service_date, '%Y-%m')",
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'maintenance_cost_summary' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'maintenance_cost_summary',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('vehicle_id', sa.Integer(), nullable=False),
+            sa.Column('month', sa.String(length=7), nullable=False),
+            sa.Column('service_type', sa.String(length=100), nullable=False),
+            sa.Column('maintenance_count', sa.Integer(), nullable=False),
+            sa.Column('labor_total', sa.Float(), nullable=False),
+            sa.Column('parts_total', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['vehicle_id'], ['vehicle.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('vehicle_id', 'month', 'service_type', name='uq_cost_summary_bucket'),
+        )
+
+    # Preenche a partir do histórico existente (a tabela pode ter sido criada vazia por db.create_all())
+    empty = bind.execute(sa.text('SELECT COUNT(*) FROM maintenance_cost_summary')).scalar() == 0
+    month = MONTH_EXPRESSIONS.get(bind.dialect.name)
+    if empty and month:
+        op.execute(
+            'INSERT INTO maintenance_cost_summary '
+            '(vehicle_id, month, service_type, maintenance_count, labor_total, parts_total) '
+            f'SELECT vehicle_id, {month}, service_type, COUNT(id), '
+            'COALESCE(SUM(labor_cost), 0), COALESCE(SUM(parts_cost), 0) '
+            f'FROM maintenance GROUP BY vehicle_id, {month}, service_type'
+        )
+
+
+def downgrade():
+    op.drop_table('maintenance_cost_summary')
@@ -0,0 +1,153 @@
+"""Datas de garantia como DATE indexado (labor_warranty_date, parts_warranty_date)
+
+Converte as strings existentes (o app grava DD/MM/AAAA) para DATE. Valores que
+não puderem ser interpretados ficam NULL na coluna, mas o texto original é
+guardado em maintenance_warranty_backup (e listado no log da migração); o
+downgrade devolve esse texto às colunas.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+import logging
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+COLUMNS = ['labor_warranty_date', 'parts_warranty_date']
+# Texto original das garantias que não viraram data
+BACKUP_TABLE = 'maintenance_warranty_backup'
+# Mesmos formatos aceitos por services.warranty.parse_warranty_date
+ACCEPTED_DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y')
+BATCH_SIZE = 1000
+
+
+def _parse(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    for date_format in ACCEPTED_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def _convert_columns(new_type, convert):
+    """Troca o tipo das colunas via coluna temporária, convertendo os valores em Python."""
+    bind = op.get_bind()
+    with op.batch_alter_table('maintenance') as batch_op:
+        for column in COLUMNS:
+            batch_op.add_column(sa.Column(f'{column}_new', new_type, nullable=True))
+
+    maintenance = sa.table('maintenance', sa.column('id', sa.Integer),
+                           *[sa.column(column) for column in COLUMNS],
+                           *[sa.column(f'{column}_new', new_type) for column in COLUMNS])
+    rows = bind.execute(sa.select(maintenance.c.id, *[maintenance.c[column] for column in COLUMNS])
+                        .where(sa.or_(*[maintenance.c[column].isnot(None) for column in COLUMNS]))).fetchall()
+
+    updates = []
+    for row in rows:
+        values = {'row_id': row.id}
+        for column in COLUMNS:
+            values[f'{column}_new'] = convert(row.id, column, row._mapping[column])
+        updates.append(values)
+
+    statement = (maintenance.update()
+                 .where(maintenance.c.id == sa.bindparam('row_id'))
+                 .values({f'{column}_new': sa.bindparam(f'{column}_new') for column in COLUMNS}))
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(statement, updates[start:start + BATCH_SIZE])
+
+    with op.batch_alter_table('maintenance') as batch_op:
+        for column in COLUMNS:
+            batch_op.drop_column(column)
+        for column in COLUMNS:
+            batch_op.alter_column(f'{column}_new', new_column_name=column)
+    return len(rows)
+
+
+def _backup_table():
+    return sa.table(BACKUP_TABLE, sa.column('maintenance_id', sa.Integer),
+                    sa.column('column_name', sa.String), sa.column('original_value', sa.String))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    types = {col['name']: col['type'] for col in inspector.get_columns('maintenance')}
+
+    if BACKUP_TABLE not in inspector.get_table_names():
+        op.create_table(
+            BACKUP_TABLE,
+            sa.Column('maintenance_id', sa.Integer(), nullable=False),
+            sa.Column('column_name', sa.String(length=30), nullable=False),
+            sa.Column('original_value', sa.String(length=20), nullable=True),
+            sa.PrimaryKeyConstraint('maintenance_id', 'column_name'),
+        )
+
+    if not isinstance(types['labor_warranty_date'], sa.Date):
+        unparsed = []
+
+        def to_date(row_id, column, value):
+            try:
+                return _parse(value)
+            except ValueError:
+                unparsed.append((row_id, column, value))
+                return None
+
+        converted = _convert_columns(sa.Date(), to_date)
+        logger.info(f"Datas de garantia convertidas em {converted} manutenção(ões)")
+        if unparsed:
+            op.bulk_insert(_backup_table(), [{'maintenance_id': row_id, 'column_name': column, 'original_value': value}
+                                             for row_id, column, value in unparsed])
+        for row_id, column, value in unparsed:
+            logger.warning(f"Manutenção {row_id}: {column} '{value}' não reconhecida como data; "
+                           f"gravada como NULL (texto original em {BACKUP_TABLE})")
+
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('maintenance')}
+    for column in COLUMNS:
+        name = f'ix_maintenance_{column}'
+        if name not in existing:
+            op.create_index(name, 'maintenance', [column], unique=False)
+
+
+def downgrade():
+    for column in COLUMNS:
+        op.drop_index(f'ix_maintenance_{column}', table_name='maintenance')
+
+    def to_string(row_id, column, value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        return value.strftime('%d/%m/%Y')
+
+    _convert_columns(sa.String(length=20), to_string)
+
+    # Devolve o texto original das garantias que não viraram data (se a coluna continua vazia)
+    if BACKUP_TABLE in sa.inspect(op.get_bind()).get_table_names():
+        bind = op.get_bind()
+        backup = _backup_table()
+        maintenance = sa.table('maintenance', sa.column('id', sa.Integer), *[sa.column(column) for column in COLUMNS])
+        for column in COLUMNS:
+            original = (sa.select(backup.c.original_value)
+                        .where(backup.c.maintenance_id == maintenance.c.id, backup.c.column_name == column)
+                        .scalar_subquery())
+            bind.execute(maintenance.update()
+                         .where(maintenance.c[column].is_(None),
+                                maintenance.c.id.in_(sa.select(backup.c.maintenance_id)
+                                                     .where(backup.c.column_name == column)))
+                         .values({column: original}))
+        op.drop_table(BACKUP_TABLE)
@@ -0,0 +1,79 @@
+"""Índice de busca textual (FTS5) das manutenções, com triggers de sincronização
+
+Só se aplica ao SQLite; nos outros bancos a busca usa LIKE e nada é criado.
+Com DB_CREATE_ALL o app cria os mesmos objetos junto com o db.create_all()
+(services/search.py); `flask rebuild-search-index` os recria e repopula o índice.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+OBJECTS = ['maintenance_fts', 'maintenance_fts_after_insert',
+           'maintenance_fts_after_delete', 'maintenance_fts_after_update']
+
+DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS maintenance_fts USING fts5(
+        service_type, workshop, mechanic, parts, parts_store, owner,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_insert AFTER INSERT ON maintenance BEGIN
+        INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+        SELECT new.id, new.service_type, new.workshop, new.mechanic, new.parts, new.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+        FROM vehicle WHERE vehicle.id = new.vehicle_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_delete AFTER DELETE ON maintenance BEGIN
+        DELETE FROM maintenance_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_update
+    AFTER UPDATE OF service_type, workshop, mechanic, parts, parts_store, vehicle_id ON maintenance BEGIN
+        DELETE FROM maintenance_fts WHERE rowid = old.id;
+        INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+        SELECT new.id, new.service_type, new.workshop, new.mechanic, new.parts, new.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+        FROM vehicle WHERE vehicle.id = new.vehicle_id;
+    END""",
+]
+
+REBUILD = [
+    "DELETE FROM maintenance_fts",
+    """INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+    SELECT maintenance.id, maintenance.service_type, maintenance.workshop, maintenance.mechanic,
+           maintenance.parts, maintenance.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+    FROM maintenance JOIN vehicle ON vehicle.id = maintenance.vehicle_id""",
+    "INSERT INTO maintenance_fts (maintenance_fts) VALUES ('optimize')",
+]
+
+
+def _existing_objects(bind):
+    names = ', '.join(f"'{name}'" for name in OBJECTS)
+    return {row[0] for row in bind.execute(sa.text(f"SELECT name FROM sqlite_master WHERE name IN ({names})"))}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    if set(OBJECTS) <= _existing_objects(bind):
+        return  # Já criados junto com o db.create_all()
+    for statement in DDL + REBUILD:
+        op.execute(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for trigger in OBJECTS[1:]:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS maintenance_fts")
@@ -0,0 +1,104 @@
+"""updated_at em vehicle/maintenance e tabela sync_tombstone para o sync incremental
+
+As linhas existentes recebem updated_at = created_at (ou o momento da migração),
+então o primeiro sync incremental de cada cliente não devolve nada de antigo.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['vehicle', 'maintenance']
+
+FTS_TRIGGERS = ['maintenance_fts_after_insert', 'maintenance_fts_after_delete', 'maintenance_fts_after_update']
+
+# Mesmos triggers da 0007, recriados no downgrade depois do batch
+FTS_TRIGGER_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_insert AFTER INSERT ON maintenance BEGIN
+        INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+        SELECT new.id, new.service_type, new.workshop, new.mechanic, new.parts, new.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+        FROM vehicle WHERE vehicle.id = new.vehicle_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_delete AFTER DELETE ON maintenance BEGIN
+        DELETE FROM maintenance_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_update
+    AFTER UPDATE OF service_type, workshop, mechanic, parts, parts_store, vehicle_id ON maintenance BEGIN
+        DELETE FROM maintenance_fts WHERE rowid = old.id;
+        INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+        SELECT new.id, new.service_type, new.workshop, new.mechanic, new.parts, new.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+        FROM vehicle WHERE vehicle.id = new.vehicle_id;
+    END""",
+]
+
+# (nome, tabela, colunas)
+INDEXES = [
+    ('ix_vehicle_user_updated_at', 'vehicle', ['user_id', 'updated_at']),
+    ('ix_maintenance_vehicle_updated_at', 'maintenance', ['vehicle_id', 'updated_at']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        columns = {col['name'] for col in inspector.get_columns(table)}
+        if 'updated_at' not in columns:
+            # Só ADD COLUMN (sem recriar a tabela): os triggers FTS5 de maintenance continuam valendo
+            op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        created_at = 'created_at' if 'created_at' in columns else 'NULL'
+        op.execute(f"UPDATE {table} SET updated_at = COALESCE({created_at}, CURRENT_TIMESTAMP) "
+                   f"WHERE updated_at IS NULL")
+
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+    if 'sync_tombstone' in inspector.get_table_names():
+        return  # Já criada por db.create_all()
+    op.create_table(
+        'sync_tombstone',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sync_tombstone_user_deleted_at', 'sync_tombstone',
+                    ['user_id', 'deleted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sync_tombstone_user_deleted_at', table_name='sync_tombstone')
+    op.drop_table('sync_tombstone')
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    fts_triggers = []
+    if sqlite:
+        # O batch recria as tabelas e os triggers FTS5 (que leem vehicle) impediriam a troca;
+        # são recriados logo depois (os ids das manutenções não mudam, o índice continua válido)
+        fts_triggers = [name for (name,) in op.get_bind().execute(sa.text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'maintenance_fts_%'"))]
+        for trigger in FTS_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+    if fts_triggers:
+        for statement in FTS_TRIGGER_DDL:
+            op.execute(statement)
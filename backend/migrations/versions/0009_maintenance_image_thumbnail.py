@@ -0,0 +1,27 @@
+"""thumbnail_url em maintenance_image (miniaturas geradas no upload pelo servidor)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {col['name'] for col in sa.inspect(op.get_bind()).get_columns('maintenance_image')}
+    if 'thumbnail_url' not in columns:
+        op.add_column('maintenance_image', sa.Column('thumbnail_url', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('maintenance_image') as batch_op:
+        batch_op.drop_column('thumbnail_url')
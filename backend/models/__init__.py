@@ -10,6 +10,8 @@ class User(db.Model):
     cpf = db.Column(db.String(14), unique=True, nullable=True) # Tornar opcional inicialmente
     phone = db.Column(db.String(20), nullable=True) # Tornar opcional inicialmente
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incrementado a cada escrita nos veículos/manutenções do usuário (base dos ETags)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     vehicles = db.relationship('Vehicle', backref='owner', lazy=True) # Adicionado relationship
 
     def __repr__(self):
@@ -17,7 +19,7 @@ class User(db.Model):
 
 class Vehicle(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     type = db.Column(db.String(20), nullable=False)  # carro, moto, caminhão
     brand = db.Column(db.String(50), nullable=False)
     model = db.Column(db.String(50), nullable=False)
@@ -25,26 +27,108 @@ class Vehicle(db.Model):
     license_plate = db.Column(db.String(15), nullable=False)
     color = db.Column(db.String(30))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incrementado a cada escrita nas manutenções do veículo (base dos ETags)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Última alteração do próprio veículo (sync incremental em GET /api/sync)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     maintenances = db.relationship('Maintenance', backref='vehicle', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Veículos do usuário alterados depois da marca d'água do cliente
+        db.Index('ix_vehicle_user_updated_at', 'user_id', 'updated_at'),
+    )
+
 class Maintenance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
     service_type = db.Column(db.String(100), nullable=False)
     workshop = db.Column(db.String(100), nullable=False)
     mechanic = db.Column(db.String(100))
-    labor_warranty_date = db.Column(db.String(20))
+    # Datas de garantia como DATE indexado (busca por vencimento com range scan)
+    labor_warranty_date = db.Column(db.Date, index=True)
     labor_cost = db.Column(db.Float)
     parts = db.Column(db.String(200))
     parts_store = db.Column(db.String(100))
-    parts_warranty_date = db.Column(db.String(20))
+    parts_warranty_date = db.Column(db.Date, index=True)
     parts_cost = db.Column(db.Float)
-    service_date = db.Column(db.DateTime, nullable=False)
+    service_date = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     images = db.relationship('MaintenanceImage', backref='maintenance', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Cobre o filtro por veículo + ordenação/paginação por (service_date, id)
+        # e também as buscas só por vehicle_id (prefixo do índice)
+        db.Index('ix_maintenance_vehicle_service_date', 'vehicle_id', 'service_date', 'id'),
+        # Manutenções alteradas por veículo depois da marca d'água (sync incremental)
+        db.Index('ix_maintenance_vehicle_updated_at', 'vehicle_id', 'updated_at'),
+    )
+
 class MaintenanceImage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    maintenance_id = db.Column(db.Integer, db.ForeignKey('maintenance.id'), nullable=False)
+    maintenance_id = db.Column(db.Integer, db.ForeignKey('maintenance.id'), nullable=False, index=True)
+    image_url = db.Column(db.String(255), nullable=False)
+    # Miniatura gerada no upload pelo servidor (None para imagens enviadas direto pelo cliente)
+    thumbnail_url = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class StorageDeletion(db.Model):
+    # Outbox de exclusões no Storage: gravada na mesma transação que remove as
+    # imagens do banco e processada depois pelo worker (services/storage_outbox.py)
+    __tablename__ = 'storage_deletion'
+
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'  # Esgotou as tentativas; precisa de intervenção manual
+
+    id = db.Column(db.Integer, primary_key=True)
     image_url = db.Column(db.String(255), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    status = db.Column(db.String(10), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(36))
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Busca das exclusões pendentes e já vencidas pelo worker
+        db.Index('ix_storage_deletion_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+class MaintenanceCostSummary(db.Model):
+    # Agregados de custo por (veículo, mês, tipo de serviço), mantidos de forma
+    # incremental pelas rotas de escrita (services/cost_summary.py). Pode ser
+    # reconstruída do zero com `flask rebuild-cost-summary`.
+    __tablename__ = 'maintenance_cost_summary'
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
+    month = db.Column(db.String(7), nullable=False)  # 'AAAA-MM' de service_date
+    service_type = db.Column(db.String(100), nullable=False)
+    maintenance_count = db.Column(db.Integer, nullable=False, default=0)
+    labor_total = db.Column(db.Float, nullable=False, default=0)
+    parts_total = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('vehicle_id', 'month', 'service_type', name='uq_cost_summary_bucket'),
+    )
+
+class SyncTombstone(db.Model):
+    # Exclusões feitas pelas rotas de veículo e manutenção, para o sync incremental:
+    # o cliente remove localmente o que foi excluído depois da sua marca d'água.
+    # Excluir um veículo gera só o tombstone do veículo (as manutenções vão junto).
+    __tablename__ = 'sync_tombstone'
+
+    ENTITY_VEHICLE = 'vehicle'
+    ENTITY_MAINTENANCE = 'maintenance'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_sync_tombstone_user_deleted_at', 'user_id', 'deleted_at'),
+    )
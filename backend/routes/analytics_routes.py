@@ -0,0 +1,89 @@
+import re
+
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func
+
+from extensions import db
+from models import Vehicle, MaintenanceCostSummary
+from .auth_routes import user_required
+from services.etag import make_etag, is_not_modified, not_modified_response, with_etag, cached_response
+from services.response_cache import response_cache
+
+analytics_bp = Blueprint('analytics', __name__)
+
+MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+def _bucket_data(count, labor_total, parts_total):
+    labor_total = round(labor_total or 0.0, 2)
+    parts_total = round(parts_total or 0.0, 2)
+    total = round(labor_total + parts_total, 2)
+    return {
+        'count': count,
+        'labor_total': labor_total,
+        'parts_total': parts_total,
+        'total': total,
+        'average': round(total / count, 2) if count else 0.0,
+    }
+
+
+@analytics_bp.route('/costs', methods=['GET'])
+@user_required
+def get_cost_analytics(current_user):
+    """
+    Gastos (mão de obra + peças) por veículo, por mês e por tipo de serviço.
+    Lê a tabela de agregados maintenance_cost_summary: o custo depende do número
+    de baldes (veículo, mês, tipo), não do número de manutenções.
+    Filtros opcionais: vehicle_id, from e to (AAAA-MM, inclusivos).
+    """
+    etag = make_etag('costs', current_user.id, current_user.data_version)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    cached = response_cache.get(current_user)
+    if cached is not None:
+        return cached_response(cached)
+
+    month_from = request.args.get('from')
+    month_to = request.args.get('to')
+    for value in (month_from, month_to):
+        if value and not MONTH_PATTERN.match(value):
+            return jsonify({'message': 'Mês inválido (formato AAAA-MM)'}), 400
+    vehicle_id = request.args.get('vehicle_id', type=int)
+
+    summary = MaintenanceCostSummary
+    sums = (func.sum(summary.maintenance_count), func.sum(summary.labor_total), func.sum(summary.parts_total))
+
+    def scoped(query):
+        query = query.join(Vehicle, Vehicle.id == summary.vehicle_id).filter(Vehicle.user_id == current_user.id)
+        if vehicle_id is not None:
+            query = query.filter(summary.vehicle_id == vehicle_id)
+        if month_from:
+            query = query.filter(summary.month >= month_from)
+        if month_to:
+            query = query.filter(summary.month <= month_to)
+        return query
+
+    by_vehicle_rows = (scoped(db.session.query(Vehicle.id, Vehicle.brand, Vehicle.model, Vehicle.license_plate, *sums))
+                       .group_by(Vehicle.id, Vehicle.brand, Vehicle.model, Vehicle.license_plate)
+                       .order_by(Vehicle.id).all())
+    by_month_rows = scoped(db.session.query(summary.month, *sums)).group_by(summary.month).order_by(summary.month).all()
+    by_type_rows = (scoped(db.session.query(summary.service_type, *sums))
+                    .group_by(summary.service_type).order_by(summary.service_type).all())
+
+    by_vehicle = [{'vehicle_id': row[0], 'brand': row[1], 'model': row[2], 'license_plate': row[3],
+                   **_bucket_data(*row[4:])} for row in by_vehicle_rows]
+    by_month = [{'month': row[0], **_bucket_data(*row[1:])} for row in by_month_rows]
+    by_service_type = [{'service_type': row[0], **_bucket_data(*row[1:])} for row in by_type_rows]
+    totals = _bucket_data(sum(row[4] for row in by_vehicle_rows),
+                          sum(row[5] for row in by_vehicle_rows),
+                          sum(row[6] for row in by_vehicle_rows))
+
+    response = with_etag(jsonify({
+        'totals': totals,
+        'by_vehicle': by_vehicle,
+        'by_month': by_month,
+        'by_service_type': by_service_type,
+    }), etag)
+    response_cache.set(current_user, response)
+    return response, 200
@@ -1,11 +1,59 @@
-from flask import Blueprint, request, jsonify, current_app
+import logging
+from flask import Blueprint, request, jsonify, current_app, g
 from models import User
 from extensions import db
 # Remover imports não utilizados: jwt, datetime, generate_password_hash, check_password_hash, re
 from firebase_admin import auth # Importar auth do firebase_admin
 from functools import wraps # Importar wraps
+from services.token_cache import token_cache
+from services.user_cache import user_cache
+from services.metrics import timed
+from services.firebase import get_firebase_app
+from services.admission import AdmissionRejected, admission, rejected_response
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
+
+def verify_firebase_token(id_token):
+    """
+    Verifica o ID token, consultando antes o cache de tokens já verificados.
+    Só faz a verificação completa (assinatura, exp, aud) em caso de miss.
+    """
+    with timed('auth'):
+        decoded_token = token_cache.get(id_token)
+        if decoded_token is not None:
+            return decoded_token
+
+        check_revoked = current_app.config.get('FIREBASE_CHECK_REVOKED', False)
+        decoded_token = auth.verify_id_token(id_token, check_revoked=check_revoked, app=get_firebase_app())
+        token_cache.put(id_token, decoded_token)
+        return decoded_token
+
+
+def revoke_user_tokens(firebase_uid):
+    """Revoga os refresh tokens do usuário no Firebase e descarta seus tokens do cache."""
+    auth.revoke_refresh_tokens(firebase_uid, app=get_firebase_app())
+    token_cache.invalidate_uid(firebase_uid)
+
+
+def resolve_local_user(firebase_uid):
+    """
+    Busca o User local do firebase_uid, usando o cache uid -> id quando possível
+    (sempre um SELECT: ver a troca descrita em services/user_cache.py).
+    """
+    with timed('user_lookup'):
+        user_id = user_cache.get(firebase_uid)
+        if user_id is not None:
+            user = User.query.get(user_id)
+            if user is not None and user.firebase_uid == firebase_uid:
+                return user
+            user_cache.invalidate(firebase_uid)
+
+        user = User.query.filter_by(firebase_uid=firebase_uid).first()
+        if user is not None:
+            user_cache.put(firebase_uid, user.id)
+        return user
+
 
 # Decorator para verificar o token Firebase ID
 def firebase_token_required(f):
@@ -20,34 +68,58 @@ def firebase_token_required(f):
             id_token = id_token.split('Bearer ')[1]
 
         try:
-            # Verificar o ID token usando o Firebase Admin SDK.
+            # Verificar o ID token usando o Firebase Admin SDK (com cache).
             # Isso verifica a assinatura, expiração e aud (audience).
-            decoded_token = auth.verify_id_token(id_token)
+            decoded_token = verify_firebase_token(id_token)
             firebase_uid = decoded_token['uid']
 
-            # Buscar ou criar usuário no banco de dados local
-            current_user = User.query.filter_by(firebase_uid=firebase_uid).first()
-
-            # Se o usuário não existe no DB local, mas o token é válido,
-            # podemos criá-lo aqui ou deixar a rota /sync_user fazer isso.
-            # Por segurança, vamos apenas passar o UID por enquanto.
-            # O endpoint protegido pode então buscar o usuário pelo UID.
-            # Ou podemos adicionar o usuário ao contexto da requisição (g)
-            # from flask import g
-            # g.current_user = current_user
-            # g.firebase_uid = firebase_uid
-
+            # Controle de admissão antes de tocar no banco: limite por usuário (429)
+            # e vaga no limite de requisições simultâneas do processo (503)
+            holds_slot = admission.admit(firebase_uid)
+        except AdmissionRejected as e:
+            return rejected_response(e)
         except auth.ExpiredIdTokenError:
             return jsonify({"message": "Token expirado"}), 401
+        except auth.RevokedIdTokenError:
+            token_cache.invalidate_token(id_token)
+            return jsonify({"message": "Token revogado"}), 401
         except auth.InvalidIdTokenError as e:
-            print(f"Token inválido: {e}")
+            logger.info(f"Token inválido: {e}")
             return jsonify({"message": "Token inválido"}), 401
-        except Exception as e:
-            print(f"Erro na verificação do token: {e}")
+        except Exception:
+            logger.exception("Erro na verificação do token")
             return jsonify({"message": "Erro interno na verificação do token"}), 500
 
-        # Passa o firebase_uid para a função da rota
-        return f(firebase_uid, *args, **kwargs)
+        # A vaga é devolvida quando a rota retorna (o corpo de respostas em streaming é gerado depois)
+        try:
+            # Buscar o usuário no banco de dados local uma única vez por requisição.
+            # Pode ser None se o usuário ainda não passou por /sync_user.
+            g.firebase_uid = firebase_uid
+            g.firebase_claims = decoded_token
+            try:
+                g.current_user = resolve_local_user(firebase_uid)
+            except Exception:
+                logger.exception(f"Erro ao buscar o usuário local do UID {firebase_uid}")
+                return jsonify({"message": "Erro interno ao carregar o usuário"}), 500
+
+            # Passa o firebase_uid para a função da rota
+            return f(firebase_uid, *args, **kwargs)
+        finally:
+            if holds_slot:
+                admission.release()
+    return decorated_function
+
+
+# Decorator para rotas que exigem o usuário já sincronizado no banco local
+def user_required(f):
+    @wraps(f)
+    @firebase_token_required
+    def decorated_function(firebase_uid, *args, **kwargs):
+        if g.current_user is None:
+            return jsonify({'message': 'Usuário local não encontrado'}), 404
+
+        # Passa o User já resolvido pelo decorator para a função da rota
+        return f(g.current_user, *args, **kwargs)
     return decorated_function
 
 
@@ -60,13 +132,18 @@ def sync_user(firebase_uid):
     Cria ou atualiza o usuário no banco de dados local.
     """
     try:
-        # Obter informações do usuário do Firebase Auth usando o UID
-        firebase_user = auth.get_user(firebase_uid)
-        email = firebase_user.email
-        name = firebase_user.display_name
-
-        # Verificar se o usuário já existe no banco de dados local
-        user = User.query.filter_by(firebase_uid=firebase_uid).first()
+        # E-mail e nome vêm das claims do ID token já verificado; só consulta o
+        # Firebase Auth (chamada HTTP bloqueante) se o token não trouxer o e-mail
+        claims = g.firebase_claims
+        email = claims.get('email')
+        name = claims.get('name')
+        if not email:
+            firebase_user = auth.get_user(firebase_uid, app=get_firebase_app())
+            email = firebase_user.email
+            name = firebase_user.display_name
+
+        # Usuário local já resolvido pelo decorator (None se ainda não existe)
+        user = g.current_user
 
         if not user:
             # Se não existe, cria um novo usuário
@@ -84,6 +161,7 @@ def sync_user(firebase_uid):
             )
             db.session.add(user)
             db.session.commit()
+            user_cache.invalidate(firebase_uid)
             print(f"Novo usuário criado no DB local: UID={firebase_uid}, Email={email}")
             return jsonify({"message": "Usuário sincronizado com sucesso (novo)", "user_id": user.id}), 201
         else:
@@ -105,6 +183,7 @@ def sync_user(firebase_uid):
 
             if updated:
                 db.session.commit()
+                user_cache.invalidate(firebase_uid)
                 print(f"Usuário atualizado no DB local: UID={firebase_uid}")
 
             return jsonify({"message": "Usuário sincronizado com sucesso (existente)", "user_id": user.id}), 200
@@ -117,6 +196,24 @@ def sync_user(firebase_uid):
         return jsonify({"message": f"Erro ao sincronizar usuário: {str(e)}"}), 500
 
 
+# Logout em todos os dispositivos: revoga os refresh tokens no Firebase e descarta
+# do cache os ID tokens já verificados do usuário
+@auth_bp.route('/revoke', methods=['POST'])
+@firebase_token_required
+def revoke_tokens(firebase_uid):
+    """
+    Chamado pelo app no logout. Sem refresh token o cliente não obtém novos ID
+    tokens; os já emitidos são recusados na hora com FIREBASE_CHECK_REVOKED e,
+    sem ele, deixam de valer quando expiram (até 1 hora).
+    """
+    try:
+        revoke_user_tokens(firebase_uid)
+    except Exception as e:
+        logger.exception(f"Erro ao revogar tokens do usuário {firebase_uid}: {e}")
+        return jsonify({"message": "Erro ao revogar tokens"}), 500
+    return jsonify({"message": "Tokens revogados"}), 200
+
+
 # Remover rotas /register, /login e /verify
 # @auth_bp.route('/register', methods=['POST']) ... (REMOVIDO)
 # @auth_bp.route('/login', methods=['POST']) ... (REMOVIDO)
@@ -1,130 +1,148 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from extensions import db
-from models import Maintenance, MaintenanceImage, Vehicle, User
+from models import Maintenance, MaintenanceImage, SyncTombstone, Vehicle
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+from services.pagination import PaginationError, parse_page_args, parse_cursor_datetime, encode_cursor
 from datetime import datetime
-from .auth_routes import firebase_token_required
-from firebase_admin import storage # Importar storage
-import urllib.parse # Para decodificar URL
+from .auth_routes import user_required
+from services.storage_outbox import enqueue_storage_deletions, notify_storage_outbox, record_orphaned_files
+from services.etag import touch_vehicle, make_etag, is_not_modified, not_modified_response, with_etag, cached_response
+from services.response_cache import response_cache
+from services.maintenance_import import ImportFormatError, read_rows, import_maintenances
+from services.maintenance_export import EXPORT_FORMATS, generate_export
+from services.cost_summary import cost_key, record_maintenance, record_maintenance_change
+from services.warranty import WARRANTY_FIELDS, parse_warranty_date, expiring_warranties
+from services.search import parse_search_cursor, search_maintenances
+from services.serializers import MAINTENANCE, FieldsError, json_response, maintenance_dicts
+from services.sync import record_tombstone
+from services.image_pipeline import ImageProcessingError, ImageUploadError, get_image_pipeline, images_available
 import logging # Para logs
 import traceback # Para logar stack trace completo
 
 maintenance_bp = Blueprint('maintenance', __name__)
 logger = logging.getLogger(__name__) # Configurar logger
 
-# --- Função Auxiliar para Extrair Caminho do Storage ---
-def get_storage_path_from_url(image_url):
-    """Extrai o caminho do arquivo no Firebase Storage a partir da URL de download."""
-    logger.debug(f"Tentando extrair caminho da URL: {image_url}")
-    try:
-        decoded_url = urllib.parse.unquote(image_url)
-        logger.debug(f"URL decodificada: {decoded_url}")
-        # Tenta encontrar /o/ que marca o início do caminho do objeto no bucket
-        path_start_marker = '/o/'
-        path_start_index = decoded_url.find(path_start_marker)
-
-        if path_start_index == -1:
-            logger.warning(f"Marcador '/o/' não encontrado na URL decodificada: {decoded_url}")
-            return None
-
-        path_start = path_start_index + len(path_start_marker)
-
-        # Tenta encontrar ?alt=media que marca o fim do caminho
-        path_end_marker = '?alt=media'
-        path_end_index = decoded_url.find(path_end_marker, path_start) # Busca a partir do início do caminho
+MAX_WARRANTY_DAYS = 3650
+DEFAULT_SEARCH_LIMIT = 20
+
+def reconcile_maintenance_images(maintenance_id, image_urls):
+    """
+    Ajusta as imagens da manutenção para a lista recebida pela diferença entre os
+    conjuntos: insere só as URLs novas e remove só as que saíram (sem commit).
+    As URLs removidas que nenhuma outra manutenção usa vão para a outbox de
+    exclusão do Storage. Retorna essas URLs.
+    """
+    wanted = list(dict.fromkeys(url for url in image_urls if url))  # Sem duplicadas, na ordem recebida
+    current = (db.session.query(MaintenanceImage.id, MaintenanceImage.image_url, MaintenanceImage.thumbnail_url)
+               .filter_by(maintenance_id=maintenance_id).all())
+
+    kept = set()
+    stale_ids = []
+    removed = []
+    thumbnails = {}
+    for image_id, url, thumbnail_url in current:
+        if url in wanted and url not in kept:
+            kept.add(url)
+        else:
+            stale_ids.append(image_id)  # Removida da lista (ou linha duplicada)
+            if url not in wanted and url not in removed:
+                removed.append(url)
+                if thumbnail_url:
+                    thumbnails[url] = thumbnail_url
+
+    if stale_ids:
+        (MaintenanceImage.query.filter(MaintenanceImage.id.in_(stale_ids))
+         .delete(synchronize_session=False))
+    new_urls = [url for url in wanted if url not in kept]
+    if new_urls:
+        db.session.add_all([MaintenanceImage(maintenance_id=maintenance_id, image_url=url) for url in new_urls])
+    if stale_ids or new_urls:
+        # As imagens vêm aninhadas na manutenção: mudar a lista conta como alteração dela (sync incremental)
+        (Maintenance.query.filter_by(id=maintenance_id)
+         .update({Maintenance.updated_at: datetime.utcnow()}, synchronize_session=False))
+
+    if removed:
+        # A mesma URL pode estar em outra manutenção (ex.: cópia de registro): essa fica no Storage
+        shared = {url for (url,) in db.session.query(MaintenanceImage.image_url)
+                  .filter(MaintenanceImage.image_url.in_(removed),
+                          MaintenanceImage.maintenance_id != maintenance_id)
+                  .distinct()}
+        removed = [url for url in removed if url not in shared]
+        # A miniatura sai junto com a imagem original
+        removed += [thumbnails[url] for url in removed if url in thumbnails]
+        enqueue_storage_deletions(removed)
+    logger.info(f"Imagens da manutenção {maintenance_id}: {len(new_urls)} adicionada(s), {len(stale_ids)} removida(s)")
+    return removed
 
-        if path_end_index == -1:
-            logger.warning(f"Marcador '?alt=media' não encontrado após o caminho na URL: {decoded_url}")
-            # Considerar que talvez a URL não tenha query parameters? Pouco provável para downloadURL.
-            # Se a URL for apenas o caminho, isso pode falhar. Ajustar se necessário.
-            # Por enquanto, retorna None se não encontrar o fim esperado.
-            return None
+@maintenance_bp.route('/vehicle/<int:vehicle_id>', methods=['GET'])
+@user_required
+def get_vehicle_maintenances(current_user, vehicle_id):
+    # Cache por usuário: a entrada só existe se a posse do veículo já foi verificada
+    cached = response_cache.get(current_user)
+    if cached is not None:
+        return cached_response(cached)
+
+    vehicle = Vehicle.query.filter_by(id=vehicle_id, user_id=current_user.id).first()
+    if not vehicle:
+        return jsonify({'message': 'Veículo não encontrado ou não pertence a este usuário'}), 404
 
-        extracted_path = decoded_url[path_start:path_end_index]
-        logger.info(f"Caminho extraído do Storage: {extracted_path}")
-        return extracted_path
+    # Lista inalterada desde a última leitura do cliente: 304 sem carregar as manutenções
+    etag = make_etag('vehicle-maintenances', vehicle.id, vehicle.data_version)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
 
-    except Exception as e:
-        logger.error(f"Erro EXCEPCIONAL ao extrair caminho da URL {image_url}: {e}")
-        logger.error(traceback.format_exc()) # Log completo do erro
-        return None
-
-# --- Função Auxiliar para Deletar Imagem do Storage ---
-def delete_image_from_storage(image_url):
-    """Deleta uma imagem do Firebase Storage usando sua URL."""
-    file_path = get_storage_path_from_url(image_url)
-    if file_path:
-        try:
-            bucket = storage.bucket() # Obtém o bucket padrão (verifique se é o correto no Firebase Console)
-            logger.info(f"Tentando deletar blob: '{file_path}' do bucket: '{bucket.name}'")
-            blob = bucket.blob(file_path)
-            blob.delete() # A exclusão em si
-            logger.info(f"Blob deletado do Storage com sucesso: {file_path}")
-            return True
-        except Exception as e:
-            # Log detalhado da exceção
-            logger.error(f"Falha ao deletar blob '{file_path}' do Storage: {type(e).__name__} - {e}")
-            # Verifica se o erro é 'NotFound' (código 404 geralmente)
-            # A API Python pode levantar google.cloud.exceptions.NotFound
-            from google.cloud.exceptions import NotFound
-            if isinstance(e, NotFound):
-                 logger.warning(f"Blob não encontrado no Storage (pode já ter sido deletado): {file_path}")
-                 return True # Considerar sucesso se não encontrada
-            else:
-                 # Logar o stack trace para outros erros
-                 logger.error(traceback.format_exc())
-                 return False # Falha na exclusão por outro motivo
+    try:
+        fields = MAINTENANCE.parse_fields(request.args)
+        limit, cursor = parse_page_args(request.args, cursor_size=2)
+        if cursor:
+            cursor_date, cursor_id = parse_cursor_datetime(cursor[0]), int(cursor[1])
+    except (PaginationError, FieldsError, TypeError, ValueError) as e:
+        return jsonify({'message': str(e) if isinstance(e, (PaginationError, FieldsError)) else 'Cursor inválido'}), 400
+
+    # Só as colunas pedidas, como tuplas (sem hidratar objetos ORM); as imagens vêm
+    # numa única query extra. Paginação por keyset em (service_date, id), coberta
+    # pelo índice ix_maintenance_vehicle_service_date
+    query = (db.session.query(*MAINTENANCE.columns(fields), Maintenance.service_date.label('cursor_date'))
+             .filter(Maintenance.vehicle_id == vehicle_id)
+             .order_by(Maintenance.service_date.desc(), Maintenance.id.desc()))
+    if cursor:
+        query = query.filter(or_(
+            Maintenance.service_date < cursor_date,
+            and_(Maintenance.service_date == cursor_date, Maintenance.id < cursor_id)
+        ))
+    if limit:
+        # Busca um registro a mais só para saber se existe próxima página
+        rows = query.limit(limit + 1).all()
     else:
-        logger.error(f"Não foi possível obter o caminho do arquivo para deletar a URL: {image_url}")
-        return False # Falha na extração do caminho
+        rows = query.all()
 
-@maintenance_bp.route('/vehicle/<int:vehicle_id>', methods=['GET'])
-@firebase_token_required
-def get_vehicle_maintenances(firebase_uid, vehicle_id):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].cursor_date, rows[-1].id)
 
-    vehicle = Vehicle.query.filter_by(id=vehicle_id, user_id=user.id).first()
-    if not vehicle:
-        return jsonify({'message': 'Veículo não encontrado ou não pertence a este usuário'}), 404
-
-    maintenances = Maintenance.query.filter_by(vehicle_id=vehicle_id).order_by(Maintenance.service_date.desc()).all()
-    output = []
-    for maintenance in maintenances:
-        images = [image.image_url for image in maintenance.images]
-        maintenance_data = {
-            'id': maintenance.id,
-            'service_type': maintenance.service_type,
-            'workshop': maintenance.workshop,
-            'mechanic': maintenance.mechanic,
-            'labor_warranty_date': maintenance.labor_warranty_date,
-            'labor_cost': maintenance.labor_cost,
-            'parts': maintenance.parts,
-            'parts_store': maintenance.parts_store,
-            'parts_warranty_date': maintenance.parts_warranty_date,
-            'parts_cost': maintenance.parts_cost,
-            'service_date': maintenance.service_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'created_at': maintenance.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'images': images
-        }
-        output.append(maintenance_data)
-    return jsonify({'maintenances': output}), 200
+    output = maintenance_dicts(rows, fields)
+    response = with_etag(json_response({'maintenances': output, 'next_cursor': next_cursor}), etag)
+    response_cache.set(current_user, response)
+    return response, 200
 
 @maintenance_bp.route('/add', methods=['POST'])
-@firebase_token_required
-def add_maintenance(firebase_uid):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
-
+@user_required
+def add_maintenance(current_user):
     data = request.get_json()
     if not data or not data.get('vehicle_id') or not data.get('service_type') or not data.get('workshop'):
         return jsonify({'message': 'Campos obrigatórios não fornecidos'}), 400
 
-    vehicle = Vehicle.query.filter_by(id=data['vehicle_id'], user_id=user.id).first()
+    vehicle = Vehicle.query.filter_by(id=data['vehicle_id'], user_id=current_user.id).first()
     if not vehicle:
         return jsonify({'message': 'Veículo não encontrado ou não pertence a este usuário'}), 404
 
+    try:
+        warranty_dates = {field: parse_warranty_date(data.get(field)) for field in WARRANTY_FIELDS}
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
     try:
         service_date = datetime.strptime(data.get('service_date', ''), '%Y-%m-%d %H:%M:%S') if data.get('service_date') else datetime.utcnow()
 
@@ -133,17 +151,18 @@ def add_maintenance(firebase_uid):
             service_type=data['service_type'],
             workshop=data['workshop'],
             mechanic=data.get('mechanic'),
-            labor_warranty_date=data.get('labor_warranty_date'),
+            labor_warranty_date=warranty_dates['labor_warranty_date'],
             labor_cost=data.get('labor_cost'),
             parts=data.get('parts'),
             parts_store=data.get('parts_store'),
-            parts_warranty_date=data.get('parts_warranty_date'),
+            parts_warranty_date=warranty_dates['parts_warranty_date'],
             parts_cost=data.get('parts_cost'),
             service_date=service_date
         )
 
         db.session.add(new_maintenance)
         db.session.flush()
+        record_maintenance(new_maintenance)
 
         if data.get('images'):
             for image_url in data['images']:
@@ -153,66 +172,218 @@ def add_maintenance(firebase_uid):
                 )
                 db.session.add(new_image)
 
+        touch_vehicle(vehicle.id, current_user.id)
         db.session.commit()
 
-        response_data = {
-            'id': new_maintenance.id,
-            'vehicle_id': new_maintenance.vehicle_id,
-            'service_type': new_maintenance.service_type,
-            'workshop': new_maintenance.workshop,
-            'mechanic': new_maintenance.mechanic,
-            'labor_warranty_date': new_maintenance.labor_warranty_date,
-            'labor_cost': new_maintenance.labor_cost,
-            'parts': new_maintenance.parts,
-            'parts_store': new_maintenance.parts_store,
-            'parts_warranty_date': new_maintenance.parts_warranty_date,
-            'parts_cost': new_maintenance.parts_cost,
-            'service_date': new_maintenance.service_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'created_at': new_maintenance.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'images': data.get('images', [])
-        }
-        return jsonify({'message': 'Manutenção adicionada com sucesso', 'maintenance': response_data}), 201
+        response_data = MAINTENANCE.object_to_dict(new_maintenance)
+        response_data['images'] = response_data['thumbnails'] = data.get('images', [])
+        return json_response({'message': 'Manutenção adicionada com sucesso', 'maintenance': response_data}, 201)
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Erro ao adicionar manutenção: {str(e)}'}), 500
 
-@maintenance_bp.route('/<int:maintenance_id>', methods=['DELETE'])
-@firebase_token_required
-def delete_maintenance(firebase_uid, maintenance_id):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
+@maintenance_bp.route('/import', methods=['POST'])
+@user_required
+def import_maintenances_route(current_user):
+    """
+    Importação em lote de manutenções (com imagens) para veículos do usuário.
+    Aceita JSON {"maintenances": [...]} ou CSV (corpo text/csv ou arquivo no campo 'file',
+    imagens separadas por '|'). Linhas inválidas são ignoradas e listadas em 'errors'.
+    """
+    try:
+        rows = read_rows(request, current_app.config['IMPORT_MAX_ROWS'])
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return jsonify({'message': str(e) if isinstance(e, ImportFormatError) else 'Arquivo CSV deve estar em UTF-8'}), 400
 
-    maintenance = Maintenance.query.get(maintenance_id)
+    try:
+        vehicle_ids, imported, errors = import_maintenances(current_user.id, rows,
+                                                            current_app.config['IMPORT_CHUNK_SIZE'])
+        for vehicle_id in vehicle_ids:
+            touch_vehicle(vehicle_id, current_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erro na importação de manutenções: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'message': f'Erro ao importar manutenções: {str(e)}'}), 500
+
+    logger.info(f"Importação de manutenções do usuário {current_user.id}: {imported} importada(s), {len(errors)} com erro")
+    return jsonify({
+        'message': f'{imported} manutenção(ões) importada(s)',
+        'imported': imported,
+        'failed': len(errors),
+        'errors': errors
+    }), 201 if imported else 400
+
+@maintenance_bp.route('/search', methods=['GET'])
+@user_required
+def search_maintenances_route(current_user):
+    """
+    Busca textual (?q=) em tipo de serviço, oficina, mecânico, peças e loja, nas
+    manutenções dos veículos do usuário (opcionalmente ?vehicle_id=). Resultados
+    por relevância, paginados com limit/cursor.
+    """
+    search = request.args.get('q', '').strip()
+    if not search:
+        return jsonify({'message': 'Parâmetro q é obrigatório'}), 400
+    vehicle_id = request.args.get('vehicle_id', type=int)
+
+    try:
+        limit, cursor = parse_page_args(request.args, cursor_size=2)
+        after = parse_search_cursor(cursor) if cursor else None
+    except PaginationError as e:
+        return jsonify({'message': str(e)}), 400
+    limit = limit or DEFAULT_SEARCH_LIMIT
+
+    etag = make_etag('search', current_user.id, current_user.data_version)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    rows, has_more = search_maintenances(current_user.id, search, limit, after, vehicle_id=vehicle_id)
+    results = [{
+        'id': row.id,
+        'vehicle_id': row.vehicle_id,
+        'license_plate': row.license_plate,
+        'service_type': row.service_type,
+        'workshop': row.workshop,
+        'mechanic': row.mechanic,
+        'parts': row.parts,
+        'parts_store': row.parts_store,
+        'service_date': row.service_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'score': round(-row.score, 4),  # bm25 é menor para os mais relevantes
+    } for row in rows]
+    next_cursor = encode_cursor(rows[-1].cursor_key, rows[-1].id) if has_more else None
+    return with_etag(jsonify({'results': results, 'next_cursor': next_cursor}), etag), 200
+
+@maintenance_bp.route('/warranties/expiring', methods=['GET'])
+@user_required
+def get_expiring_warranties(current_user):
+    """Garantias (mão de obra e peças) que vencem nos próximos ?days= dias (padrão 30)."""
+    days = request.args.get('days', 30, type=int)
+    if days < 0 or days > MAX_WARRANTY_DAYS:
+        return jsonify({'message': f'days deve estar entre 0 e {MAX_WARRANTY_DAYS}'}), 400
+
+    # A data de hoje entra no ETag: a lista muda na virada do dia mesmo sem escritas
+    etag = make_etag('warranties', current_user.id, f'{current_user.data_version}.{datetime.utcnow().date().isoformat()}')
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    warranties = expiring_warranties(current_user.id, days)
+    return with_etag(jsonify({'warranties': warranties}), etag), 200
+
+@maintenance_bp.route('/export', methods=['GET'])
+@user_required
+def export_maintenances(current_user):
+    """
+    Exporta todo o histórico de manutenções do usuário em CSV (padrão) ou NDJSON
+    (?format=ndjson), gerado em streaming. Com ?gzip=1 o arquivo sai compactado.
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': f"Formato inválido. Use: {', '.join(EXPORT_FORMATS)}"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f'manutencoes.{extension}'
+    if compress:
+        mimetype, filename = 'application/gzip', filename + '.gz'
+
+    # stream_with_context mantém o contexto (e a sessão do banco) vivo enquanto o gerador roda
+    body = generate_export(current_user.id, export_format,
+                           current_app.config['EXPORT_CHUNK_SIZE'], compress=compress)
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@maintenance_bp.route('/<int:maintenance_id>/images', methods=['POST'])
+@user_required
+def upload_maintenance_images(current_user, maintenance_id):
+    """
+    Upload de imagens da manutenção (multipart, campo 'images', um ou mais arquivos).
+    O servidor reencoda cada imagem, gera a miniatura e grava as duas no Storage;
+    as listas passam a devolver a miniatura em 'thumbnails'.
+    """
+    config = current_app.config
+    if not images_available():
+        return jsonify({'message': 'Processamento de imagens indisponível neste servidor (Pillow não instalado)'}), 503
+    if request.content_length is not None and request.content_length > config['IMAGE_UPLOAD_MAX_BYTES']:
+        return jsonify({'message': f"Upload maior que o limite de {config['IMAGE_UPLOAD_MAX_BYTES']} bytes"}), 413
+
+    maintenance = (db.session.query(Maintenance.id, Maintenance.vehicle_id)
+                   .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+                   .filter(Maintenance.id == maintenance_id, Vehicle.user_id == current_user.id)
+                   .first())
+    if not maintenance:
+        return jsonify({'message': 'Manutenção não encontrada ou não pertence a este usuário'}), 404
+
+    files = [file for file in request.files.getlist('images') if file and file.filename]
+    if not files:
+        return jsonify({'message': "Nenhuma imagem enviada no campo 'images'"}), 400
+    if len(files) > config['IMAGE_UPLOAD_MAX_FILES']:
+        return jsonify({'message': f"Máximo de {config['IMAGE_UPLOAD_MAX_FILES']} imagens por envio"}), 400
+
+    try:
+        # Mesma pasta usada pelo app para as imagens enviadas direto ao Firebase
+        stored = get_image_pipeline().store([file.read() for file in files], f'services/{maintenance.vehicle_id}')
+    except ImageProcessingError as e:
+        return jsonify({'message': str(e)}), 400
+    except ImageUploadError as e:
+        # Nada da requisição é gravado; o que chegou ao Storage vai para a outbox numa transação à parte
+        db.session.rollback()
+        if record_orphaned_files(e.uploaded_urls):
+            notify_storage_outbox(current_app)
+        logger.error(f"Erro no upload de imagens da manutenção {maintenance_id}: {e}")
+        return jsonify({'message': f'Erro ao gravar as imagens: {str(e)}'}), 500
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Erro no processamento das imagens da manutenção {maintenance_id}")
+        return jsonify({'message': f'Erro ao gravar as imagens: {str(e)}'}), 500
+
+    try:
+        db.session.add_all([MaintenanceImage(maintenance_id=maintenance_id, image_url=image.image_url,
+                                             thumbnail_url=image.thumbnail_url) for image in stored])
+        (Maintenance.query.filter_by(id=maintenance_id)
+         .update({Maintenance.updated_at: datetime.utcnow()}, synchronize_session=False))
+        touch_vehicle(maintenance.vehicle_id, current_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        # Os arquivos já gravados ficariam órfãos: vão para a outbox de exclusão
+        if record_orphaned_files([url for image in stored for url in image]):
+            notify_storage_outbox(current_app)
+        logger.error(f"Erro ao registrar as imagens da manutenção {maintenance_id}: {e}")
+        return jsonify({'message': f'Erro ao registrar as imagens: {str(e)}'}), 500
+
+    return json_response({'images': [image._asdict() for image in stored]}, 201)
+
+@maintenance_bp.route('/<int:maintenance_id>', methods=['DELETE'])
+@user_required
+def delete_maintenance(current_user, maintenance_id):
+    maintenance = Maintenance.query.options(selectinload(Maintenance.images)).get(maintenance_id)
     if not maintenance:
         return jsonify({'message': 'Manutenção não encontrada'}), 404
 
-    vehicle = Vehicle.query.filter_by(id=maintenance.vehicle_id, user_id=user.id).first()
+    vehicle = Vehicle.query.filter_by(id=maintenance.vehicle_id, user_id=current_user.id).first()
     if not vehicle:
         # Alterado para 403 Forbidden, pois a manutenção existe mas não pertence ao usuário
         return jsonify({'message': 'Manutenção não pertence a um veículo deste usuário'}), 403
 
-    # --- Início: Lógica de exclusão de imagens ---
-    image_urls_to_delete = [img.image_url for img in maintenance.images]
-    logger.info(f"Iniciando exclusão de {len(image_urls_to_delete)} imagens do Storage para manutenção ID {maintenance_id}")
-    storage_deletion_failed = False
-    for url in image_urls_to_delete:
-        logger.debug(f"Processando URL para exclusão: {url}")
-        if not delete_image_from_storage(url):
-            storage_deletion_failed = True # Marca se alguma exclusão falhar
-    # --- Fim: Lógica de exclusão de imagens ---
-
-    # Prosseguir com a exclusão do banco de dados mesmo se a exclusão do storage falhar?
-    # Decisão: Sim, mas logar o erro. A referência no DB será removida.
-    if storage_deletion_failed:
-        logger.warning(f"Falha ao deletar uma ou mais imagens do Storage para a manutenção ID {maintenance_id}. Verifique os logs.")
-
     try:
+        # As imagens são registradas na outbox na mesma transação que remove a manutenção;
+        # a exclusão no Storage acontece depois, no worker, fora do caminho da requisição.
+        image_urls_to_delete = [url for img in maintenance.images for url in (img.image_url, img.thumbnail_url) if url]
+        enqueue_storage_deletions(image_urls_to_delete)
+
         # Excluir a manutenção (cascade removerá MaintenanceImage do DB)
+        record_maintenance(maintenance, sign=-1)
         db.session.delete(maintenance)
+        record_tombstone(current_user.id, SyncTombstone.ENTITY_MAINTENANCE, maintenance_id)
+        touch_vehicle(vehicle.id, current_user.id)
         db.session.commit()
-        logger.info(f"Manutenção ID {maintenance_id} excluída do DB com sucesso.")
+        logger.info(f"Manutenção ID {maintenance_id} excluída do DB com sucesso. {len(image_urls_to_delete)} imagem(ns) enfileirada(s) para exclusão do Storage.")
+        notify_storage_outbox(current_app)
         return jsonify({'message': 'Manutenção excluída com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
@@ -221,87 +392,97 @@ def delete_maintenance(firebase_uid, maintenance_id):
         return jsonify({'message': f'Erro ao excluir manutenção do banco de dados: {str(e)}'}), 500
 
 @maintenance_bp.route('/<int:maintenance_id>', methods=['GET'])
-@firebase_token_required
-def get_maintenance_details(firebase_uid, maintenance_id):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
+@user_required
+def get_maintenance_details(current_user, maintenance_id):
+    cached = response_cache.get(current_user)
+    if cached is not None:
+        return cached_response(cached)
+
+    # Revalidação (If-None-Match): só a versão do veículo dono é consultada, sem carregar a manutenção
+    if request.if_none_match:
+        owner = (db.session.query(Vehicle.data_version)
+                 .join(Maintenance, Maintenance.vehicle_id == Vehicle.id)
+                 .filter(Maintenance.id == maintenance_id, Vehicle.user_id == current_user.id)
+                 .first())
+        if owner is not None:
+            etag = make_etag('maintenance', maintenance_id, owner.data_version)
+            if is_not_modified(etag):
+                return not_modified_response(etag)
 
-    maintenance = Maintenance.query.get(maintenance_id)
-    if not maintenance:
+    try:
+        fields = MAINTENANCE.parse_fields(request.args)
+    except FieldsError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # Manutenção (só as colunas pedidas) + dono e versão do veículo numa única query
+    row = (db.session.query(*MAINTENANCE.columns(fields),
+                            Vehicle.user_id.label('owner_id'), Vehicle.data_version.label('vehicle_version'))
+           .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+           .filter(Maintenance.id == maintenance_id)
+           .first())
+    if not row:
         return jsonify({'message': 'Manutenção não encontrada'}), 404
-
-    vehicle = Vehicle.query.filter_by(id=maintenance.vehicle_id, user_id=user.id).first()
-    if not vehicle:
+    if row.owner_id != current_user.id:
         return jsonify({'message': 'Veículo não pertence a este usuário'}), 403
 
-    images = [image.image_url for image in maintenance.images]
-    maintenance_data = {
-        'id': maintenance.id,
-        'vehicle_id': maintenance.vehicle_id,
-        'service_type': maintenance.service_type,
-        'workshop': maintenance.workshop,
-        'mechanic': maintenance.mechanic,
-        'labor_warranty_date': maintenance.labor_warranty_date,
-        'labor_cost': maintenance.labor_cost,
-        'parts': maintenance.parts,
-        'parts_store': maintenance.parts_store,
-        'parts_warranty_date': maintenance.parts_warranty_date,
-        'parts_cost': maintenance.parts_cost,
-        'service_date': maintenance.service_date.strftime('%Y-%m-%d %H:%M:%S'),
-        'created_at': maintenance.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-        'images': images
-    }
-    return jsonify({'maintenance': maintenance_data}), 200
+    maintenance_data = maintenance_dicts([row], fields)[0]
+    etag = make_etag('maintenance', maintenance_id, row.vehicle_version)
+    response = with_etag(json_response({'maintenance': maintenance_data}), etag)
+    response_cache.set(current_user, response)
+    return response, 200
 
 @maintenance_bp.route('/<int:maintenance_id>', methods=['PUT'])
-@firebase_token_required
-def update_maintenance(firebase_uid, maintenance_id):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
+@user_required
+def update_maintenance(current_user, maintenance_id):
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict) or not data:
+        return jsonify({'message': 'Nenhum dado fornecido para atualização'}), 400
 
-    data = request.get_json()
     maintenance = Maintenance.query.get(maintenance_id)
     if not maintenance:
         return jsonify({'message': 'Manutenção não encontrada'}), 404
 
-    vehicle = Vehicle.query.filter_by(id=maintenance.vehicle_id, user_id=user.id).first()
+    vehicle = Vehicle.query.filter_by(id=maintenance.vehicle_id, user_id=current_user.id).first()
     if not vehicle:
         return jsonify({'message': 'Veículo não pertence a este usuário'}), 403
 
     try:
+        warranty_dates = {field: parse_warranty_date(data[field]) for field in WARRANTY_FIELDS if field in data}
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    try:
+        cost_before = cost_key(maintenance)
         if data.get('service_type'):
             maintenance.service_type = data['service_type']
         if data.get('workshop'):
             maintenance.workshop = data['workshop']
         if 'mechanic' in data:
             maintenance.mechanic = data['mechanic']
-        if 'labor_warranty_date' in data:
-            maintenance.labor_warranty_date = data['labor_warranty_date']
+        if 'labor_warranty_date' in warranty_dates:
+            maintenance.labor_warranty_date = warranty_dates['labor_warranty_date']
         if 'labor_cost' in data:
             maintenance.labor_cost = data['labor_cost']
         if 'parts' in data:
             maintenance.parts = data['parts']
         if 'parts_store' in data:
             maintenance.parts_store = data['parts_store']
-        if 'parts_warranty_date' in data:
-            maintenance.parts_warranty_date = data['parts_warranty_date']
+        if 'parts_warranty_date' in warranty_dates:
+            maintenance.parts_warranty_date = warranty_dates['parts_warranty_date']
         if 'parts_cost' in data:
             maintenance.parts_cost = data['parts_cost']
         if data.get('service_date'):
             maintenance.service_date = datetime.strptime(data['service_date'], '%Y-%m-%d %H:%M:%S')
+        record_maintenance_change(cost_before, maintenance)
 
+        removed_urls = []
         if 'images' in data:
-            MaintenanceImage.query.filter_by(maintenance_id=maintenance.id).delete()
-            for image_url in data['images']:
-                new_image = MaintenanceImage(
-                    maintenance_id=maintenance.id,
-                    image_url=image_url
-                )
-                db.session.add(new_image)
+            removed_urls = reconcile_maintenance_images(maintenance.id, data['images'] or [])
 
+        touch_vehicle(vehicle.id, current_user.id)
         db.session.commit()
+        if removed_urls:
+            notify_storage_outbox(current_app)
         return jsonify({'message': 'Manutenção atualizada com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
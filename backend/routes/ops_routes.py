@@ -0,0 +1,57 @@
+import logging
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import text
+from extensions import db
+from services.token_cache import token_cache
+from services.user_cache import user_cache
+from services.response_cache import response_cache
+from services.admission import admission
+from services.ops_auth import is_operator_request, operator_denied_response
+
+logger = logging.getLogger(__name__)
+
+ops_bp = Blueprint('ops', __name__)
+# Sondas do orquestrador (sem prefixo): /healthz e /readyz
+health_bp = Blueprint('health', __name__)
+
+# Todas as rotas /ops/* são internas: só operadores (OPS_TOKEN / OPS_ALLOWED_IPS)
+@ops_bp.before_request
+def require_operator():
+    if not is_operator_request():
+        return operator_denied_response()
+
+# Estatísticas dos caches em memória do processo (hit ratio, tamanho, memória)
+@ops_bp.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'token_cache': token_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'response_cache': response_cache.stats(),
+    }), 200
+
+# Estado do controle de admissão do processo (vagas ocupadas, fila, baldes por usuário)
+@ops_bp.route('/admission', methods=['GET'])
+def admission_stats():
+    return jsonify(admission.stats()), 200
+
+# Relatório de inicialização do processo (tempo de cada etapa do create_app)
+@ops_bp.route('/startup', methods=['GET'])
+def startup_report():
+    return jsonify(current_app.extensions.get('startup_report', {})), 200
+
+# Liveness: o processo está de pé e respondendo (não toca no banco nem no Firebase)
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok'}), 200
+
+# Readiness: o worker consegue atender (conexão com o banco funcionando)
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    try:
+        db.session.execute(text('SELECT 1'))
+    except Exception:
+        db.session.rollback()
+        # O detalhe do erro fica só no log: a sonda é pública
+        logger.exception("Readiness: banco indisponível")
+        return jsonify({'status': 'unavailable', 'database': 'unavailable'}), 503
+    return jsonify({'status': 'ready'}), 200
@@ -0,0 +1,18 @@
+from flask import Blueprint, abort, current_app, send_from_directory
+
+# Arquivos do armazenamento local (STORAGE_BACKEND=local), nas URLs geradas pelo
+# LocalStorageBackend: /storage/o/<caminho>?alt=media, o mesmo formato do Firebase
+storage_bp = Blueprint('storage', __name__)
+
+# Os nomes são únicos (uuid) e o conteúdo nunca muda: o cliente pode guardar para sempre
+MAX_AGE = 365 * 24 * 3600
+
+
+@storage_bp.route('/storage/o/<path:path>', methods=['GET'])
+def local_file(path):
+    if current_app.config['STORAGE_BACKEND'] != 'local':
+        abort(404)
+    # send_from_directory recusa caminhos que saem do diretório (../)
+    response = send_from_directory(current_app.config['LOCAL_STORAGE_DIR'], path, max_age=MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={MAX_AGE}, immutable'
+    return response
@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify, current_app
+
+from .auth_routes import user_required
+from services.serializers import json_response
+from services.sync import SyncError, build_sync, parse_watermark
+
+sync_bp = Blueprint('sync', __name__)
+
+
+@sync_bp.route('', methods=['GET'])
+@user_required
+def sync_changes(current_user):
+    """
+    Sincronização incremental do app offline: GET /api/sync?since=<watermark>.
+    Sem 'since' (ou com 'since' fora da retenção dos tombstones) devolve tudo com
+    'full': true. O cliente aplica primeiro as exclusões de 'deleted' e depois os
+    upserts, e guarda 'watermark' para o próximo sync.
+    """
+    since = request.args.get('since')
+    try:
+        since = parse_watermark(since) if since else None
+    except SyncError as e:
+        return jsonify({'message': str(e)}), 400
+
+    config = current_app.config
+    payload = build_sync(current_user.id, since,
+                         lag_seconds=config['SYNC_WATERMARK_LAG_SECONDS'],
+                         retention_days=config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+    response = json_response(payload)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -1,11 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app
 from extensions import db
-from models import Vehicle, User, Maintenance, MaintenanceImage
+from models import Vehicle, Maintenance, MaintenanceImage, SyncTombstone
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 import logging
-from .auth_routes import firebase_token_required
-# Importar funções auxiliares de maintenance_routes (ou duplicá-las se preferir isolamento)
-from .maintenance_routes import delete_image_from_storage
+from .auth_routes import user_required
+from services.pagination import PaginationError, parse_page_args, encode_cursor
+from services.storage_outbox import enqueue_storage_deletions, notify_storage_outbox
+from services.etag import touch_user, make_etag, is_not_modified, not_modified_response, with_etag, cached_response
+from services.response_cache import response_cache
+from services.cost_summary import remove_vehicle_cost_summary
+from services.dashboard import build_dashboard
+from services.serializers import VEHICLE, FieldsError, json_response
+from services.sync import record_tombstone
 import traceback # Para logar stack trace completo
 
 # Configurar logging
@@ -15,59 +22,84 @@ logger = logging.getLogger(__name__)
 vehicle_bp = Blueprint('vehicle', __name__)
 
 @vehicle_bp.route('/', methods=['GET'])
-@firebase_token_required
-def get_vehicles(firebase_uid):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado para o token fornecido'}), 404
+@user_required
+def get_vehicles(current_user):
+    # O usuário já foi carregado pelo decorator: a revalidação não consulta os veículos
+    etag = make_etag('vehicles', current_user.id, current_user.data_version)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
 
-    vehicles = Vehicle.query.filter_by(user_id=user.id).all()
-    
-    output = []
-    for vehicle in vehicles:
-        vehicle_data = {
-            'id': vehicle.id,
-            'type': vehicle.type,
-            'brand': vehicle.brand,
-            'model': vehicle.model,
-            'year': vehicle.year,
-            'license_plate': vehicle.license_plate,
-            'color': vehicle.color
-        }
-        output.append(vehicle_data)
-    
-    return jsonify({'vehicles': output}), 200
+    cached = response_cache.get(current_user)
+    if cached is not None:
+        return cached_response(cached)
+
+    try:
+        fields = VEHICLE.parse_fields(request.args)
+        limit, cursor = parse_page_args(request.args, cursor_size=1)
+        cursor_id = int(cursor[0]) if cursor else None
+    except (PaginationError, FieldsError, TypeError, ValueError) as e:
+        return jsonify({'message': str(e) if isinstance(e, (PaginationError, FieldsError)) else 'Cursor inválido'}), 400
+
+    # Paginação por keyset no id do veículo; só as colunas pedidas
+    query = (db.session.query(*VEHICLE.columns(fields))
+             .filter(Vehicle.user_id == current_user.id)
+             .order_by(Vehicle.id))
+    if cursor_id is not None:
+        query = query.filter(Vehicle.id > cursor_id)
+    rows = query.limit(limit + 1).all() if limit else query.all()
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+
+    output = VEHICLE.rows_to_dicts(rows, fields)
+    response = with_etag(json_response({'vehicles': output, 'next_cursor': next_cursor}), etag)
+    response_cache.set(current_user, response)
+    return response, 200
+
+@vehicle_bp.route('/dashboard', methods=['GET'])
+@user_required
+def get_dashboard(current_user):
+    """
+    Tela inicial numa única chamada: todos os veículos com quantidade de manutenções,
+    último serviço, gasto total e a garantia mais próxima de vencer.
+    """
+    # A data entra no ETag porque 'days_left' e a próxima garantia mudam na virada do dia
+    etag = make_etag('dashboard', current_user.id, f'{current_user.data_version}.{datetime.utcnow().date().isoformat()}')
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    return with_etag(json_response({'vehicles': build_dashboard(current_user.id)}), etag), 200
 
 @vehicle_bp.route('/<int:vehicle_id>', methods=['GET'])
-@firebase_token_required
-def get_vehicle(firebase_uid, vehicle_id):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
-
-    vehicle = Vehicle.query.filter_by(id=vehicle_id, user_id=user.id).first()
-    if not vehicle:
-        return jsonify({'message': 'Veículo não encontrado ou não pertence a este usuário'}), 404
+@user_required
+def get_vehicle(current_user, vehicle_id):
+    cached = response_cache.get(current_user)
+    if cached is not None:
+        return cached_response(cached)
 
-    vehicle_data = {
-        'id': vehicle.id,
-        'type': vehicle.type,
-        'brand': vehicle.brand,
-        'model': vehicle.model,
-        'year': vehicle.year,
-        'license_plate': vehicle.license_plate,
-        'color': vehicle.color
-    }
+    try:
+        fields = VEHICLE.parse_fields(request.args)
+    except FieldsError as e:
+        return jsonify({'message': str(e)}), 400
+
+    row = (db.session.query(*VEHICLE.columns(fields), Vehicle.data_version.label('version'))
+           .filter(Vehicle.id == vehicle_id, Vehicle.user_id == current_user.id)
+           .first())
+    if not row:
+        return jsonify({'message': 'Veículo não encontrado ou não pertence a este usuário'}), 404
 
-    return jsonify(vehicle_data), 200
+    etag = make_etag('vehicle', vehicle_id, row.version)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    response = with_etag(json_response(VEHICLE.rows_to_dicts([row], fields)[0]), etag)
+    response_cache.set(current_user, response)
+    return response, 200
 
 @vehicle_bp.route('/', methods=['POST'])
-@firebase_token_required
-def add_vehicle(firebase_uid):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
-
+@user_required
+def add_vehicle(current_user):
     data = request.get_json()
     
     # Verifica se os campos obrigatórios estão presentes
@@ -83,7 +115,7 @@ def add_vehicle(firebase_uid):
     
     # Cria o novo veículo
     new_vehicle = Vehicle(
-        user_id=user.id,
+        user_id=current_user.id,
         type=data['type'],
         brand=data['brand'],
         model=data['model'],
@@ -93,34 +125,27 @@ def add_vehicle(firebase_uid):
     )
     
     db.session.add(new_vehicle)
+    touch_user(current_user.id)
     db.session.commit()
     
-    return jsonify({
+    return json_response({
         'message': 'Veículo adicionado com sucesso',
-        'vehicle': {
-            'id': new_vehicle.id,
-            'type': new_vehicle.type,
-            'brand': new_vehicle.brand,
-            'model': new_vehicle.model,
-            'year': new_vehicle.year,
-            'license_plate': new_vehicle.license_plate,
-            'color': new_vehicle.color
-        }
-    }), 201
+        'vehicle': VEHICLE.object_to_dict(new_vehicle)
+    }, 201)
 
 @vehicle_bp.route('/<int:vehicle_id>', methods=['DELETE'])
-@firebase_token_required
-def delete_vehicle(firebase_uid, vehicle_id):
-    user = User.query.filter_by(firebase_uid=firebase_uid).first()
-    if not user:
-        return jsonify({'message': 'Usuário local não encontrado'}), 404
-
+@user_required
+def delete_vehicle(current_user, vehicle_id):
     try:
-        vehicle = Vehicle.query.get(vehicle_id)
+        # Carrega manutenções e imagens em lote (uma query por nível) para a coleta
+        # de URLs e para o cascade, em vez de uma query por manutenção
+        vehicle = (Vehicle.query
+                   .options(selectinload(Vehicle.maintenances).selectinload(Maintenance.images))
+                   .get(vehicle_id))
         if not vehicle:
             return jsonify({'message': 'Veículo não encontrado'}), 404
 
-        if vehicle.user_id != user.id:
+        if vehicle.user_id != current_user.id:
             return jsonify({'message': 'Este veículo não pertence ao usuário atual'}), 403
 
         # --- Início: Coletar URLs das imagens ANTES de deletar ---
@@ -130,31 +155,26 @@ def delete_vehicle(firebase_uid, vehicle_id):
             logger.debug(f"  - Verificando manutenção ID {maintenance.id}")
             for image in maintenance.images:
                 all_image_urls_to_delete.append(image.image_url)
+                if image.thumbnail_url:
+                    all_image_urls_to_delete.append(image.thumbnail_url)
                 logger.debug(f"    - Coletada URL: {image.image_url}")
         logger.info(f"Total de {len(all_image_urls_to_delete)} URLs coletadas para o veículo ID {vehicle_id}.")
         # --- Fim: Coletar URLs ---
 
+        # As URLs vão para a outbox na mesma transação da exclusão do veículo;
+        # o worker remove os arquivos do Storage depois, com retry.
+        enqueue_storage_deletions(all_image_urls_to_delete)
+
         # Excluir o veículo do banco de dados
         # O cascade='all, delete-orphan' removerá as manutenções e MaintenanceImages associadas
+        remove_vehicle_cost_summary(vehicle.id)
         db.session.delete(vehicle)
+        # As manutenções do veículo não ganham tombstone próprio: o cliente remove junto com ele
+        record_tombstone(current_user.id, SyncTombstone.ENTITY_VEHICLE, vehicle.id)
+        touch_user(current_user.id)
         db.session.commit()
-        logger.info(f"Veículo ID {vehicle_id} e dados associados excluídos do DB com sucesso.")
-
-        # --- Início: Deletar imagens do Storage APÓS commit do DB ---
-        storage_deletion_failed_count = 0
-        if all_image_urls_to_delete:
-            logger.info(f"Iniciando exclusão de {len(all_image_urls_to_delete)} imagens do Storage para veículo ID {vehicle_id}...")
-            for url in all_image_urls_to_delete:
-                logger.debug(f"  - Processando URL para exclusão do Storage: {url}")
-                if not delete_image_from_storage(url):
-                    storage_deletion_failed_count += 1
-            if storage_deletion_failed_count > 0:
-                 logger.warning(f"{storage_deletion_failed_count} falha(s) ao deletar imagens do Storage para o veículo ID {vehicle_id}. Verifique logs anteriores.")
-            else:
-                 logger.info(f"Todas as {len(all_image_urls_to_delete)} imagens associadas ao veículo ID {vehicle_id} foram processadas para exclusão do Storage.")
-        else:
-            logger.info(f"Nenhuma imagem associada encontrada no DB para exclusão do Storage para o veículo ID {vehicle_id}.")
-        # --- Fim: Deletar imagens do Storage ---
+        logger.info(f"Veículo ID {vehicle_id} e dados associados excluídos do DB com sucesso. {len(all_image_urls_to_delete)} imagem(ns) enfileirada(s) para exclusão do Storage.")
+        notify_storage_outbox(current_app)
 
         return jsonify({'message': 'Veículo e dados associados excluídos com sucesso'}), 200
 
@@ -0,0 +1,249 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify
+
+from database import gevent_patched
+from services.metrics import record_shed_request
+
+logger = logging.getLogger(__name__)
+
+THREADED_MAX_CONCURRENT_REQUESTS = 64
+
+
+def max_concurrent_requests(config):
+    """Teto de requisições simultâneas: MAX_CONCURRENT_REQUESTS ou o padrão do tipo de worker."""
+    max_concurrent = config.get('MAX_CONCURRENT_REQUESTS')
+    if max_concurrent is None:
+        max_concurrent = (config['GUNICORN_WORKER_CONNECTIONS'] if gevent_patched()
+                          else THREADED_MAX_CONCURRENT_REQUESTS)
+    return max_concurrent
+
+
+class AdmissionRejected(Exception):
+    """Requisição recusada pelo controle de admissão (vira 429/503 com Retry-After)."""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class MemoryRateLimitBackend:
+    """
+    Token bucket por chave em memória do processo. Cada worker aplica o limite
+    sozinho (com N workers o usuário consegue até N vezes a taxa configurada).
+    As chaves menos usadas saem quando passam de max_keys (e voltam com o balde cheio).
+    """
+    name = 'memory'
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # chave -> [tokens, última recarga]
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Consome um token. Retorna 0 se liberado ou os segundos até o próximo token."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / rate
+
+    def stats(self):
+        with self._lock:
+            return {'keys': len(self._buckets)}
+
+
+# Token bucket atômico no Redis; o relógio é o do próprio Redis (igual para todos os workers)
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class SharedRateLimitBackend:
+    """Token bucket compartilhado entre processos e máquinas, num Redis (script Lua atômico)."""
+    name = 'shared'
+
+    def __init__(self, client, prefix='garagem:rl:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, rate, burst):
+        return float(self._script(keys=[self.prefix + key], args=[rate, burst]))
+
+    def stats(self):
+        return {}
+
+
+class ConcurrencyLimiter:
+    """
+    Limite de requisições simultâneas no processo, com fila de espera limitada:
+    sem vaga livre a requisição espera até queue_timeout segundos; com a fila
+    cheia é recusada na hora. A ordem de atendimento da fila não é garantida.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._active = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Ocupa uma vaga. Retorna None ou o motivo da recusa ('queue_full' / 'queue_timeout')."""
+        acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                if self._waiting >= self.max_queue:
+                    return 'queue_full'
+                self._waiting += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+            if not acquired:
+                return 'queue_timeout'
+        with self._lock:
+            self._active += 1
+        return None
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {'active': self._active, 'waiting': self._waiting,
+                    'max_concurrent': self.max_concurrent, 'max_queue': self.max_queue}
+
+
+class AdmissionControl:
+    """
+    Controle de admissão aplicado em firebase_token_required, depois da
+    verificação do token e antes de qualquer acesso ao banco:
+    limite por usuário (token bucket por firebase_uid -> 429) e limite de
+    requisições simultâneas do processo (-> 503). Ambos com Retry-After.
+    """
+
+    def __init__(self):
+        self.rate_backend = None
+        self.rate = 0.0
+        self.burst = 0
+        self.limiter = None
+        self.retry_after = 1
+
+    def admit(self, firebase_uid):
+        """
+        Libera ou recusa (AdmissionRejected) a requisição. Retorna True se ela
+        ocupou uma vaga do limite de concorrência (liberar com release()).
+        """
+        if self.rate_backend is not None:
+            try:
+                wait = self.rate_backend.take(firebase_uid, self.rate, self.burst)
+            except Exception as e:
+                # Backend compartilhado fora do ar: melhor deixar passar do que derrubar a API
+                logger.warning(f"Limite por usuário indisponível ({self.rate_backend.name}): {e}")
+                wait = 0
+            if wait > 0:
+                record_shed_request('rate_limited')
+                raise AdmissionRejected(429, 'rate_limited', max(1, math.ceil(wait)))
+
+        if self.limiter is None:
+            return False
+        reason = self.limiter.acquire()
+        if reason is not None:
+            record_shed_request(reason)
+            raise AdmissionRejected(503, reason, self.retry_after)
+        return True
+
+    def release(self):
+        self.limiter.release()
+
+    def stats(self):
+        return {
+            'rate_limit': dict(backend=self.rate_backend.name, per_second=self.rate, burst=self.burst,
+                               **self.rate_backend.stats()) if self.rate_backend is not None else None,
+            'concurrency': self.limiter.stats() if self.limiter is not None else None,
+        }
+
+
+# Instância única do processo (configurada em init_admission)
+admission = AdmissionControl()
+
+
+def rejected_response(error):
+    if error.status == 429:
+        message = 'Muitas requisições; tente novamente em instantes'
+    else:
+        message = 'Servidor sobrecarregado; tente novamente em instantes'
+    response = jsonify({'message': message, 'reason': error.reason})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def create_rate_limit_backend(config):
+    backend = config['RATE_LIMIT_BACKEND']
+    if backend in (None, '', 'none') or config['RATE_LIMIT_PER_MINUTE'] <= 0:
+        return None
+    if backend == 'memory':
+        return MemoryRateLimitBackend()
+    if backend == 'shared':
+        url = config['RATE_LIMIT_URL']
+        if url in (None, '', 'local://'):
+            # Sem servidor compartilhado o estado fica no processo, como no backend 'memory'
+            return MemoryRateLimitBackend()
+        import redis  # Dependência opcional, só necessária para o backend compartilhado real
+        return SharedRateLimitBackend(redis.Redis.from_url(url))
+    raise ValueError(f"RATE_LIMIT_BACKEND desconhecido: {backend}")
+
+
+def init_admission(app):
+    config = app.config
+    if not config['ADMISSION_CONTROL_ENABLED']:
+        admission.rate_backend = admission.limiter = None
+        return
+    admission.rate_backend = create_rate_limit_backend(config)
+    admission.rate = config['RATE_LIMIT_PER_MINUTE'] / 60.0
+    admission.burst = max(1, config['RATE_LIMIT_BURST'])
+    admission.retry_after = max(1, config['ADMISSION_RETRY_AFTER_SECONDS'])
+    max_concurrent = max_concurrent_requests(config)
+    admission.limiter = (ConcurrencyLimiter(max_concurrent, config['ADMISSION_QUEUE_SIZE'],
+                                            config['ADMISSION_QUEUE_TIMEOUT_MS'] / 1000.0)
+                         if max_concurrent > 0 else None)
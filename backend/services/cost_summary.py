@@ -0,0 +1,149 @@
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models import Maintenance, MaintenanceCostSummary
+
+logger = logging.getLogger(__name__)
+
+_summary = MaintenanceCostSummary.__table__
+
+
+def month_of(service_date):
+    return service_date.strftime('%Y-%m')
+
+
+def _cost(value):
+    # Os custos chegam das rotas como vieram no JSON (número, string ou None)
+    try:
+        return float(value) if value not in (None, '') else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def cost_key(maintenance):
+    """Balde e valores de uma manutenção: ((veículo, mês, tipo), (labor, parts))."""
+    return ((maintenance.vehicle_id, month_of(maintenance.service_date), maintenance.service_type),
+            (_cost(maintenance.labor_cost), _cost(maintenance.parts_cost)))
+
+
+def _upsert_bucket(key, count, labor, parts):
+    vehicle_id, month, service_type = key
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert(_summary)
+        statement = insert.values(vehicle_id=vehicle_id, month=month, service_type=service_type,
+                                  maintenance_count=count, labor_total=labor, parts_total=parts)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['vehicle_id', 'month', 'service_type'],
+            set_={'maintenance_count': _summary.c.maintenance_count + count,
+                  'labor_total': _summary.c.labor_total + labor,
+                  'parts_total': _summary.c.parts_total + parts}))
+        return
+
+    updated = db.session.execute(
+        _summary.update()
+        .where(_summary.c.vehicle_id == vehicle_id, _summary.c.month == month,
+               _summary.c.service_type == service_type)
+        .values(maintenance_count=_summary.c.maintenance_count + count,
+                labor_total=_summary.c.labor_total + labor,
+                parts_total=_summary.c.parts_total + parts)).rowcount
+    if not updated:
+        db.session.execute(_summary.insert().values(
+            vehicle_id=vehicle_id, month=month, service_type=service_type,
+            maintenance_count=count, labor_total=labor, parts_total=parts))
+
+
+def _delete_bucket_if_empty(key):
+    # Restrito ao balde alterado: não varre (nem trava) os baldes de outros veículos
+    vehicle_id, month, service_type = key
+    db.session.execute(_summary.delete().where(
+        _summary.c.vehicle_id == vehicle_id, _summary.c.month == month,
+        _summary.c.service_type == service_type, _summary.c.maintenance_count <= 0))
+
+
+def apply_cost_deltas(deltas):
+    """
+    Aplica variações {(veículo, mês, tipo): [count, labor, parts]} na tabela de
+    agregados (na transação atual, sem commit). Baldes que ficam vazios são removidos.
+    """
+    for key, (count, labor, parts) in deltas.items():
+        if not (count or labor or parts):
+            continue
+        _upsert_bucket(key, count, labor, parts)
+        if count < 0:
+            _delete_bucket_if_empty(key)
+
+
+def add_cost_delta(deltas, key, values, sign=1):
+    delta = deltas.setdefault(key, [0, 0.0, 0.0])
+    delta[0] += sign
+    delta[1] += sign * values[0]
+    delta[2] += sign * values[1]
+
+
+def record_maintenance(maintenance, sign=1):
+    """Soma (sign=1) ou subtrai (sign=-1) uma manutenção dos agregados."""
+    deltas = {}
+    add_cost_delta(deltas, *cost_key(maintenance), sign=sign)
+    apply_cost_deltas(deltas)
+
+
+def record_maintenance_change(before, maintenance):
+    """Move a manutenção do balde/valores anteriores (cost_key antes da edição) para os atuais."""
+    after = cost_key(maintenance)
+    if after == before:
+        return
+    deltas = {}
+    add_cost_delta(deltas, *before, sign=-1)
+    add_cost_delta(deltas, *after)
+    apply_cost_deltas(deltas)
+
+
+def remove_vehicle_cost_summary(vehicle_id):
+    db.session.execute(_summary.delete().where(_summary.c.vehicle_id == vehicle_id))
+
+
+def _month_expression(column, dialect):
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    if dialect == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    if dialect == 'mysql':
+        return func.date_format(column, '%Y-%m')
+    raise NotImplementedError(f"Reconstrução dos agregados não suportada no banco '{dialect}'")
+
+
+def rebuild_cost_summary():
+    """Recalcula a tabela de agregados inteira a partir das manutenções (com commit)."""
+    month = _month_expression(Maintenance.service_date, db.engine.dialect.name)
+    aggregates = (select(Maintenance.vehicle_id, month, Maintenance.service_type,
+                         func.count(Maintenance.id),
+                         func.coalesce(func.sum(Maintenance.labor_cost), 0),
+                         func.coalesce(func.sum(Maintenance.parts_cost), 0))
+                  .group_by(Maintenance.vehicle_id, month, Maintenance.service_type))
+    try:
+        db.session.execute(_summary.delete())
+        db.session.execute(_summary.insert().from_select(
+            ['vehicle_id', 'month', 'service_type', 'maintenance_count', 'labor_total', 'parts_total'],
+            aggregates))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    buckets = db.session.query(func.count(MaintenanceCostSummary.id)).scalar()
+    logger.info(f"Agregados de custo reconstruídos: {buckets} balde(s)")
+    return buckets
+
+
+def init_cost_summary(app):
+    """Registra o comando `flask rebuild-cost-summary`."""
+    import click
+
+    @app.cli.command('rebuild-cost-summary')
+    def rebuild_cost_summary_command():
+        """Recalcula do zero os agregados de custo das manutenções."""
+        buckets = rebuild_cost_summary()
+        click.echo(f"{buckets} balde(s) de custo reconstruído(s).")
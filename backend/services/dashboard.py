@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from sqlalchemy import func, literal, select, union_all
+
+from extensions import db
+from models import Maintenance, MaintenanceCostSummary, Vehicle
+from services.warranty import format_warranty_date
+
+
+def build_dashboard(user_id):
+    """
+    Resumo de todos os veículos do usuário para a tela inicial. Número fixo de
+    queries, independente da quantidade de veículos:
+      1. veículos;
+      2. quantidade e gasto total por veículo (tabela de agregados de custo);
+      3. último serviço de cada veículo (ROW_NUMBER sobre o índice vehicle_id/service_date);
+      4. garantia mais próxima de vencer por veículo (a partir de hoje).
+    """
+    vehicles = Vehicle.query.filter_by(user_id=user_id).order_by(Vehicle.id).all()
+    if not vehicles:
+        return []
+
+    summary = MaintenanceCostSummary
+    totals = {row.vehicle_id: row for row in db.session.execute(
+        select(summary.vehicle_id,
+               func.sum(summary.maintenance_count).label('count'),
+               func.sum(summary.labor_total + summary.parts_total).label('spend'))
+        .join(Vehicle, Vehicle.id == summary.vehicle_id)
+        .where(Vehicle.user_id == user_id)
+        .group_by(summary.vehicle_id))}
+
+    ranked = (select(Maintenance.vehicle_id, Maintenance.service_date, Maintenance.service_type,
+                     func.row_number().over(partition_by=Maintenance.vehicle_id,
+                                            order_by=(Maintenance.service_date.desc(), Maintenance.id.desc()))
+                     .label('position'))
+              .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+              .where(Vehicle.user_id == user_id)
+              .subquery())
+    last_services = {row.vehicle_id: row for row in db.session.execute(
+        select(ranked.c.vehicle_id, ranked.c.service_date, ranked.c.service_type)
+        .where(ranked.c.position == 1))}
+
+    today = datetime.utcnow().date()
+
+    def warranty_branch(kind, column):
+        return (select(Maintenance.vehicle_id, literal(kind).label('kind'), column.label('expires_on'))
+                .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+                .where(Vehicle.user_id == user_id, column >= today))
+
+    warranties = union_all(warranty_branch('labor', Maintenance.labor_warranty_date),
+                           warranty_branch('parts', Maintenance.parts_warranty_date)).subquery()
+    nearest = (select(warranties.c.vehicle_id, warranties.c.kind, warranties.c.expires_on,
+                      func.row_number().over(partition_by=warranties.c.vehicle_id,
+                                             order_by=(warranties.c.expires_on, warranties.c.kind))
+                      .label('position'))
+               .subquery())
+    next_warranties = {row.vehicle_id: row for row in db.session.execute(
+        select(nearest.c.vehicle_id, nearest.c.kind, nearest.c.expires_on)
+        .where(nearest.c.position == 1))}
+
+    output = []
+    for vehicle in vehicles:
+        total = totals.get(vehicle.id)
+        last = last_services.get(vehicle.id)
+        warranty = next_warranties.get(vehicle.id)
+        output.append({
+            'id': vehicle.id,
+            'type': vehicle.type,
+            'brand': vehicle.brand,
+            'model': vehicle.model,
+            'year': vehicle.year,
+            'license_plate': vehicle.license_plate,
+            'color': vehicle.color,
+            'maintenance_count': total.count if total else 0,
+            'total_spend': round(total.spend or 0.0, 2) if total else 0.0,
+            'last_service_date': last.service_date.strftime('%Y-%m-%d %H:%M:%S') if last else None,
+            'last_service_type': last.service_type if last else None,
+            'next_warranty': {
+                'kind': warranty.kind,
+                'expires_on': format_warranty_date(warranty.expires_on),
+                'days_left': (warranty.expires_on - today).days,
+            } if warranty else None,
+        })
+    return output
@@ -0,0 +1,63 @@
+import hashlib
+
+from flask import current_app, request
+from werkzeug.http import unquote_etag
+
+from extensions import db
+from models import User, Vehicle
+from services.response_cache import mark_user_dirty
+
+
+def touch_user(user_id):
+    """Incrementa a versão dos dados do usuário (na transação atual, sem commit)."""
+    (db.session.query(User)
+     .filter(User.id == user_id)
+     .update({User.data_version: User.data_version + 1}, synchronize_session=False))
+    # As respostas em cache desse usuário são descartadas quando a transação fizer commit
+    mark_user_dirty(user_id)
+
+
+def touch_vehicle(vehicle_id, user_id):
+    """Incrementa a versão do veículo e do seu dono (na transação atual, sem commit)."""
+    (db.session.query(Vehicle)
+     .filter(Vehicle.id == vehicle_id)
+     # updated_at fica como está: mudar as manutenções não altera o próprio veículo (sync incremental)
+     .update({Vehicle.data_version: Vehicle.data_version + 1, Vehicle.updated_at: Vehicle.updated_at},
+             synchronize_session=False))
+    touch_user(user_id)
+
+
+def make_etag(kind, resource_id, version):
+    """
+    ETag (fraco) de um recurso a partir do seu contador de versão. A query string
+    entra no hash porque muda o conteúdo (cursor, limit, ...).
+    """
+    etag = f'{kind}{resource_id}.{version}'
+    if request.query_string:
+        etag += '-' + hashlib.md5(request.query_string).hexdigest()[:12]
+    return etag
+
+
+def is_not_modified(etag):
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified_response(etag):
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    # Permite guardar a resposta, mas obriga o cliente a revalidar (If-None-Match) a cada uso
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_response(entry):
+    """Monta a resposta (200 ou 304) a partir de uma entrada do cache de respostas."""
+    etag = unquote_etag(entry.etag)[0] if entry.etag else None
+    if etag and is_not_modified(etag):
+        return not_modified_response(etag)
+    response = current_app.response_class(entry.body, status=200, mimetype='application/json')
+    return with_etag(response, etag) if etag else response
@@ -0,0 +1,41 @@
+import logging
+import threading
+import time
+
+import firebase_admin
+from firebase_admin import credentials
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+
+def get_firebase_app():
+    """
+    App padrão do Firebase Admin SDK, inicializado na primeira chamada (e não no
+    create_app). Assim o boot não lê credenciais nem cria clients HTTP, e com o
+    preload do gunicorn cada worker cria os seus depois do fork.
+    Levanta a exceção da inicialização se as credenciais forem inválidas.
+    """
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        pass
+
+    with _init_lock:
+        try:
+            return firebase_admin.get_app()
+        except ValueError:
+            pass
+        config = current_app.config
+        start = time.perf_counter()
+        try:
+            cred = credentials.Certificate(config['FIREBASE_CREDENTIALS_PATH'])
+            app = firebase_admin.initialize_app(cred, {'storageBucket': config['FIREBASE_STORAGE_BUCKET']})
+        except Exception as e:
+            logger.error(f"Erro ao inicializar Firebase Admin SDK: {e}")
+            raise
+        logger.info(f"Firebase Admin SDK inicializado em {(time.perf_counter() - start) * 1000:.1f}ms. "
+                    f"Bucket: {config['FIREBASE_STORAGE_BUCKET']}")
+        return app
@@ -0,0 +1,183 @@
+import io
+import logging
+import math
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import copy_current_request_context, current_app
+
+from database import gevent_patched
+from services.metrics import record_storage_operation
+from services.storage import get_storage_backend
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError  # Dependência opcional: só o upload precisa
+except ImportError:  # pragma: no cover - depende do ambiente
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'BMP', 'TIFF', 'MPO'}
+CONTENT_TYPE = 'image/jpeg'
+
+# Imagem reencodada + miniatura, já em bytes JPEG
+ProcessedImage = namedtuple('ProcessedImage', ['full', 'thumbnail'])
+# URLs gravadas para cada imagem enviada
+StoredImage = namedtuple('StoredImage', ['image_url', 'thumbnail_url'])
+
+
+class ImageProcessingError(ValueError):
+    pass
+
+
+class ImageUploadError(RuntimeError):
+    """Falha ao gravar no Storage; uploaded_urls são os arquivos que chegaram a ser gravados."""
+
+    def __init__(self, message, uploaded_urls):
+        super().__init__(message)
+        self.uploaded_urls = uploaded_urls
+
+
+def images_available():
+    return Image is not None
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # JPEG não tem transparência: compõe sobre fundo branco
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def _encode_jpeg(image, quality):
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def process_image(data, max_dimension, quality, thumbnail_size, thumbnail_quality, max_pixels):
+    """
+    Reencoda uma imagem enviada: JPEG com o lado maior limitado a max_dimension,
+    orientação do EXIF aplicada e metadados descartados (inclusive GPS), e uma
+    miniatura quadrada (recorte central) de thumbnail_size px.
+    Levanta ImageProcessingError se o conteúdo não for uma imagem aceita.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in ACCEPTED_FORMATS:
+            raise ImageProcessingError(f"Formato de imagem não suportado: {image.format}")
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageProcessingError(f"Imagem grande demais ({width}x{height})")
+        # JPEG: decodifica já reduzido (escala 1/2, 1/4 ou 1/8) até o tamanho final, bem mais
+        # rápido para fotos de celular. O alvo mantém a proporção, senão o draft não reduz nada.
+        scale = min(1.0, max_dimension / max(width, height))
+        image.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+        image = ImageOps.exif_transpose(image)
+        image = _to_rgb(image)
+    except ImageProcessingError:
+        raise
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError("Arquivo de imagem inválido ou corrompido") from e
+
+    full = image
+    full.thumbnail((max_dimension, max_dimension), Image.LANCZOS)  # Redimensiona no lugar
+    # A miniatura sai da imagem já reduzida (bem menos pixels para reamostrar)
+    thumbnail = ImageOps.fit(full, (thumbnail_size, thumbnail_size), Image.LANCZOS)
+    return ProcessedImage(_encode_jpeg(full, quality), _encode_jpeg(thumbnail, thumbnail_quality))
+
+
+class ImagePipeline:
+    """
+    Processamento (decodificação, redimensionamento, encode) e gravação das
+    imagens enviadas num pool de threads: o Pillow libera o GIL nessas etapas,
+    então as imagens de um mesmo upload são processadas em paralelo.
+    """
+
+    def __init__(self, config, max_workers=4):
+        self.options = {
+            'max_dimension': config['IMAGE_MAX_DIMENSION'],
+            'quality': config['IMAGE_JPEG_QUALITY'],
+            'thumbnail_size': config['THUMBNAIL_SIZE'],
+            'thumbnail_quality': config['THUMBNAIL_JPEG_QUALITY'],
+            'max_pixels': config['IMAGE_MAX_PIXELS'],
+        }
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                if gevent_patched():
+                    # Com gevent as threads comuns viram greenlets e o trabalho de CPU travaria o
+                    # worker: o pool do gevent usa threads nativas
+                    from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+                    self._executor = NativeThreadPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='images')
+            return self._executor
+
+    def _map(self, function, items):
+        # Cada tarefa roda com uma cópia do contexto da requisição (current_app, request.url_root)
+        futures = [self.executor.submit(copy_current_request_context(function), item) for item in items]
+        return [future.result() for future in futures]
+
+    def _process(self, data):
+        return process_image(data, **self.options)
+
+    def store(self, files, folder):
+        """
+        Processa e grava as imagens (bytes) em 'folder'. Retorna [StoredImage] na
+        ordem recebida. Se alguma imagem for inválida nada é gravado; se um envio
+        ao Storage falhar, levanta ImageUploadError com as URLs já gravadas (que
+        quem chamou deve mandar para a outbox de exclusão).
+        """
+        processed = self._map(self._process, files)
+
+        backend = get_storage_backend()
+        names = [uuid.uuid4().hex for _ in processed]
+        uploads = ([(f'{folder}/{name}.jpg', image.full) for name, image in zip(names, processed)] +
+                   [(f'{folder}/thumbs/{name}.jpg', image.thumbnail) for name, image in zip(names, processed)])
+
+        def upload(item):
+            path, data = item
+            try:
+                url = backend.upload(path, data, CONTENT_TYPE)
+            except Exception as e:
+                record_storage_operation('upload', backend.name, ok=False)
+                logger.error(f"Falha ao enviar '{path}' ao Storage ({backend.name}): {type(e).__name__}: {e}")
+                return None
+            record_storage_operation('upload', backend.name, ok=True)
+            return url
+
+        urls = self._map(upload, uploads)
+        if None in urls:
+            raise ImageUploadError('Falha ao gravar imagem no Storage', [url for url in urls if url is not None])
+
+        count = len(processed)
+        logger.info(f"{count} imagem(ns) gravada(s) em '{folder}': "
+                    f"{sum(len(image.full) for image in processed)} bytes + "
+                    f"{sum(len(image.thumbnail) for image in processed)} bytes de miniaturas")
+        return [StoredImage(image_url, thumbnail_url) for image_url, thumbnail_url in zip(urls[:count], urls[count:])]
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def get_image_pipeline():
+    """Pipeline de imagens do app atual (criado uma vez e guardado em app.extensions)."""
+    app = current_app._get_current_object()
+    pipeline = app.extensions.get('image_pipeline')
+    if pipeline is None:
+        pipeline = app.extensions['image_pipeline'] = ImagePipeline(app.config, max_workers=app.config['IMAGE_WORKERS'])
+    return pipeline
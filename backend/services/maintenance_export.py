@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Maintenance, MaintenanceImage, Vehicle
+from services.maintenance_import import CSV_IMAGE_SEPARATOR, DATE_FORMAT
+from services.warranty import WARRANTY_FIELDS, format_warranty_date
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Mesmas colunas aceitas pela importação em lote (mais id e placa), para permitir reimportar o arquivo
+EXPORT_COLUMNS = [
+    'id', 'vehicle_id', 'license_plate', 'service_type', 'workshop', 'mechanic',
+    'labor_warranty_date', 'labor_cost', 'parts', 'parts_store', 'parts_warranty_date',
+    'parts_cost', 'service_date', 'created_at', 'images',
+]
+
+
+def iter_maintenance_rows(user_id, chunk_size):
+    """
+    Percorre todas as manutenções dos veículos do usuário em blocos de chunk_size,
+    com cursor do lado do servidor (stream_results), sem carregar o histórico inteiro.
+    As imagens de cada bloco vêm de uma única query adicional.
+    """
+    query = (select(Maintenance.id, Maintenance.vehicle_id, Vehicle.license_plate,
+                    Maintenance.service_type, Maintenance.workshop, Maintenance.mechanic,
+                    Maintenance.labor_warranty_date, Maintenance.labor_cost, Maintenance.parts,
+                    Maintenance.parts_store, Maintenance.parts_warranty_date, Maintenance.parts_cost,
+                    Maintenance.service_date, Maintenance.created_at)
+             .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+             .where(Vehicle.user_id == user_id)
+             .order_by(Maintenance.vehicle_id, Maintenance.service_date, Maintenance.id)
+             .execution_options(stream_results=True, yield_per=chunk_size))
+    result = db.session.execute(query)
+    try:
+        for chunk in result.partitions(chunk_size):
+            images = {}
+            image_rows = db.session.execute(
+                select(MaintenanceImage.maintenance_id, MaintenanceImage.image_url)
+                .where(MaintenanceImage.maintenance_id.in_([row.id for row in chunk]))
+                .order_by(MaintenanceImage.id))
+            for maintenance_id, image_url in image_rows:
+                images.setdefault(maintenance_id, []).append(image_url)
+
+            for row in chunk:
+                data = dict(row._mapping)
+                data['service_date'] = row.service_date.strftime(DATE_FORMAT)
+                data['created_at'] = row.created_at.strftime(DATE_FORMAT) if row.created_at else None
+                for field in WARRANTY_FIELDS:
+                    data[field] = format_warranty_date(data[field])
+                data['images'] = images.get(row.id, [])
+                yield data
+    finally:
+        result.close()
+
+
+def _iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    # Cabeçalho emitido já de início: um histórico vazio ainda gera um CSV válido
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        row['images'] = CSV_IMAGE_SEPARATOR.join(row['images'])
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def _iter_batched(chunks, min_bytes=64 * 1024):
+    """Agrupa os pedaços em blocos de ~min_bytes para não emitir um write por linha."""
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= min_bytes:
+            yield b''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def _iter_gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def generate_export(user_id, export_format, chunk_size, compress=False):
+    """Gerador de bytes do arquivo de exportação (CSV ou NDJSON, opcionalmente gzip)."""
+    rows = iter_maintenance_rows(user_id, chunk_size)
+    lines = _iter_csv(rows) if export_format == 'csv' else _iter_ndjson(rows)
+    chunks = _iter_batched(line.encode('utf-8') for line in lines)
+    return _iter_gzip(chunks) if compress else chunks
@@ -0,0 +1,183 @@
+import csv
+import io
+from datetime import datetime
+
+from extensions import db
+from models import Maintenance, MaintenanceImage, Vehicle
+from services.cost_summary import add_cost_delta, apply_cost_deltas, month_of
+from services.warranty import WARRANTY_FIELDS, parse_warranty_date
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Limites de tamanho das colunas de texto (mesmos do modelo)
+TEXT_FIELDS = {
+    'service_type': 100,
+    'workshop': 100,
+    'mechanic': 100,
+    'parts': 200,
+    'parts_store': 100,
+}
+COST_FIELDS = ('labor_cost', 'parts_cost')
+IMAGE_URL_MAX_LENGTH = 255
+CSV_IMAGE_SEPARATOR = '|'
+
+
+class ImportFormatError(ValueError):
+    """Erro que invalida a importação inteira (formato ou tamanho do arquivo)."""
+
+
+def read_rows(request, max_rows):
+    """
+    Lê as linhas da requisição: JSON {"maintenances": [...]}, CSV no corpo
+    (Content-Type text/csv) ou CSV enviado como arquivo multipart no campo 'file'.
+    """
+    if 'file' in request.files:
+        text = request.files['file'].stream.read().decode('utf-8-sig')
+        rows = _read_csv(text)
+    elif request.mimetype in ('text/csv', 'application/csv'):
+        rows = _read_csv(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('maintenances'), list):
+            raise ImportFormatError('Envie {"maintenances": [...]} em JSON ou um arquivo CSV')
+        rows = data['maintenances']
+
+    if not rows:
+        raise ImportFormatError('Nenhuma manutenção para importar')
+    if len(rows) > max_rows:
+        raise ImportFormatError(f'Máximo de {max_rows} manutenções por importação')
+    return rows
+
+
+def _read_csv(text):
+    rows = []
+    for raw in csv.DictReader(io.StringIO(text)):
+        row = {key.strip(): (value.strip() if isinstance(value, str) else value)
+               for key, value in raw.items() if key}
+        images = row.get('images')
+        row['images'] = [url.strip() for url in images.split(CSV_IMAGE_SEPARATOR) if url.strip()] if images else []
+        rows.append(row)
+    return rows
+
+
+def _parse_row(raw, default_created_at):
+    """Valida uma linha. Retorna (valores para o INSERT, urls das imagens, lista de erros)."""
+    if not isinstance(raw, dict):
+        return None, None, ['Linha inválida (esperado um objeto)']
+
+    errors = []
+    values = {'created_at': default_created_at}
+
+    try:
+        values['vehicle_id'] = int(raw.get('vehicle_id'))
+    except (TypeError, ValueError):
+        errors.append('vehicle_id inválido ou ausente')
+
+    for field, max_length in TEXT_FIELDS.items():
+        value = raw.get(field)
+        value = None if value in (None, '') else str(value)
+        if value is not None and len(value) > max_length:
+            errors.append(f'{field} excede {max_length} caracteres')
+        values[field] = value
+    for field in ('service_type', 'workshop'):
+        if not values[field]:
+            errors.append(f'Campo {field} é obrigatório')
+
+    for field in WARRANTY_FIELDS:
+        try:
+            values[field] = parse_warranty_date(raw.get(field))
+        except ValueError as e:
+            errors.append(f'{field}: {e}')
+
+    for field in COST_FIELDS:
+        value = raw.get(field)
+        if value in (None, ''):
+            values[field] = None
+            continue
+        try:
+            values[field] = float(value)
+        except (TypeError, ValueError):
+            errors.append(f'{field} inválido')
+
+    service_date = raw.get('service_date')
+    if service_date:
+        try:
+            values['service_date'] = datetime.strptime(service_date, DATE_FORMAT)
+        except (TypeError, ValueError):
+            errors.append(f'service_date inválida (formato {DATE_FORMAT})')
+    else:
+        values['service_date'] = default_created_at
+
+    images = raw.get('images') or []
+    if not isinstance(images, list) or not all(isinstance(url, str) and url for url in images):
+        errors.append('images deve ser uma lista de URLs')
+        images = []
+    elif any(len(url) > IMAGE_URL_MAX_LENGTH for url in images):
+        errors.append(f'URL de imagem excede {IMAGE_URL_MAX_LENGTH} caracteres')
+
+    return values, images, errors
+
+
+def import_maintenances(user_id, raw_rows, chunk_size):
+    """
+    Valida e insere as manutenções em uma única transação (sem commit).
+
+    A posse de todos os veículos citados é verificada com uma única query. As
+    linhas válidas são inseridas em lotes (add_all + flush por lote): cada objeto
+    recebe o id gerado pelo próprio INSERT (RETURNING em lote no PostgreSQL,
+    lastrowid no SQLite), e as imagens são inseridas depois com executemany.
+    Retorna (ids dos veículos afetados, quantidade importada, relatório de erros
+    por linha). Linhas com erro não são importadas.
+    """
+    imported_at = datetime.utcnow()
+
+    parsed = []
+    errors = []
+    for index, raw in enumerate(raw_rows, start=1):
+        values, images, row_errors = _parse_row(raw, imported_at)
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+        else:
+            parsed.append((index, values, images))
+
+    vehicle_ids = {values['vehicle_id'] for _, values, _ in parsed}
+    owned = set()
+    if vehicle_ids:
+        owned = {vehicle_id for (vehicle_id,) in db.session.query(Vehicle.id)
+                 .filter(Vehicle.id.in_(vehicle_ids), Vehicle.user_id == user_id)}
+
+    valid = []
+    for index, values, images in parsed:
+        if values['vehicle_id'] not in owned:
+            errors.append({'row': index, 'errors': ['Veículo não encontrado ou não pertence a este usuário']})
+        else:
+            valid.append((values, images))
+    errors.sort(key=lambda error: error['row'])
+
+    if not valid:
+        return set(), 0, errors
+
+    image_rows = []
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        maintenances = [Maintenance(**values) for values, _ in chunk]
+        db.session.add_all(maintenances)
+        db.session.flush()
+        image_rows.extend({'maintenance_id': maintenance.id, 'image_url': url, 'created_at': imported_at}
+                          for maintenance, (_, images) in zip(maintenances, chunk) for url in images)
+        # Os objetos não são mais usados: não acumula o lote inteiro no identity map
+        for maintenance in maintenances:
+            db.session.expunge(maintenance)
+
+    # Agregados de custo: uma variação por balde (veículo, mês, tipo), não por linha
+    deltas = {}
+    for values, _ in valid:
+        add_cost_delta(deltas, (values['vehicle_id'], month_of(values['service_date']), values['service_type']),
+                       (values['labor_cost'] or 0.0, values['parts_cost'] or 0.0))
+    apply_cost_deltas(deltas)
+
+    image_table = MaintenanceImage.__table__
+    for start in range(0, len(image_rows), chunk_size):
+        db.session.execute(image_table.insert(), image_rows[start:start + chunk_size])
+
+    return {values['vehicle_id'] for values, _ in valid}, len(valid), errors
@@ -0,0 +1,263 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from flask.json import JSONEncoder
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.ops_auth import operator_required
+
+logger = logging.getLogger(__name__)
+
+# Limites dos buckets (segundos) dos histogramas de tempo
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites dos buckets da quantidade de queries por requisição
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Fases medidas dentro de cada requisição. Podem se sobrepor: o tempo de SQL
+# da busca do usuário entra tanto em 'user_lookup' quanto em 'sql'.
+PHASES = ('auth', 'user_lookup', 'sql', 'encode')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotônico com labels, no formato de exposição do Prometheus."""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_number(value)}' for key, value in values]
+
+
+class Histogram:
+    """Histograma cumulativo com labels (buckets fixos), no formato do Prometheus."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}  # labels -> [contagem por bucket, soma]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_number(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# Métricas do processo. Com vários workers (gunicorn), cada processo expõe as suas.
+registry = MetricsRegistry()
+request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Duração total da requisição (inclui respostas em streaming).',
+    labels=('method', 'endpoint', 'status')))
+request_phase_duration = registry.register(Histogram(
+    'http_request_phase_seconds', 'Tempo gasto em cada fase da requisição (auth, user_lookup, sql, encode).',
+    labels=('endpoint', 'phase')))
+request_queries = registry.register(Histogram(
+    'http_request_sql_queries', 'Quantidade de comandos SQL por requisição.',
+    labels=('endpoint',), buckets=QUERY_COUNT_BUCKETS))
+slow_requests = registry.register(Counter(
+    'http_slow_requests_total', 'Requisições acima de SLOW_REQUEST_LOG_MS.', labels=('endpoint',)))
+storage_operations = registry.register(Counter(
+    'storage_operations_total', 'Operações no Storage de imagens por resultado.',
+    labels=('operation', 'backend', 'result')))
+shed_requests = registry.register(Counter(
+    'http_requests_shed_total', 'Requisições recusadas pelo controle de admissão, por motivo '
+    '(rate_limited = 429; queue_full/queue_timeout = 503).', labels=('reason',)))
+
+
+class RequestMetrics:
+    """Acumulador das fases de uma requisição (guardado em flask.g)."""
+    __slots__ = ('start', 'phases', 'sql_count', 'status')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.sql_count = 0
+        self.status = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def current_request_metrics():
+    if not has_request_context():
+        return None
+    return g.get('request_metrics')
+
+
+@contextmanager
+def timed(phase):
+    """Soma a duração do bloco na fase 'phase' da requisição atual (sem efeito fora de requisições)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = current_request_metrics()
+        if metrics is not None:
+            metrics.add(phase, time.perf_counter() - start)
+
+
+def record_storage_operation(operation, backend, ok, count=1):
+    storage_operations.inc(count, operation=operation, backend=backend, result='ok' if ok else 'error')
+
+
+def record_shed_request(reason):
+    shed_requests.inc(reason=reason)
+
+
+class TimedJSONEncoder(JSONEncoder):
+    """Encoder do jsonify que registra o tempo de serialização na fase 'encode'."""
+
+    def encode(self, o):
+        with timed('encode'):
+            return super().encode(o)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = current_request_metrics()
+    if metrics is None:
+        return
+    metrics.sql_count += 1
+    start = getattr(context, '_metrics_start', None)
+    if start is not None:
+        metrics.add('sql', time.perf_counter() - start)
+
+
+def _endpoint_label():
+    # O template da rota (ex.: /api/vehicles/<int:vehicle_id>) mantém a cardinalidade baixa
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _start_request():
+    g.request_metrics = RequestMetrics()
+
+
+def _capture_status(response):
+    metrics = g.get('request_metrics')
+    if metrics is not None:
+        metrics.status = response.status_code
+    return response
+
+
+def _finish_request(slow_request_seconds):
+    def finish(exc):
+        metrics = g.pop('request_metrics', None)
+        if metrics is None:
+            return
+        duration = time.perf_counter() - metrics.start
+        endpoint = _endpoint_label()
+        status = metrics.status if metrics.status is not None and exc is None else 500
+
+        request_duration.observe(duration, method=request.method, endpoint=endpoint, status=status)
+        for phase, seconds in metrics.phases.items():
+            request_phase_duration.observe(seconds, endpoint=endpoint, phase=phase)
+        request_queries.observe(metrics.sql_count, endpoint=endpoint)
+
+        if slow_request_seconds and duration >= slow_request_seconds:
+            slow_requests.inc(endpoint=endpoint)
+            breakdown = [f'queries={metrics.sql_count}'] + [f'{phase}={metrics.phases[phase] * 1000:.1f}ms'
+                                                             for phase in PHASES if phase in metrics.phases]
+            logger.warning(f"Requisição lenta: {request.method} {request.full_path.rstrip('?')} -> {status} "
+                           f"em {duration * 1000:.1f}ms | {' '.join(breakdown)}")
+    return finish
+
+
+def metrics_view():
+    from flask import current_app
+    return current_app.response_class(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    """
+    Liga a instrumentação por requisição (duração total, fases, queries SQL) e
+    expõe as métricas em /metrics no formato texto do Prometheus (só para
+    operadores: OPS_TOKEN / OPS_ALLOWED_IPS).
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    slow_request_ms = app.config.get('SLOW_REQUEST_LOG_MS', 0)
+    app.json_encoder = TimedJSONEncoder
+    app.before_request(_start_request)
+    app.after_request(_capture_status)
+    app.teardown_request(_finish_request(slow_request_ms / 1000.0 if slow_request_ms else None))
+    app.add_url_rule('/metrics', 'metrics', operator_required(metrics_view), methods=['GET'])
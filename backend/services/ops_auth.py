@@ -0,0 +1,59 @@
+import hmac
+import ipaddress
+import logging
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+
+def parse_allowed_networks(value):
+    """Lista de IPs/redes (CIDR) separados por vírgula -> [ip_network]."""
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in (value or '').split(',') if item.strip()]
+
+
+def _token_matches(expected):
+    if not expected:
+        return False
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(header[len('Bearer '):].strip().encode(), expected.encode())
+
+
+def _address_allowed(networks):
+    if not networks or not request.remote_addr:
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def is_operator_request():
+    """
+    Libera a requisição com 'Authorization: Bearer <OPS_TOKEN>' ou vinda de um
+    endereço em OPS_ALLOWED_IPS. Sem nenhum dos dois configurado, nega tudo.
+    """
+    config = current_app.config
+    networks = current_app.extensions.get('ops_allowed_networks')
+    if networks is None:
+        networks = current_app.extensions['ops_allowed_networks'] = parse_allowed_networks(config['OPS_ALLOWED_IPS'])
+    return _token_matches(config['OPS_TOKEN']) or _address_allowed(networks)
+
+
+def operator_denied_response():
+    logger.warning(f"Acesso negado a rota de operação: {request.path} (origem {request.remote_addr})")
+    return jsonify({'message': 'Acesso restrito a operadores'}), 403
+
+
+def operator_required(f):
+    """Decorator das rotas internas fora do blueprint /ops (ex.: /metrics): só operadores."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_operator_request():
+            return operator_denied_response()
+        return f(*args, **kwargs)
+    return decorated_function
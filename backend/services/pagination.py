@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+
+MAX_PAGE_LIMIT = 200
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    """Gera um cursor opaco (base64 url-safe) com os valores da chave da última linha da página."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Decodifica um cursor gerado por encode_cursor. Levanta PaginationError se for inválido."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise PaginationError('Cursor inválido')
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError('Cursor inválido')
+    return values
+
+
+def parse_page_args(args, cursor_size):
+    """
+    Lê 'limit' e 'cursor' da query string.
+    Retorna (limit, valores_do_cursor); ambos None quando a paginação não foi pedida,
+    caso em que a rota devolve a lista completa (compatível com clientes antigos).
+    """
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise PaginationError('Parâmetro limit inválido')
+        if limit < 1:
+            raise PaginationError('Parâmetro limit inválido')
+        limit = min(limit, MAX_PAGE_LIMIT)
+    elif cursor:
+        limit = MAX_PAGE_LIMIT
+
+    values = decode_cursor(cursor, cursor_size) if cursor else None
+    return limit, values
+
+
+def parse_cursor_datetime(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise PaginationError('Cursor inválido')
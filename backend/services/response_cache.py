@@ -0,0 +1,274 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+
+# Corpo JSON já serializado + ETag da resposta
+CachedResponse = namedtuple('CachedResponse', ['body', 'etag'])
+
+_DIRTY_USERS_KEY = 'response_cache_dirty_users'
+
+
+class LRUCacheBackend:
+    """Backend em memória do processo: LRU limitado por número de entradas e por bytes."""
+    name = 'memory'
+
+    def __init__(self, max_entries=5000, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # chave -> (valor, tamanho, expira_em, tag)
+        self._keys_by_tag = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, tag):
+        size = len(key) + len(value.body) + len(value.etag or '')
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl, tag)
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete_tag(self, tag):
+        with self._lock:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'memory_bytes': self._bytes,
+                    'max_entries': self.max_entries, 'max_bytes': self.max_bytes}
+
+    def _remove(self, key):
+        value, size, _, tag = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._keys_by_tag.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+class LocalSharedStore:
+    """
+    Substituto local (em memória) do subconjunto da API do Redis usado pelo
+    SharedCacheBackend. Serve para desenvolvimento e testes sem servidor.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                del self._data[key]
+                return None
+            return entry[0]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                removed += int(self._data.pop(key, None) is not None)
+                removed += int(self._sets.pop(key, None) is not None)
+            return removed
+
+    def sadd(self, key, *members):
+        with self._lock:
+            self._sets.setdefault(key, set()).update(members)
+        return len(members)
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._sets.get(key, ()))
+
+    def expire(self, key, seconds):
+        return True
+
+    def info(self, section=None):
+        with self._lock:
+            used = sum(len(k) + len(v[0]) for k, v in self._data.items())
+        return {'used_memory': used}
+
+
+class SharedCacheBackend:
+    """
+    Backend compartilhado entre processos sobre um cliente estilo Redis
+    (redis.Redis ou LocalSharedStore). Cada tag (usuário) é um set com suas chaves.
+    """
+    name = 'shared'
+
+    def __init__(self, client, ttl=300, prefix='garagem:rc:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, tag):
+        tag_key = self.prefix + 'tag:' + tag
+        self.client.set(self.prefix + key, pickle.dumps(tuple(value)), ex=self.ttl)
+        self.client.sadd(tag_key, key)
+        self.client.expire(tag_key, self.ttl)
+
+    def delete_tag(self, tag):
+        tag_key = self.prefix + 'tag:' + tag
+        keys = [self.prefix + (k.decode() if isinstance(k, bytes) else k) for k in self.client.smembers(tag_key)]
+        self.client.delete(tag_key, *keys)
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        try:
+            used = self.client.info('memory').get('used_memory')
+        except Exception:
+            used = None
+        return {'memory_bytes': used}
+
+
+class ResponseCache:
+    """Cache de respostas JSON por usuário e recurso, com contadores de hit/miss."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    @staticmethod
+    def _tag(user_id):
+        return f'u{user_id}'
+
+    @staticmethod
+    def make_key(user):
+        # A versão dos dados do usuário entra na chave: mesmo com um backend por processo,
+        # uma escrita feita por outro processo torna as entradas antigas inalcançáveis.
+        return f'u{user.id}:{user.data_version}:{request.full_path}'
+
+    def get(self, user):
+        if not self.enabled:
+            return None
+        value = self.backend.get(self.make_key(user))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return CachedResponse(*value) if value is not None else None
+
+    def set(self, user, response):
+        if not self.enabled or response.status_code != 200:
+            return
+        value = CachedResponse(response.get_data(), response.headers.get('ETag'))
+        self.backend.set(self.make_key(user), value, self._tag(user.id))
+
+    def invalidate_user(self, user_id):
+        if not self.enabled:
+            return
+        self.backend.delete_tag(self._tag(user_id))
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': self.backend.name if self.enabled else None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+        if self.enabled:
+            stats.update(self.backend.stats())
+        return stats
+
+
+# Instância única compartilhada pelo processo (backend escolhido em init_response_cache)
+response_cache = ResponseCache()
+
+
+def mark_user_dirty(user_id):
+    """Agenda a invalidação do cache do usuário para quando a transação atual fizer commit."""
+    db.session.info.setdefault(_DIRTY_USERS_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop(_DIRTY_USERS_KEY, ()):
+        response_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop(_DIRTY_USERS_KEY, None)
+
+
+def create_cache_backend(config):
+    backend = config['RESPONSE_CACHE_BACKEND']
+    ttl = config['RESPONSE_CACHE_TTL']
+    if backend in (None, '', 'none'):
+        return None
+    if backend == 'memory':
+        return LRUCacheBackend(max_entries=config['RESPONSE_CACHE_MAX_ENTRIES'],
+                               max_bytes=config['RESPONSE_CACHE_MAX_BYTES'], ttl=ttl)
+    if backend == 'shared':
+        url = config['RESPONSE_CACHE_URL']
+        if url in (None, '', 'local://'):
+            client = LocalSharedStore()
+        else:
+            import redis  # Dependência opcional, só necessária para o backend compartilhado real
+            client = redis.Redis.from_url(url)
+        return SharedCacheBackend(client, ttl=ttl)
+    raise ValueError(f"RESPONSE_CACHE_BACKEND desconhecido: {backend}")
+
+
+def init_response_cache(app):
+    response_cache.backend = create_cache_backend(app.config)
@@ -0,0 +1,201 @@
+import logging
+import re
+
+from sqlalchemy import DateTime, and_, bindparam, literal, or_, text
+
+from extensions import db
+from models import Maintenance, Vehicle
+from services.pagination import PaginationError, parse_cursor_datetime
+
+logger = logging.getLogger(__name__)
+
+# Colunas pesquisáveis da manutenção, na ordem do índice FTS5, com o peso de cada uma no bm25
+SEARCH_COLUMNS = [
+    ('service_type', 4.0),
+    ('workshop', 3.0),
+    ('mechanic', 2.0),
+    ('parts', 2.0),
+    ('parts_store', 1.0),
+]
+
+# Índice FTS5 próprio (não external content): além do texto guarda o token do dono
+# ('u<user_id>'), para que o filtro por usuário seja resolvido dentro do próprio índice.
+# Os triggers mantêm o índice em sincronia com qualquer escrita em maintenance,
+# inclusive os INSERTs em lote da importação e os deletes em cascata.
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS maintenance_fts USING fts5(
+        service_type, workshop, mechanic, parts, parts_store, owner,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_insert AFTER INSERT ON maintenance BEGIN
+        INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+        SELECT new.id, new.service_type, new.workshop, new.mechanic, new.parts, new.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+        FROM vehicle WHERE vehicle.id = new.vehicle_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_delete AFTER DELETE ON maintenance BEGIN
+        DELETE FROM maintenance_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS maintenance_fts_after_update
+    AFTER UPDATE OF service_type, workshop, mechanic, parts, parts_store, vehicle_id ON maintenance BEGIN
+        DELETE FROM maintenance_fts WHERE rowid = old.id;
+        INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+        SELECT new.id, new.service_type, new.workshop, new.mechanic, new.parts, new.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+        FROM vehicle WHERE vehicle.id = new.vehicle_id;
+    END""",
+]
+FTS_OBJECTS = ('maintenance_fts', 'maintenance_fts_after_insert',
+               'maintenance_fts_after_delete', 'maintenance_fts_after_update')
+FTS_REBUILD = [
+    "DELETE FROM maintenance_fts",
+    """INSERT INTO maintenance_fts (rowid, service_type, workshop, mechanic, parts, parts_store, owner)
+    SELECT maintenance.id, maintenance.service_type, maintenance.workshop, maintenance.mechanic,
+           maintenance.parts, maintenance.parts_store, 'u' || vehicle.user_id || ' v' || vehicle.id
+    FROM maintenance JOIN vehicle ON vehicle.id = maintenance.vehicle_id""",
+    "INSERT INTO maintenance_fts (maintenance_fts) VALUES ('optimize')",
+]
+
+_TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+MAX_SEARCH_TERMS = 10
+
+
+def fts_available():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def ensure_search_index(rebuild=False):
+    """
+    Cria o índice FTS5 e os triggers que faltarem (SQLite). Se algo precisou ser
+    criado ou rebuild=True, repopula o índice a partir das manutenções. Chamado
+    junto com o db.create_all() e pelo `flask rebuild-search-index`; em produção
+    o índice vem da migração 0007.
+    """
+    if not fts_available():
+        return False
+    with db.engine.begin() as connection:
+        existing = {name for (name,) in connection.execute(
+            text("SELECT name FROM sqlite_master WHERE name IN :names")
+            .bindparams(bindparam('names', expanding=True)), {'names': ['maintenance', *FTS_OBJECTS]})}
+        if 'maintenance' not in existing:
+            # Banco ainda sem schema (migrações pendentes): a migração 0007 cria o índice
+            logger.warning("Tabela maintenance inexistente; índice de busca não verificado")
+            return False
+        missing = set(FTS_OBJECTS) - existing
+        if not missing and not rebuild:
+            return False
+        for statement in FTS_DDL:
+            connection.execute(text(statement))
+        for statement in FTS_REBUILD:
+            connection.execute(text(statement))
+        count = connection.execute(text("SELECT COUNT(*) FROM maintenance_fts")).scalar()
+    logger.info(f"Índice de busca (FTS5) reconstruído: {count} manutenção(ões)")
+    return True
+
+
+def build_match_query(user_id, search, vehicle_id=None):
+    """
+    Monta a expressão MATCH do FTS5 a partir do texto livre do usuário: cada palavra
+    vira um prefixo entre aspas (sem operadores vindos da entrada), restrito às
+    colunas pesquisáveis, e combinado com os tokens do dono (e do veículo).
+    """
+    terms = _TERM_PATTERN.findall(search or '')[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    columns = ' '.join(column for column, _ in SEARCH_COLUMNS)
+    words = ' AND '.join(f'"{term}"*' for term in terms)
+    owner = f'u{int(user_id)}' + (f' AND v{int(vehicle_id)}' if vehicle_id is not None else '')
+    return f'owner : ({owner}) AND {{{columns}}} : ({words})'
+
+
+def parse_search_cursor(values):
+    """
+    Valores do cursor da busca -> (chave, id) da última linha da página: a
+    relevância (bm25) com FTS5 ou a data do serviço no LIKE. Levanta PaginationError.
+    """
+    key, maintenance_id = values
+    try:
+        maintenance_id = int(maintenance_id)
+        if fts_available():
+            if isinstance(key, bool) or not isinstance(key, (int, float)):
+                raise PaginationError('Cursor inválido')
+            return float(key), maintenance_id
+    except (TypeError, ValueError):
+        raise PaginationError('Cursor inválido')
+    return parse_cursor_datetime(key), maintenance_id
+
+
+def search_maintenances(user_id, search, limit, after=None, vehicle_id=None):
+    """
+    Busca nas manutenções do usuário. Retorna (linhas, tem_mais); cada linha traz
+    cursor_key, que com o id forma o cursor da próxima página (after). Com FTS5 o
+    resultado vem ordenado por relevância (bm25, id); nos demais bancos cai num
+    LIKE ordenado pela data do serviço.
+    """
+    if fts_available():
+        match = build_match_query(user_id, search, vehicle_id)
+        if match is None:
+            return [], False
+        weights = ', '.join(str(weight) for _, weight in SEARCH_COLUMNS) + ', 0.0'
+        params = {'match': match, 'limit': limit + 1}
+        keyset = ''
+        if after is not None:
+            # Keyset em (score, id): cada página custa o mesmo, sem pular as anteriores
+            keyset = 'WHERE score > :after_score OR (score = :after_score AND id > :after_id)'
+            params['after_score'], params['after_id'] = after
+        # Filtro, ranking e paginação resolvidos só no índice; a junção com as
+        # tabelas acontece apenas para as linhas da página
+        rows = db.session.execute(text(f"""
+            SELECT maintenance.id, maintenance.vehicle_id, vehicle.license_plate, maintenance.service_type,
+                   maintenance.workshop, maintenance.mechanic, maintenance.parts, maintenance.parts_store,
+                   maintenance.service_date, hits.score, hits.score AS cursor_key
+            FROM (SELECT id, score
+                  FROM (SELECT rowid AS id, bm25(maintenance_fts, {weights}) AS score
+                        FROM maintenance_fts
+                        WHERE maintenance_fts MATCH :match)
+                  {keyset}
+                  ORDER BY score, id
+                  LIMIT :limit) AS hits
+            JOIN maintenance ON maintenance.id = hits.id
+            JOIN vehicle ON vehicle.id = maintenance.vehicle_id
+            ORDER BY hits.score, hits.id
+        """).columns(service_date=DateTime), params).fetchall()
+    else:
+        terms = _TERM_PATTERN.findall(search or '')[:MAX_SEARCH_TERMS]
+        if not terms:
+            return [], False
+        query = (db.session.query(Maintenance.id, Maintenance.vehicle_id, Vehicle.license_plate,
+                                  Maintenance.service_type, Maintenance.workshop, Maintenance.mechanic,
+                                  Maintenance.parts, Maintenance.parts_store, Maintenance.service_date,
+                                  literal(0.0).label('score'), Maintenance.service_date.label('cursor_key'))
+                 .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+                 .filter(Vehicle.user_id == user_id))
+        if vehicle_id is not None:
+            query = query.filter(Maintenance.vehicle_id == vehicle_id)
+        for term in terms:
+            query = query.filter(or_(*[getattr(Maintenance, column).ilike(f'%{term}%')
+                                       for column, _ in SEARCH_COLUMNS]))
+        if after is not None:
+            after_date, after_id = after
+            query = query.filter(or_(
+                Maintenance.service_date < after_date,
+                and_(Maintenance.service_date == after_date, Maintenance.id < after_id)
+            ))
+        rows = query.order_by(Maintenance.service_date.desc(), Maintenance.id.desc()).limit(limit + 1).all()
+
+    return rows[:limit], len(rows) > limit
+
+
+def init_search(app):
+    """
+    Registra `flask rebuild-search-index`. Nada de DDL na inicialização: o índice
+    vem da migração 0007 (ou do db.create_all(), com DB_CREATE_ALL).
+    """
+    import click
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Recria o índice de busca (FTS5) a partir das manutenções."""
+        with app.app_context():
+            if ensure_search_index(rebuild=True):
+                click.echo("Índice de busca reconstruído.")
+            else:
+                click.echo("Busca FTS5 indisponível neste banco (apenas SQLite).")
@@ -0,0 +1,142 @@
+import json
+
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db
+from models import Maintenance, MaintenanceImage, Vehicle
+from services.metrics import timed
+from services.warranty import format_warranty_date
+
+try:
+    import orjson  # Dependência opcional: encoder JSON bem mais rápido que o json da stdlib
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _format_datetime(value):
+    return value.strftime(DATETIME_FORMAT) if value is not None else None
+
+
+class FieldsError(ValueError):
+    pass
+
+
+class Serializer:
+    """
+    Projeção de colunas + formatação de um recurso da API.
+
+    'fields' mapeia o nome do campo na resposta para (coluna, formatador). As
+    listas selecionam só as colunas pedidas (tuplas, sem hidratar objetos ORM) e
+    aplicam os formatadores por coluna. '?fields=a,b' restringe os campos
+    devolvidos; 'id' sempre vem.
+    """
+
+    def __init__(self, fields, extra_fields=()):
+        self.fields = fields
+        self.extra_fields = tuple(extra_fields)  # Campos montados fora da projeção (ex.: images)
+        self.names = tuple(fields) + self.extra_fields
+
+    def parse_fields(self, args):
+        raw = args.get('fields')
+        if not raw:
+            return self.names
+        requested = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in self.names]
+        if unknown:
+            raise FieldsError(f"Campo(s) desconhecido(s) em fields: {', '.join(unknown)}")
+        return tuple(name for name in self.names if name == 'id' or name in requested)
+
+    def columns(self, names):
+        return [self.fields[name][0].label(name) for name in names if name in self.fields]
+
+    def rows_to_dicts(self, rows, names):
+        names = [name for name in names if name in self.fields]
+        if not rows:
+            return []
+        # Transpõe para colunas e formata cada coluna de uma vez (map sobre a coluna inteira)
+        columns = [values if self.fields[name][1] is None else list(map(self.fields[name][1], values))
+                   for name, values in zip(names, zip(*rows))]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def object_to_dict(self, obj, names=None):
+        return {name: (formatter(getattr(obj, name)) if formatter else getattr(obj, name))
+                for name, (_, formatter) in self.fields.items() if names is None or name in names}
+
+
+VEHICLE = Serializer({
+    'id': (Vehicle.id, None),
+    'type': (Vehicle.type, None),
+    'brand': (Vehicle.brand, None),
+    'model': (Vehicle.model, None),
+    'year': (Vehicle.year, None),
+    'license_plate': (Vehicle.license_plate, None),
+    'color': (Vehicle.color, None),
+    'updated_at': (Vehicle.updated_at, _format_datetime),
+})
+
+MAINTENANCE = Serializer({
+    'id': (Maintenance.id, None),
+    'vehicle_id': (Maintenance.vehicle_id, None),
+    'service_type': (Maintenance.service_type, None),
+    'workshop': (Maintenance.workshop, None),
+    'mechanic': (Maintenance.mechanic, None),
+    'labor_warranty_date': (Maintenance.labor_warranty_date, format_warranty_date),
+    'labor_cost': (Maintenance.labor_cost, None),
+    'parts': (Maintenance.parts, None),
+    'parts_store': (Maintenance.parts_store, None),
+    'parts_warranty_date': (Maintenance.parts_warranty_date, format_warranty_date),
+    'parts_cost': (Maintenance.parts_cost, None),
+    'service_date': (Maintenance.service_date, _format_datetime),
+    'created_at': (Maintenance.created_at, _format_datetime),
+    'updated_at': (Maintenance.updated_at, _format_datetime),
+}, extra_fields=('images', 'thumbnails'))
+
+
+def images_by_maintenance(maintenance_ids):
+    """
+    URLs das imagens de várias manutenções numa única query:
+    {maintenance_id: ([urls originais], [urls das miniaturas])}. Imagens sem
+    miniatura (enviadas direto pelo cliente) repetem a original na lista de miniaturas.
+    """
+    images = {maintenance_id: ([], []) for maintenance_id in maintenance_ids}
+    if not maintenance_ids:
+        return images
+    rows = db.session.execute(
+        select(MaintenanceImage.maintenance_id, MaintenanceImage.image_url, MaintenanceImage.thumbnail_url)
+        .where(MaintenanceImage.maintenance_id.in_(maintenance_ids))
+        .order_by(MaintenanceImage.id))
+    for maintenance_id, image_url, thumbnail_url in rows:
+        urls, thumbnails = images[maintenance_id]
+        urls.append(image_url)
+        thumbnails.append(thumbnail_url or image_url)
+    return images
+
+
+def maintenance_dicts(rows, names):
+    """Linhas projetadas (com 'id') de manutenções -> dicts, anexando as imagens/miniaturas se pedidas."""
+    output = MAINTENANCE.rows_to_dicts(rows, names)
+    with_images, with_thumbnails = 'images' in names, 'thumbnails' in names
+    if with_images or with_thumbnails:
+        images = images_by_maintenance([item['id'] for item in output])
+        for item in output:
+            urls, thumbnails = images[item['id']]
+            if with_images:
+                item['images'] = urls
+            if with_thumbnails:
+                item['thumbnails'] = thumbnails
+    return output
+
+
+def dumps(payload):
+    with timed('encode'):
+        if orjson is not None:
+            return orjson.dumps(payload)
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """Como jsonify, mas serializa com orjson quando disponível (sem ordenar as chaves)."""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
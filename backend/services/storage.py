@@ -0,0 +1,238 @@
+import os
+import threading
+import urllib.parse # Para decodificar URL
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import logging # Para logs
+import traceback # Para logar stack trace completo
+
+from flask import current_app, request
+
+from services.metrics import record_storage_operation
+
+logger = logging.getLogger(__name__)
+
+
+# Resultado da exclusão de um caminho/URL: ok=True se removido (ou já inexistente)
+DeleteResult = namedtuple('DeleteResult', ['ok', 'error'])
+
+
+class StorageBackend:
+    """
+    Interface dos backends de armazenamento de imagens.
+
+    delete(path) retorna True se o objeto foi removido (ou já não existia)
+    e levanta exceção em falhas que valem nova tentativa.
+
+    upload(path, data, content_type) grava o arquivo e retorna a URL pública
+    de download, no mesmo formato (/o/<caminho>?alt=media) das URLs do Firebase,
+    para que get_storage_path_from_url e a outbox de exclusão funcionem com ela.
+
+    delete_many(paths) divide os caminhos em lotes de 'batch_size', executa os
+    lotes em paralelo num pool limitado a 'max_workers' threads e retorna
+    {caminho: DeleteResult}. Os backends podem sobrescrever _delete_chunk para
+    usar uma API de lote nativa.
+    """
+    name = 'base'
+
+    def __init__(self, batch_size=100, max_workers=8):
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def delete(self, path):
+        raise NotImplementedError
+
+    def upload(self, path, data, content_type):
+        raise NotImplementedError
+
+    def _delete_chunk(self, paths):
+        results = {}
+        for path in paths:
+            try:
+                self.delete(path)
+                results[path] = DeleteResult(True, None)
+            except Exception as e:
+                results[path] = DeleteResult(False, f'{type(e).__name__}: {e}')
+        return results
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f'storage-{self.name}')
+            return self._executor
+
+    def delete_many(self, paths):
+        paths = list(dict.fromkeys(paths))  # Remove duplicados mantendo a ordem
+        chunks = [paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)]
+        if len(chunks) <= 1:
+            return self._record(self._delete_chunk(chunks[0]) if chunks else {})
+
+        results = {}
+        for chunk_results in self.executor.map(self._delete_chunk, chunks):
+            results.update(chunk_results)
+        return self._record(results)
+
+    def _record(self, results):
+        failed = sum(1 for result in results.values() if not result.ok)
+        record_storage_operation('delete', self.name, ok=True, count=len(results) - failed)
+        record_storage_operation('delete', self.name, ok=False, count=failed)
+        return results
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+class FirebaseStorageBackend(StorageBackend):
+    """Backend real: bucket padrão do Firebase Storage (FIREBASE_STORAGE_BUCKET)."""
+    name = 'firebase'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._bucket = None
+        self._bucket_lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        # Um único handle do bucket (e do client HTTP) reaproveitado por todas as exclusões
+        with self._bucket_lock:
+            if self._bucket is None:
+                from firebase_admin import storage # Importar storage
+                from services.firebase import get_firebase_app
+                # Obtém o bucket padrão (verifique se é o correto no Firebase Console)
+                self._bucket = storage.bucket(app=get_firebase_app())
+            return self._bucket
+
+    def delete(self, path):
+        from google.cloud.exceptions import NotFound
+        try:
+            self.bucket.blob(path).delete() # A exclusão em si
+        except NotFound:
+            logger.warning(f"Blob não encontrado no Storage (pode já ter sido deletado): {path}")
+        return True
+
+    def upload(self, path, data, content_type):
+        # O token de download é o mesmo mecanismo usado pelo getDownloadURL() do SDK do cliente
+        token = str(uuid.uuid4())
+        bucket = self.bucket
+        blob = bucket.blob(path)
+        blob.metadata = {'firebaseStorageDownloadTokens': token}
+        blob.cache_control = 'public, max-age=31536000, immutable'  # Nomes únicos: o conteúdo nunca muda
+        blob.upload_from_string(data, content_type=content_type)
+        return (f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}/o/"
+                f"{urllib.parse.quote(path, safe='')}?alt=media&token={token}")
+
+    def _delete_chunk(self, paths):
+        # Envia o lote inteiro numa única requisição batch da API do Cloud Storage
+        bucket = self.bucket
+        try:
+            with bucket.client.batch():
+                for path in paths:
+                    bucket.blob(path).delete()
+            return {path: DeleteResult(True, None) for path in paths}
+        except Exception as e:
+            # Alguma exclusão do lote falhou (ex.: 404): refaz uma a uma para ter o resultado de cada caminho
+            logger.warning(f"Falha no lote de {len(paths)} exclusões ({type(e).__name__}: {e}); repetindo individualmente")
+            return super()._delete_chunk(paths)
+
+
+class LocalStorageBackend(StorageBackend):
+    """Backend em sistema de arquivos local, para desenvolvimento e testes offline."""
+    name = 'local'
+
+    def __init__(self, root, base_url=None, **kwargs):
+        super().__init__(**kwargs)
+        self.root = os.path.abspath(root)
+        # Prefixo das URLs geradas (rota /storage do próprio app); vazio = host da requisição atual
+        self.base_url = base_url.rstrip('/') if base_url else None
+
+    def _full_path(self, path):
+        full_path = os.path.abspath(os.path.join(self.root, path))
+        if not full_path.startswith(self.root + os.sep):
+            raise ValueError(f"Caminho fora do diretório de armazenamento: {path}")
+        return full_path
+
+    def delete(self, path):
+        try:
+            os.remove(self._full_path(path))
+        except FileNotFoundError:
+            logger.warning(f"Arquivo não encontrado no armazenamento local (pode já ter sido deletado): {path}")
+        return True
+
+    def upload(self, path, data, content_type):
+        full_path = self._full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Grava num temporário e renomeia: quem lê nunca vê um arquivo pela metade
+        temp_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, full_path)
+        base_url = self.base_url or request.url_root.rstrip('/') + '/storage'
+        return f"{base_url}/o/{urllib.parse.quote(path, safe='')}?alt=media"
+
+
+def create_storage_backend(config):
+    backend = config.get('STORAGE_BACKEND', 'firebase')
+    options = {
+        'batch_size': config.get('STORAGE_DELETE_BATCH_SIZE', 100),
+        'max_workers': config.get('STORAGE_DELETE_WORKERS', 8),
+    }
+    if backend == 'local':
+        return LocalStorageBackend(config['LOCAL_STORAGE_DIR'], base_url=config.get('LOCAL_STORAGE_BASE_URL'), **options)
+    if backend == 'firebase':
+        return FirebaseStorageBackend(**options)
+    raise ValueError(f"STORAGE_BACKEND desconhecido: {backend}")
+
+
+def get_storage_backend():
+    """Backend de armazenamento do app atual (criado uma vez e guardado em app.extensions)."""
+    app = current_app._get_current_object()
+    backend = app.extensions.get('storage_backend')
+    if backend is None:
+        backend = app.extensions['storage_backend'] = create_storage_backend(app.config)
+    return backend
+
+
+# --- Função Auxiliar para Extrair Caminho do Storage ---
+def get_storage_path_from_url(image_url):
+    """Extrai o caminho do arquivo no Firebase Storage a partir da URL de download."""
+    logger.debug(f"Tentando extrair caminho da URL: {image_url}")
+    try:
+        decoded_url = urllib.parse.unquote(image_url)
+        logger.debug(f"URL decodificada: {decoded_url}")
+        # Tenta encontrar /o/ que marca o início do caminho do objeto no bucket
+        path_start_marker = '/o/'
+        path_start_index = decoded_url.find(path_start_marker)
+
+        if path_start_index == -1:
+            logger.warning(f"Marcador '/o/' não encontrado na URL decodificada: {decoded_url}")
+            return None
+
+        path_start = path_start_index + len(path_start_marker)
+
+        # Tenta encontrar ?alt=media que marca o fim do caminho
+        path_end_marker = '?alt=media'
+        path_end_index = decoded_url.find(path_end_marker, path_start) # Busca a partir do início do caminho
+
+        if path_end_index == -1:
+            logger.warning(f"Marcador '?alt=media' não encontrado após o caminho na URL: {decoded_url}")
+            # Considerar que talvez a URL não tenha query parameters? Pouco provável para downloadURL.
+            # Se a URL for apenas o caminho, isso pode falhar. Ajustar se necessário.
+            # Por enquanto, retorna None se não encontrar o fim esperado.
+            return None
+
+        extracted_path = decoded_url[path_start:path_end_index]
+        logger.info(f"Caminho extraído do Storage: {extracted_path}")
+        return extracted_path
+
+    except Exception as e:
+        logger.error(f"Erro EXCEPCIONAL ao extrair caminho da URL {image_url}: {e}")
+        logger.error(traceback.format_exc()) # Log completo do erro
+        return None
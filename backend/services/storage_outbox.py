@@ -0,0 +1,219 @@
+import logging
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import StorageDeletion
+from services.storage import get_storage_backend, get_storage_path_from_url
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_storage_deletions(image_urls):
+    """
+    Registra as URLs para exclusão no Storage na sessão atual.
+    Não faz commit: as linhas entram na mesma transação que remove os dados do banco.
+    """
+    now = datetime.utcnow()
+    rows = [StorageDeletion(image_url=url, next_attempt_at=now) for url in image_urls if url]
+    db.session.add_all(rows)
+    return len(rows)
+
+
+def record_orphaned_files(image_urls):
+    """
+    Grava na outbox, numa transação própria (com commit), arquivos que ficaram
+    sem registro no banco, ex.: gravados no Storage antes de a requisição falhar.
+    A sessão deve estar limpa (rollback já feito). Retorna True se gravou.
+    """
+    if not image_urls:
+        return False
+    try:
+        enqueue_storage_deletions(image_urls)
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        logger.exception(f"Não foi possível registrar na outbox a exclusão de {len(image_urls)} arquivo(s) órfão(s): {image_urls}")
+        return False
+
+
+def retry_delay(attempts, base_seconds, max_seconds):
+    """Backoff exponencial: base, 2*base, 4*base, ... limitado a max_seconds."""
+    return min(base_seconds * (2 ** max(attempts - 1, 0)), max_seconds)
+
+
+def _claim_batch(batch_size, lease_seconds):
+    """
+    Reserva até batch_size exclusões vencidas para este worker. A reserva empurra
+    next_attempt_at para frente (lease), então outro processo não pega as mesmas
+    linhas, e elas voltam a ficar disponíveis se este worker morrer no meio.
+    """
+    now = datetime.utcnow()
+    claim_token = str(uuid.uuid4())
+    due_ids = (db.session.query(StorageDeletion.id)
+               .filter(StorageDeletion.status == StorageDeletion.STATUS_PENDING,
+                       StorageDeletion.next_attempt_at <= now)
+               .order_by(StorageDeletion.next_attempt_at)
+               .limit(batch_size)
+               .subquery())
+    claimed = (StorageDeletion.query
+               .filter(StorageDeletion.id.in_(db.session.query(due_ids.c.id)),
+                       StorageDeletion.status == StorageDeletion.STATUS_PENDING,
+                       StorageDeletion.next_attempt_at <= now)
+               .update({'claimed_by': claim_token,
+                        'next_attempt_at': now + timedelta(seconds=lease_seconds)},
+                       synchronize_session=False))
+    db.session.commit()
+    if not claimed:
+        return []
+    return StorageDeletion.query.filter_by(claimed_by=claim_token).all()
+
+
+def _apply_result(row, result, config):
+    """Atualiza o estado da linha conforme o resultado da exclusão (sem commit)."""
+    row.attempts += 1
+    row.claimed_by = None
+    if result.ok:
+        row.status = StorageDeletion.STATUS_DONE
+        row.last_error = None
+        row.processed_at = datetime.utcnow()
+        return True
+
+    row.last_error = (result.error or '')[:500]
+    if row.attempts >= config['STORAGE_OUTBOX_MAX_ATTEMPTS']:
+        row.status = StorageDeletion.STATUS_DEAD
+        row.processed_at = datetime.utcnow()
+        logger.error(f"Exclusão de '{row.image_url}' movida para dead-letter após {row.attempts} tentativas: {row.last_error}")
+    else:
+        delay = retry_delay(row.attempts, config['STORAGE_OUTBOX_BACKOFF_SECONDS'],
+                            config['STORAGE_OUTBOX_MAX_BACKOFF_SECONDS'])
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"Falha ao deletar '{row.image_url}' (tentativa {row.attempts}), nova tentativa em {delay}s: {row.last_error}")
+    return False
+
+
+def _process_batch(rows, backend, config):
+    """Exclui as imagens do lote de uma vez (delete_many) e atualiza cada linha."""
+    paths = {}
+    for row in rows:
+        path = get_storage_path_from_url(row.image_url)
+        if not path:
+            # URL que não aponta para o Storage: nenhuma nova tentativa vai resolver
+            row.attempts += 1
+            row.claimed_by = None
+            row.status = StorageDeletion.STATUS_DEAD
+            row.last_error = 'Não foi possível extrair o caminho do Storage da URL'
+            row.processed_at = datetime.utcnow()
+        else:
+            paths[row.id] = path
+
+    results = backend.delete_many(paths.values()) if paths else {}
+    deleted = failed = 0
+    for row in rows:
+        if row.id not in paths:
+            failed += 1
+        elif _apply_result(row, results[paths[row.id]], config):
+            deleted += 1
+        else:
+            failed += 1
+    return deleted, failed
+
+
+def drain_outbox(app, max_batches=None):
+    """
+    Processa as exclusões pendentes e vencidas, em lotes, até esvaziar a fila
+    (ou até max_batches lotes). Retorna (excluídas, falhas).
+    """
+    config = app.config
+    deleted = failed = batches = 0
+    with app.app_context():
+        try:
+            backend = get_storage_backend()
+            while max_batches is None or batches < max_batches:
+                rows = _claim_batch(config['STORAGE_OUTBOX_BATCH_SIZE'], config['STORAGE_OUTBOX_LEASE_SECONDS'])
+                if not rows:
+                    break
+                batches += 1
+                batch_deleted, batch_failed = _process_batch(rows, backend, config)
+                deleted += batch_deleted
+                failed += batch_failed
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao processar a outbox de exclusões do Storage: {e}")
+            logger.error(traceback.format_exc())
+        finally:
+            db.session.remove()
+    if deleted or failed:
+        logger.info(f"Outbox do Storage: {deleted} imagem(ns) excluída(s), {failed} falha(s)")
+    return deleted, failed
+
+
+class StorageOutboxWorker:
+    """Thread em segundo plano que drena a outbox periodicamente ou quando notificada."""
+
+    def __init__(self, app):
+        self.app = app
+        self.poll_seconds = app.config['STORAGE_OUTBOX_POLL_SECONDS']
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='storage-outbox-worker', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Acorda o worker logo após o commit de novas exclusões."""
+        self._wakeup.set()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            drain_outbox(self.app)
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+
+def notify_storage_outbox(app):
+    worker = app.extensions.get('storage_outbox_worker')
+    if worker is not None:
+        worker.notify()
+
+
+def start_storage_outbox_worker(app):
+    """Inicia a thread do worker, se habilitado (no processo atual)."""
+    worker = app.extensions.get('storage_outbox_worker')
+    if worker is not None:
+        worker.start()
+
+
+def init_storage_outbox(app):
+    """
+    Registra o comando de CLI e, se habilitado, cria o worker do app. A thread
+    não é iniciada aqui: create_app() também roda nas migrações e nos comandos
+    `flask`, que não atendem requisições. Quem serve o app chama
+    start_storage_outbox_worker (wsgi.py, ou init_worker_process em cada worker
+    depois do fork com PRELOAD_APP, e o servidor de desenvolvimento).
+    """
+    import click
+
+    @app.cli.command('drain-storage-outbox')
+    def drain_storage_outbox_command():
+        """Processa agora as exclusões pendentes no Storage."""
+        deleted, failed = drain_outbox(app)
+        click.echo(f"{deleted} imagem(ns) excluída(s), {failed} falha(s).")
+
+    if app.config['STORAGE_OUTBOX_WORKER']:
+        app.extensions['storage_outbox_worker'] = StorageOutboxWorker(app)
@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Maintenance, SyncTombstone, Vehicle
+from services.serializers import MAINTENANCE, VEHICLE, maintenance_dicts
+
+logger = logging.getLogger(__name__)
+
+
+class SyncError(ValueError):
+    pass
+
+
+def parse_watermark(value):
+    """Lê o 'since' enviado pelo cliente (a marca d'água devolvida pelo sync anterior)."""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise SyncError("Parâmetro since inválido")
+
+
+def format_watermark(value):
+    return value.isoformat(timespec='microseconds')
+
+
+def record_tombstone(user_id, entity, entity_id):
+    """Registra a exclusão de um veículo/manutenção para o sync incremental (sem commit)."""
+    db.session.add(SyncTombstone(user_id=user_id, entity=entity, entity_id=entity_id))
+
+
+def build_sync(user_id, since, lag_seconds, retention_days):
+    """
+    Alterações do usuário desde a marca d'água 'since' (None = sincronização completa).
+
+    Devolve os veículos e manutenções (com as imagens) criados ou alterados depois
+    de 'since', os ids excluídos nesse intervalo e a nova marca d'água. A marca
+    fica 'lag_seconds' atrás do relógio: o que mudou nesse intervalo volta no
+    próximo sync (o cliente aplica como upsert), mas uma transação que ainda não
+    tinha feito commit não fica de fora. Se 'since' for anterior à retenção dos
+    tombstones, as exclusões podem ter se perdido e a resposta é completa
+    ('full': o cliente substitui os dados locais).
+    """
+    now = datetime.utcnow()
+    watermark = now - timedelta(seconds=lag_seconds)
+    full = since is None or since < now - timedelta(days=retention_days)
+
+    vehicle_query = (select(*VEHICLE.columns(VEHICLE.names))
+                     .where(Vehicle.user_id == user_id)
+                     .order_by(Vehicle.id))
+    maintenance_query = (select(*MAINTENANCE.columns(MAINTENANCE.names))
+                         .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+                         .where(Vehicle.user_id == user_id)
+                         .order_by(Maintenance.id))
+    if not full:
+        vehicle_query = vehicle_query.where(Vehicle.updated_at > since)
+        maintenance_query = maintenance_query.where(Maintenance.updated_at > since)
+
+    vehicles = VEHICLE.rows_to_dicts(db.session.execute(vehicle_query).all(), VEHICLE.names)
+    maintenances = maintenance_dicts(db.session.execute(maintenance_query).all(), MAINTENANCE.names)
+
+    deleted = {'vehicles': [], 'maintenances': []}
+    if not full:
+        rows = db.session.execute(
+            select(SyncTombstone.entity, SyncTombstone.entity_id)
+            .where(SyncTombstone.user_id == user_id, SyncTombstone.deleted_at > since)
+            .order_by(SyncTombstone.id))
+        for entity, entity_id in rows:
+            key = 'vehicles' if entity == SyncTombstone.ENTITY_VEHICLE else 'maintenances'
+            deleted[key].append(entity_id)
+
+    return {
+        'full': full,
+        'watermark': format_watermark(watermark),
+        'vehicles': vehicles,
+        'maintenances': maintenances,
+        'deleted': deleted,
+    }
+
+
+def purge_tombstones(retention_days):
+    """Remove os tombstones fora da janela de retenção (com commit). Retorna quantos saíram."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    try:
+        removed = (SyncTombstone.query.filter(SyncTombstone.deleted_at < cutoff)
+                   .delete(synchronize_session=False))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info(f"Tombstones de sync removidos: {removed} (anteriores a {cutoff:%Y-%m-%d})")
+    return removed
+
+
+def init_sync(app):
+    """Registra o comando `flask purge-sync-tombstones`."""
+    import click
+
+    @app.cli.command('purge-sync-tombstones')
+    def purge_sync_tombstones_command():
+        """Remove os tombstones de exclusão mais antigos que SYNC_TOMBSTONE_RETENTION_DAYS."""
+        with app.app_context():
+            removed = purge_tombstones(app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+            click.echo(f"{removed} tombstone(s) removido(s).")
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+# TTL máximo usado quando FIREBASE_CHECK_REVOKED está ativo e TOKEN_CACHE_MAX_TTL não foi definido
+REVOCATION_CHECK_MAX_TTL = 300
+
+
+def token_cache_max_ttl(config):
+    """TTL máximo efetivo das entradas (None = até o 'exp' do token), a partir do app.config."""
+    max_ttl = config.get('TOKEN_CACHE_MAX_TTL')
+    if max_ttl is None:
+        max_ttl = REVOCATION_CHECK_MAX_TTL if config.get('FIREBASE_CHECK_REVOKED') else 0
+    return max_ttl or None
+
+
+class TokenCache:
+    """
+    Cache LRU em memória de ID tokens do Firebase já verificados.
+
+    A chave é o SHA-256 do token (o token em si nunca fica guardado) e cada
+    entrada expira no 'exp' do token ou, se configurado, após 'max_ttl'
+    segundos, o que vier primeiro.
+    """
+
+    def __init__(self, max_size=2048, max_ttl=None):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()  # chave -> (decoded_token, expira_em)
+        self._keys_by_uid = {}  # uid -> set(chaves), para invalidação por usuário
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, max_size=None, max_ttl=None):
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            self.max_ttl = max_ttl
+            while len(self._entries) > self.max_size:
+                self._evict_oldest()
+
+    @staticmethod
+    def _key(id_token):
+        return hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+
+    def get(self, id_token):
+        """Retorna o token decodificado se ainda estiver válido no cache, senão None."""
+        key = self._key(id_token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            decoded_token, expires_at = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded_token
+
+    def put(self, id_token, decoded_token):
+        expires_at = decoded_token.get('exp')
+        if not expires_at:
+            return
+        if self.max_ttl:
+            expires_at = min(expires_at, time.time() + self.max_ttl)
+        if expires_at <= time.time():
+            return
+
+        key = self._key(id_token)
+        uid = decoded_token.get('uid')
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (decoded_token, expires_at)
+            if uid:
+                self._keys_by_uid.setdefault(uid, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._evict_oldest()
+
+    def invalidate_token(self, id_token):
+        with self._lock:
+            if self._remove(self._key(id_token)):
+                self.invalidations += 1
+
+    def invalidate_uid(self, uid, issued_before=None):
+        """
+        Remove os tokens em cache de um usuário. Se 'issued_before' (epoch em
+        segundos) for informado, remove apenas os emitidos antes desse instante,
+        como faz a verificação de revogação do Firebase (tokens_valid_after).
+        """
+        with self._lock:
+            for key in list(self._keys_by_uid.get(uid, ())):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if issued_before is not None and entry[0].get('iat', 0) >= issued_before:
+                    continue
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_uid.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    # Os métodos abaixo assumem que self._lock já está adquirido
+    def _evict_oldest(self):
+        key, entry = self._entries.popitem(last=False)
+        self._forget_uid_key(entry[0].get('uid'), key)
+        self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._forget_uid_key(entry[0].get('uid'), key)
+        return True
+
+    def _forget_uid_key(self, uid, key):
+        keys = self._keys_by_uid.get(uid)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_uid[uid]
+
+
+# Instância única compartilhada pelo processo (configurada em create_app)
+token_cache = TokenCache()
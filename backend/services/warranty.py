@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import literal, select, union_all
+
+from extensions import db
+from models import Maintenance, Vehicle
+
+# Formato usado pelo app (DateFormat('dd/MM/yyyy')); é o formato devolvido pela API
+WARRANTY_DATE_FORMAT = '%d/%m/%Y'
+# Formatos aceitos na entrada (o app envia dd/MM/yyyy; os demais aparecem em dados antigos)
+ACCEPTED_DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y')
+
+WARRANTY_FIELDS = ('labor_warranty_date', 'parts_warranty_date')
+
+
+def parse_warranty_date(value):
+    """Converte a data de garantia recebida (string) em date. Vazio vira None; inválida levanta ValueError."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    for date_format in ACCEPTED_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data de garantia inválida: '{value}' (use DD/MM/AAAA)")
+
+
+def format_warranty_date(value):
+    return value.strftime(WARRANTY_DATE_FORMAT) if value else None
+
+
+def expiring_warranties(user_id, days):
+    """
+    Garantias de mão de obra e de peças que vencem entre hoje e hoje + days, em
+    todos os veículos do usuário. Uma única query (UNION ALL de duas varreduras
+    por faixa nos índices de labor_warranty_date e parts_warranty_date).
+    """
+    today = datetime.utcnow().date()
+    until = today + timedelta(days=days)
+
+    def branch(kind, column):
+        return (select(Maintenance.id.label('maintenance_id'), Maintenance.vehicle_id,
+                       Vehicle.license_plate, Maintenance.service_type, Maintenance.workshop,
+                       literal(kind).label('kind'), column.label('expires_on'))
+                .join(Vehicle, Vehicle.id == Maintenance.vehicle_id)
+                .where(column >= today, column <= until, Vehicle.user_id == user_id))
+
+    query = union_all(branch('labor', Maintenance.labor_warranty_date),
+                      branch('parts', Maintenance.parts_warranty_date))
+    query = select(query.subquery()).order_by('expires_on', 'maintenance_id', 'kind')
+
+    warranties = []
+    for row in db.session.execute(query):
+        expires_on = row.expires_on
+        warranties.append({
+            'maintenance_id': row.maintenance_id,
+            'vehicle_id': row.vehicle_id,
+            'license_plate': row.license_plate,
+            'service_type': row.service_type,
+            'workshop': row.workshop,
+            'kind': row.kind,
+            'expires_on': format_warranty_date(expires_on),
+            'days_left': (expires_on - today).days,
+        })
+    return warranties
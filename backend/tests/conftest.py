@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import firebase_admin
+import pytest
+from firebase_admin import auth, credentials
+
+# Os módulos do backend são importados pelo nome (app, models, services...), como no servidor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import TEST_TOKEN_PREFIX, auth_headers  # noqa: E402
+
+
+class _TestCredential(credentials.Base):
+    """Credencial vazia: o app padrão do SDK existe, mas nunca fala com o Google."""
+
+    def get_credential(self):
+        return None
+
+
+class _TestFirebaseUser:
+    def __init__(self, uid):
+        self.uid = uid
+        self.email = f'{uid}@test.local'
+        self.display_name = uid
+
+
+@pytest.fixture(scope='session', autouse=True)
+def firebase_stub():
+    """
+    Substitui as chamadas ao Firebase Auth usadas pelo backend. O token
+    "test:<uid>" é aceito como válido para o uid; qualquer outro é inválido.
+    """
+    def verify_id_token(id_token, check_revoked=False, app=None):
+        if not id_token.startswith(TEST_TOKEN_PREFIX):
+            raise auth.InvalidIdTokenError('Token fora do formato dos testes', None)
+        now = int(time.time())
+        uid = id_token[len(TEST_TOKEN_PREFIX):]
+        return {'uid': uid, 'email': f'{uid}@test.local', 'name': uid, 'iat': now, 'exp': now + 3600}
+
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        firebase_admin.initialize_app(_TestCredential(), {'projectId': 'garagem-test'})
+
+    originals = (auth.verify_id_token, auth.get_user, auth.revoke_refresh_tokens)
+    auth.verify_id_token = verify_id_token
+    auth.get_user = lambda uid, app=None: _TestFirebaseUser(uid)
+    auth.revoke_refresh_tokens = lambda uid, app=None: None
+    yield
+    auth.verify_id_token, auth.get_user, auth.revoke_refresh_tokens = originals
+
+
+@pytest.fixture
+def app_config():
+    """Configurações extras do app; um módulo de testes pode sobrescrever este fixture."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    """App com banco SQLite e Storage local temporários, sem threads em segundo plano."""
+    from app import create_app
+    from services.token_cache import token_cache
+    from services.user_cache import user_cache
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'garagem.db'}",
+        'DB_CREATE_ALL': True,
+        'STORAGE_BACKEND': 'local',
+        'LOCAL_STORAGE_DIR': str(tmp_path / 'storage'),
+        'RATE_LIMIT_BACKEND': 'none',
+        **app_config,
+    })
+    yield app
+
+    from extensions import db
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    token_cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(client):
+    """Usuário local já sincronizado; devolve os headers de autenticação dele."""
+    headers = auth_headers('user-1')
+    response = client.post('/api/auth/sync_user', headers=headers, json={})
+    assert response.status_code == 201, response.get_json()
+    return headers
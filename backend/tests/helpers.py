@@ -0,0 +1,24 @@
+"""Funções auxiliares dos testes (criação de dados pela própria API)."""
+
+TEST_TOKEN_PREFIX = 'test:'
+
+
+def auth_headers(uid):
+    return {'Authorization': f'Bearer {TEST_TOKEN_PREFIX}{uid}'}
+
+
+def create_vehicle(client, headers, plate='ABC1D23'):
+    response = client.post('/api/vehicles/', headers=headers, json={
+        'type': 'carro', 'brand': 'Fiat', 'model': 'Uno', 'year': 2015, 'license_plate': plate,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['vehicle']['id']
+
+
+def create_maintenance(client, headers, vehicle_id, images=(), service_date='2024-05-10 10:00:00'):
+    response = client.post('/api/maintenances/add', headers=headers, json={
+        'vehicle_id': vehicle_id, 'service_type': 'Troca de óleo', 'workshop': 'Oficina',
+        'labor_cost': 100.0, 'parts_cost': 50.0, 'service_date': service_date, 'images': list(images),
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['maintenance']['id']
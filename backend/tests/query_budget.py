@@ -0,0 +1,60 @@
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """
+    Conta os comandos SQL executados pela thread atual enquanto estiver ativo.
+
+    Uso:
+        with QueryCounter() as counter:
+            client.get('/api/vehicles/', headers=headers)
+        print(counter.count, counter.statements)
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or Engine  # Por padrão escuta todas as engines
+        self.statements = []
+        self._thread_id = None
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+
+@contextmanager
+def query_budget(max_queries, engine=None):
+    """
+    Falha (QueryBudgetExceeded) se o bloco executar mais de 'max_queries'
+    comandos SQL. Serve para travar regressões de N+1 nos endpoints:
+
+        with query_budget(4):
+            response = client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=headers)
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > max_queries:
+        listing = '\n'.join(f'  {i + 1}. {statement}' for i, statement in enumerate(counter.statements))
+        raise QueryBudgetExceeded(
+            f'Orçamento de queries excedido: {counter.count} executadas, máximo {max_queries}\n{listing}'
+        )
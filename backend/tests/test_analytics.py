@@ -0,0 +1,127 @@
+import pytest
+
+from tests.helpers import auth_headers, create_maintenance, create_vehicle
+
+
+def _add(client, headers, vehicle_id, service_type, labor, parts, service_date):
+    response = client.post('/api/maintenances/add', headers=headers, json={
+        'vehicle_id': vehicle_id, 'service_type': service_type, 'workshop': 'Oficina',
+        'labor_cost': labor, 'parts_cost': parts, 'service_date': service_date,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['maintenance']['id']
+
+
+def _costs(client, headers, **params):
+    response = client.get('/api/analytics/costs', headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _summary_rows(app):
+    from models import MaintenanceCostSummary
+
+    with app.app_context():
+        rows = MaintenanceCostSummary.query.all()
+        return sorted((row.vehicle_id, row.month, row.service_type, row.maintenance_count,
+                       round(row.labor_total, 2), round(row.parts_total, 2)) for row in rows)
+
+
+@pytest.fixture
+def vehicles(client, user):
+    return create_vehicle(client, user, plate='AAA1A11'), create_vehicle(client, user, plate='BBB2B22')
+
+
+def test_costs_follow_add_update_and_delete(app, client, user, vehicles):
+    car, bike = vehicles
+    oil = _add(client, user, car, 'Troca de óleo', 100.0, 50.0, '2024-05-10 10:00:00')
+    _add(client, user, car, 'Troca de óleo', 80.0, 20.0, '2024-05-20 10:00:00')
+    brakes = _add(client, user, bike, 'Freios', 200.0, 0.0, '2024-06-01 10:00:00')
+
+    costs = _costs(client, user)
+    assert costs['totals'] == {'count': 3, 'labor_total': 380.0, 'parts_total': 70.0,
+                               'total': 450.0, 'average': 150.0}
+    assert [(row['month'], row['count'], row['total']) for row in costs['by_month']] == [
+        ('2024-05', 2, 250.0), ('2024-06', 1, 200.0)]
+    assert [(row['vehicle_id'], row['total']) for row in costs['by_vehicle']] == [(car, 250.0), (bike, 200.0)]
+
+    # Mudar mês, tipo e valores move a manutenção de balde
+    response = client.put(f'/api/maintenances/{oil}', headers=user, json={
+        'service_type': 'Revisão', 'labor_cost': 300.0, 'service_date': '2024-06-15 10:00:00'})
+    assert response.status_code == 200
+    costs = _costs(client, user)
+    assert [(row['month'], row['count'], row['total']) for row in costs['by_month']] == [
+        ('2024-05', 1, 100.0), ('2024-06', 2, 550.0)]
+    assert [(row['service_type'], row['count']) for row in costs['by_service_type']] == [
+        ('Freios', 1), ('Revisão', 1), ('Troca de óleo', 1)]
+
+    # O balde que fica vazio some; os demais não são tocados
+    assert client.delete(f'/api/maintenances/{brakes}', headers=user).status_code == 200
+    costs = _costs(client, user)
+    assert [row['vehicle_id'] for row in costs['by_vehicle']] == [car]
+    assert costs['totals']['total'] == 450.0
+    assert all(row[3] > 0 for row in _summary_rows(app))
+
+
+def test_costs_filters(client, user, vehicles):
+    car, bike = vehicles
+    _add(client, user, car, 'Troca de óleo', 100.0, 0.0, '2024-04-10 10:00:00')
+    _add(client, user, car, 'Troca de óleo', 100.0, 0.0, '2024-05-10 10:00:00')
+    _add(client, user, bike, 'Freios', 50.0, 0.0, '2024-05-10 10:00:00')
+
+    costs = _costs(client, user, vehicle_id=car, **{'from': '2024-05', 'to': '2024-05'})
+    assert costs['totals']['count'] == 1
+    assert costs['totals']['total'] == 100.0
+
+    response = client.get('/api/analytics/costs', headers=user, query_string={'from': '2024-13'})
+    assert response.status_code == 400
+
+
+def test_emptied_bucket_removal_is_scoped_to_its_key(app, client, user, vehicles):
+    from extensions import db
+    from models import MaintenanceCostSummary
+    from services.cost_summary import apply_cost_deltas
+
+    car, bike = vehicles
+    _add(client, user, car, 'Troca de óleo', 100.0, 0.0, '2024-05-10 10:00:00')
+    _add(client, user, bike, 'Freios', 50.0, 0.0, '2024-05-10 10:00:00')
+    with app.app_context():
+        # Balde inconsistente de outro veículo: só o rebuild pode corrigi-lo
+        bucket = MaintenanceCostSummary.query.filter_by(vehicle_id=bike).one()
+        bucket.maintenance_count = 0
+        db.session.commit()
+
+        apply_cost_deltas({(car, '2024-05', 'Troca de óleo'): [-1, -100.0, 0.0]})
+        db.session.commit()
+
+    assert [row[:4] for row in _summary_rows(app)] == [(bike, '2024-05', 'Freios', 0)]
+
+
+def test_rebuild_matches_incremental_summary(app, client, user, vehicles):
+    from services.cost_summary import rebuild_cost_summary
+
+    car, bike = vehicles
+    first = _add(client, user, car, 'Troca de óleo', 100.0, 50.5, '2024-05-10 10:00:00')
+    _add(client, user, car, 'Revisão', 0.0, 30.25, '2024-05-11 10:00:00')
+    last = _add(client, user, bike, 'Freios', 200.0, None, '2024-07-01 10:00:00')
+    create_maintenance(client, user, bike, service_date='2024-07-02 10:00:00')
+    client.put(f'/api/maintenances/{first}', headers=user, json={'service_date': '2024-08-01 10:00:00'})
+    client.delete(f'/api/maintenances/{last}', headers=user)
+
+    incremental_rows = _summary_rows(app)
+    incremental_costs = _costs(client, user)
+    with app.app_context():
+        assert rebuild_cost_summary() == len(incremental_rows)
+
+    assert _summary_rows(app) == incremental_rows
+    assert _costs(client, user) == incremental_costs
+
+
+def test_costs_are_scoped_to_the_user(client, user, vehicles):
+    _add(client, user, vehicles[0], 'Troca de óleo', 100.0, 0.0, '2024-05-10 10:00:00')
+    other = auth_headers('user-2')
+    assert client.post('/api/auth/sync_user', headers=other, json={}).status_code == 201
+
+    costs = _costs(client, other)
+    assert costs['totals']['count'] == 0
+    assert costs['by_vehicle'] == []
@@ -0,0 +1,63 @@
+from routes import auth_routes
+
+
+def test_missing_and_invalid_tokens_are_rejected(client):
+    assert client.get('/api/vehicles/').status_code == 401
+    response = client.get('/api/vehicles/', headers={'Authorization': 'Bearer invalido'})
+    assert response.status_code == 401
+    assert response.get_json() == {'message': 'Token inválido'}
+
+
+def test_user_lookup_failure_is_logged(client, user, monkeypatch, caplog):
+    def fail(firebase_uid):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(auth_routes, 'resolve_local_user', fail)
+    response = client.get('/api/vehicles/', headers=user)
+
+    assert response.status_code == 500
+    assert response.get_json() == {'message': 'Erro interno ao carregar o usuário'}
+    record = next(r for r in caplog.records if r.name == 'routes.auth_routes')
+    assert 'user-1' in record.getMessage()
+    assert record.exc_info is not None
+
+
+
+def test_revoke_revokes_firebase_tokens_and_drops_cache(client, user, monkeypatch):
+    from services.token_cache import token_cache
+
+    token = user['Authorization'].split(' ', 1)[1]
+    revoked = []
+    monkeypatch.setattr(auth_routes.auth, 'revoke_refresh_tokens', lambda uid, app=None: revoked.append(uid))
+    assert token_cache.get(token) is not None
+
+    response = client.post('/api/auth/revoke', headers=user)
+
+    assert response.status_code == 200
+    assert revoked == ['user-1']
+    assert token_cache.get(token) is None
+
+
+def test_resolve_local_user_uses_cached_id_and_recovers_from_stale_entry(app, client, user):
+    from extensions import db
+    from models import User
+    from services.user_cache import user_cache
+    from tests.query_budget import QueryCounter
+
+    client.get('/api/vehicles/', headers=user)  # Primeira requisição: busca por firebase_uid e guarda o id
+    with app.app_context():
+        user_id = User.query.filter_by(firebase_uid='user-1').one().id
+        assert user_cache.get('user-1') == user_id
+
+        # Com o id em cache, a busca é pela chave primária (ainda um SELECT)
+        with QueryCounter() as counter:
+            assert auth_routes.resolve_local_user('user-1').id == user_id
+        assert counter.count == 1 and 'WHERE user.id = ?' in counter.statements[0]
+
+        # Entrada que aponta para outro usuário: descartada e refeita pelo firebase_uid
+        other = User(firebase_uid='user-2', username='u2', email='u2@test.local')
+        db.session.add(other)
+        db.session.commit()
+        user_cache.put('user-1', other.id)
+        assert auth_routes.resolve_local_user('user-1').id == user_id
+        assert user_cache.get('user-1') == user_id
@@ -0,0 +1,108 @@
+import io
+
+import pytest
+
+from tests.helpers import create_maintenance, create_vehicle
+
+
+@pytest.fixture(params=['none', 'memory'])
+def app_config(request):
+    # Mesmo comportamento com e sem o cache de respostas na frente das rotas
+    return {'RESPONSE_CACHE_BACKEND': request.param}
+
+
+def _etag(client, headers, path):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    return response.headers['ETag']
+
+
+def _revalidate(client, headers, path, etag):
+    return client.get(path, headers={**headers, 'If-None-Match': etag})
+
+
+@pytest.fixture
+def resources(client, user):
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = create_maintenance(client, user, vehicle_id)
+    return vehicle_id, maintenance_id
+
+
+def _paths(vehicle_id, maintenance_id):
+    return ['/api/vehicles/', f'/api/vehicles/{vehicle_id}',
+            f'/api/maintenances/vehicle/{vehicle_id}', f'/api/maintenances/{maintenance_id}']
+
+
+def test_unchanged_reads_revalidate_with_304(client, user, resources):
+    for path in _paths(*resources):
+        etag = _etag(client, user, path)
+        assert etag.startswith('W/')
+
+        response = _revalidate(client, user, path, etag)
+        assert response.status_code == 304, path
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+        assert _revalidate(client, user, path, 'W/"outra-versao"').status_code == 200
+
+
+def test_query_string_is_part_of_the_etag(client, user, resources):
+    vehicle_id, _ = resources
+    path = f'/api/maintenances/vehicle/{vehicle_id}'
+    full, page = _etag(client, user, path), _etag(client, user, path + '?limit=1')
+
+    assert full != page
+    assert _revalidate(client, user, path + '?limit=1', full).status_code == 200
+
+
+def _assert_changed(client, user, etags):
+    for path, etag in etags.items():
+        response = _revalidate(client, user, path, etag)
+        assert response.status_code == 200, path
+        assert response.headers['ETag'] != etag
+
+
+def test_maintenance_writes_change_the_etags(client, user, resources):
+    vehicle_id, maintenance_id = resources
+    paths = [f'/api/maintenances/vehicle/{vehicle_id}', f'/api/maintenances/{maintenance_id}', '/api/vehicles/']
+
+    etags = {path: _etag(client, user, path) for path in paths}
+    create_maintenance(client, user, vehicle_id)
+    _assert_changed(client, user, etags)
+
+    etags = {path: _etag(client, user, path) for path in paths}
+    assert client.put(f'/api/maintenances/{maintenance_id}', headers=user, json={'mechanic': 'Ana'}).status_code == 200
+    _assert_changed(client, user, etags)
+
+    other_id = create_maintenance(client, user, vehicle_id)
+    etags = {path: _etag(client, user, path) for path in paths}
+    assert client.delete(f'/api/maintenances/{other_id}', headers=user).status_code == 200
+    _assert_changed(client, user, etags)
+
+
+def test_image_upload_changes_the_etags(client, user, resources):
+    image = pytest.importorskip('PIL.Image')
+    vehicle_id, maintenance_id = resources
+    paths = [f'/api/maintenances/vehicle/{vehicle_id}', f'/api/maintenances/{maintenance_id}']
+    etags = {path: _etag(client, user, path) for path in paths}
+
+    jpeg = io.BytesIO()
+    image.new('RGB', (32, 32), (10, 120, 10)).save(jpeg, format='JPEG')
+    response = client.post(f'/api/maintenances/{maintenance_id}/images', headers=user,
+                           data={'images': [(io.BytesIO(jpeg.getvalue()), 'foto.jpg')]},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+
+    _assert_changed(client, user, etags)
+
+
+def test_writes_to_one_vehicle_keep_the_other_vehicle_etag(client, user, resources):
+    vehicle_id, _ = resources
+    other_vehicle_id = create_vehicle(client, user, plate='OUT1R00')
+    path = f'/api/maintenances/vehicle/{other_vehicle_id}'
+    etag = _etag(client, user, path)
+
+    create_maintenance(client, user, vehicle_id)
+
+    assert _revalidate(client, user, path, etag).status_code == 304
@@ -0,0 +1,99 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from services.maintenance_export import EXPORT_COLUMNS
+from tests.helpers import auth_headers, create_maintenance, create_vehicle
+
+
+@pytest.fixture
+def app_config():
+    # Blocos pequenos: o export passa por vários blocos (e várias queries de imagens)
+    return {'EXPORT_CHUNK_SIZE': 2}
+
+
+@pytest.fixture
+def history(client, user):
+    car = create_vehicle(client, user, plate='AAA1A11')
+    bike = create_vehicle(client, user, plate='BBB2B22')
+    ids = [create_maintenance(client, user, car, service_date=f'2024-0{n + 1}-10 10:00:00',
+                              images=[f'https://storage.test/o/{n}-{i}.jpg' for i in range(n % 3)])
+           for n in range(4)]
+    ids.append(create_maintenance(client, user, bike, images=['https://storage.test/o/moto.jpg']))
+    response = client.put(f'/api/maintenances/{ids[0]}', headers=user, json={'labor_warranty_date': '15/08/2025'})
+    assert response.status_code == 200
+
+    other = auth_headers('user-2')
+    assert client.post('/api/auth/sync_user', headers=other, json={}).status_code == 201
+    create_maintenance(client, other, create_vehicle(client, other, plate='OUT1R00'))
+    return ids
+
+
+def _export(client, headers, **params):
+    response = client.get('/api/maintenances/export', headers=headers, query_string=params)
+    assert response.status_code == 200, response.data
+    assert response.is_streamed
+    assert response.headers['Cache-Control'] == 'no-store'
+    return response
+
+
+def test_csv_export(client, user, history):
+    response = _export(client, user)
+
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="manutencoes.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert [int(row['id']) for row in rows] == history
+    assert rows[0]['labor_warranty_date'] == '15/08/2025'
+    assert rows[0]['images'] == ''
+    assert rows[2]['images'] == 'https://storage.test/o/2-0.jpg|https://storage.test/o/2-1.jpg'
+    assert rows[4]['license_plate'] == 'BBB2B22'
+    assert rows[4]['images'] == 'https://storage.test/o/moto.jpg'
+
+
+def test_ndjson_export(client, user, history):
+    response = _export(client, user, format='ndjson')
+
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    items = [json.loads(line) for line in lines]
+    assert [item['id'] for item in items] == history
+    assert list(items[0]) == EXPORT_COLUMNS
+    assert items[1]['images'] == ['https://storage.test/o/1-0.jpg']
+    assert items[0]['labor_cost'] == 100.0
+    assert items[0]['service_date'] == '2024-01-10 10:00:00'
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'ndjson'])
+def test_gzip_export_matches_the_plain_file(client, user, history, export_format):
+    plain = _export(client, user, format=export_format).get_data()
+    response = _export(client, user, format=export_format, gzip='1')
+
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith(f'.{export_format}.gz"')
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_exported_csv_can_be_imported_back(client, user, history):
+    exported = _export(client, user).get_data(as_text=True)
+
+    response = client.post('/api/maintenances/import', headers=user, data=exported, content_type='text/csv')
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['imported'] == len(history)
+    assert response.get_json()['errors'] == []
+
+
+def test_empty_history_exports_only_the_header(client, user):
+    rows = _export(client, user).get_data(as_text=True).splitlines()
+    assert rows == [','.join(EXPORT_COLUMNS)]
+    assert _export(client, user, format='ndjson').get_data() == b''
+
+
+def test_unknown_format_is_rejected(client, user):
+    response = client.get('/api/maintenances/export?format=xlsx', headers=user)
+    assert response.status_code == 400
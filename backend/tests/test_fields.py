@@ -0,0 +1,90 @@
+import pytest
+
+from services.serializers import MAINTENANCE, VEHICLE, FieldsError
+from tests.helpers import create_maintenance, create_vehicle
+from tests.query_budget import QueryCounter
+
+
+@pytest.fixture
+def app_config():
+    # Cada leitura vai ao banco (a projeção é conferida pelas queries)
+    return {'RESPONSE_CACHE_BACKEND': 'none'}
+
+
+@pytest.fixture
+def resources(client, user):
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=['https://storage.test/o/a.jpg'])
+    return vehicle_id, maintenance_id
+
+
+def _get(client, headers, path, **params):
+    response = client.get(path, headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_without_fields_every_field_is_returned(client, user, resources):
+    vehicle_id, maintenance_id = resources
+
+    assert set(_get(client, user, '/api/vehicles/')['vehicles'][0]) == set(VEHICLE.names)
+    assert set(_get(client, user, f'/api/vehicles/{vehicle_id}')) == set(VEHICLE.names)
+    assert set(_get(client, user, f'/api/maintenances/vehicle/{vehicle_id}')['maintenances'][0]) == set(MAINTENANCE.names)
+    maintenance = _get(client, user, f'/api/maintenances/{maintenance_id}')['maintenance']
+    assert set(maintenance) == set(MAINTENANCE.names)
+    assert maintenance['images'] == ['https://storage.test/o/a.jpg']
+    assert maintenance['service_date'] == '2024-05-10 10:00:00'
+
+
+def test_fields_projects_the_response(client, user, resources):
+    vehicle_id, maintenance_id = resources
+
+    assert _get(client, user, '/api/vehicles/', fields='license_plate')['vehicles'] == [
+        {'id': vehicle_id, 'license_plate': 'ABC1D23'}]
+    assert _get(client, user, f'/api/vehicles/{vehicle_id}', fields='brand, model') == {
+        'id': vehicle_id, 'brand': 'Fiat', 'model': 'Uno'}
+    assert _get(client, user, f'/api/maintenances/vehicle/{vehicle_id}', fields='service_date,labor_cost')[
+        'maintenances'] == [{'id': maintenance_id, 'service_date': '2024-05-10 10:00:00', 'labor_cost': 100.0}]
+    assert _get(client, user, f'/api/maintenances/{maintenance_id}', fields='thumbnails')['maintenance'] == {
+        'id': maintenance_id, 'thumbnails': ['https://storage.test/o/a.jpg']}
+
+
+def test_projection_selects_only_the_requested_columns(client, user, resources):
+    vehicle_id, _ = resources
+    client.get('/api/vehicles/', headers=user)  # Usuário já em cache: só as queries da rota contam
+
+    with QueryCounter() as counter:
+        _get(client, user, f'/api/maintenances/vehicle/{vehicle_id}', fields='workshop')
+    statements = [statement for statement in counter.statements if 'FROM maintenance' in statement]
+
+    assert len(statements) == 1
+    assert 'maintenance.workshop' in statements[0]
+    assert 'maintenance.parts_store' not in statements[0]
+    # Sem images/thumbnails: nenhuma query em maintenance_image
+    assert not any('maintenance_image' in statement for statement in counter.statements)
+
+
+@pytest.mark.parametrize('path', ['/api/vehicles/', '/api/vehicles/{vehicle_id}',
+                                  '/api/maintenances/vehicle/{vehicle_id}', '/api/maintenances/{maintenance_id}'])
+def test_unknown_fields_are_rejected(client, user, resources, path):
+    vehicle_id, maintenance_id = resources
+    response = client.get(path.format(vehicle_id=vehicle_id, maintenance_id=maintenance_id), headers=user,
+                          query_string={'fields': 'id,senha,license_plate' if 'vehicles' in path else 'id,senha'})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Campo(s) desconhecido(s) em fields: senha'}
+
+
+@pytest.mark.parametrize('raw, expected', [
+    (None, VEHICLE.names),
+    ('', VEHICLE.names),
+    ('color', ('id', 'color')),
+    ('color,,id , year', ('id', 'year', 'color')),
+])
+def test_parse_fields(raw, expected):
+    assert VEHICLE.parse_fields({'fields': raw} if raw is not None else {}) == expected
+
+
+def test_parse_fields_reports_every_unknown_name():
+    with pytest.raises(FieldsError, match='foo, bar'):
+        MAINTENANCE.parse_fields({'fields': 'foo,workshop,bar'})
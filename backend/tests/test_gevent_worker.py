@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('gevent')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Roda num processo separado: o monkey patching do gevent precisa vir antes de
+# qualquer import e não pode vazar para o processo do pytest. O servidor é o
+# gevent.pywsgi, o mesmo do worker gevent do gunicorn.
+WORKER_SCRIPT = r'''
+from gevent import monkey
+monkey.patch_all()
+
+import json
+import sys
+import time
+
+import firebase_admin
+import gevent
+from firebase_admin import auth, credentials
+from gevent.pywsgi import WSGIServer
+from http.client import HTTPConnection
+
+sys.path.insert(0, sys.argv[1])
+database_path, requests_count, delay = sys.argv[2], int(sys.argv[3]), float(sys.argv[4])
+
+
+class TestCredential(credentials.Base):
+    def get_credential(self):
+        return None
+
+
+firebase_admin.initialize_app(TestCredential(), {'projectId': 'garagem-test'})
+state = {'in_flight': 0, 'max_in_flight': 0}
+
+
+def verify_id_token(id_token, check_revoked=False, app=None):
+    # Latência da chamada ao Firebase: time.sleep patcheado cede aos outros greenlets
+    state['in_flight'] += 1
+    state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+    try:
+        time.sleep(delay)
+    finally:
+        state['in_flight'] -= 1
+    uid = id_token.split(':', 1)[1]
+    now = int(time.time())
+    return {'uid': uid, 'email': f'{uid}@test.local', 'name': uid, 'iat': now, 'exp': now + 3600}
+
+
+auth.verify_id_token = verify_id_token
+
+from app import create_app
+from extensions import db
+from services.admission import admission
+
+app = create_app({
+    'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+    'DB_CREATE_ALL': True,
+    'STORAGE_BACKEND': 'local',
+    'RATE_LIMIT_BACKEND': 'none',
+})
+server = WSGIServer(('127.0.0.1', 0), app, log=None)
+server.start()
+
+
+def request(method, path, uid, body):
+    connection = HTTPConnection('127.0.0.1', server.server_port, timeout=60)
+    connection.request(method, path, body=json.dumps(body),
+                       headers={'Authorization': f'Bearer test:{uid}', 'Content-Type': 'application/json'})
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+def run_all(method, path, body_for):
+    start = time.perf_counter()
+    jobs = [gevent.spawn(request, method, path, f'user-{n}', body_for(n)) for n in range(requests_count)]
+    gevent.joinall(jobs)
+    return [job.value for job in jobs], time.perf_counter() - start
+
+
+# Cada requisição espera o Firebase e depois escreve no banco (cria o usuário / o veículo)
+sync_statuses, sync_elapsed = run_all('POST', '/api/auth/sync_user', lambda n: {})
+vehicle_statuses, _ = run_all('POST', '/api/vehicles/', lambda n: {
+    'type': 'carro', 'brand': 'Fiat', 'model': 'Uno', 'year': 2015, 'license_plate': f'GEV{n:04d}'})
+server.stop()
+
+with app.app_context():
+    pool_size = db.engine.pool.size()
+print(json.dumps({
+    'sync_statuses': sync_statuses,
+    'vehicle_statuses': vehicle_statuses,
+    'sync_elapsed': sync_elapsed,
+    'max_in_flight': state['max_in_flight'],
+    'max_concurrent': admission.limiter.max_concurrent,
+    'pool_size': pool_size,
+}))
+'''
+
+
+def test_gevent_worker_keeps_firebase_bound_requests_in_flight(tmp_path):
+    requests_count, delay = 150, 0.3
+    env = {name: value for name, value in os.environ.items()
+           if name not in ('MAX_CONCURRENT_REQUESTS', 'GUNICORN_WORKER_CONNECTIONS', 'DB_POOL_SIZE')}
+    result = subprocess.run(
+        [sys.executable, '-c', WORKER_SCRIPT, BACKEND_DIR, str(tmp_path / 'garagem.db'), str(requests_count), str(delay)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report['sync_statuses'] == [201] * requests_count
+    assert report['vehicle_statuses'] == [201] * requests_count
+    # Todas esperando o Firebase ao mesmo tempo, acima do antigo teto de 64
+    assert report['max_in_flight'] == requests_count
+    assert report['sync_elapsed'] < requests_count * delay / 10
+    assert report['max_concurrent'] == 1000
+    assert report['pool_size'] > 1
@@ -0,0 +1,103 @@
+import pytest
+
+from tests.helpers import create_maintenance, create_vehicle
+
+IMAGE = 'https://storage.test/o/services%2F1%2F{}.jpg?alt=media'
+THUMB = 'https://storage.test/o/services%2F1%2Fthumbs%2F{}.jpg?alt=media'
+
+
+@pytest.fixture
+def vehicle_id(client, user):
+    return create_vehicle(client, user)
+
+
+def _images(app, maintenance_id):
+    from models import MaintenanceImage
+
+    with app.app_context():
+        return [(image.id, image.image_url) for image in
+                MaintenanceImage.query.filter_by(maintenance_id=maintenance_id).order_by(MaintenanceImage.id)]
+
+
+def _outbox(app):
+    from models import StorageDeletion
+
+    with app.app_context():
+        return sorted(row.image_url for row in StorageDeletion.query.all())
+
+
+def _set_thumbnail(app, url, thumbnail_url):
+    from extensions import db
+    from models import MaintenanceImage
+
+    with app.app_context():
+        MaintenanceImage.query.filter_by(image_url=url).update({MaintenanceImage.thumbnail_url: thumbnail_url})
+        db.session.commit()
+
+
+def _update_images(client, headers, maintenance_id, urls):
+    response = client.put(f'/api/maintenances/{maintenance_id}', headers=headers, json={'images': urls})
+    assert response.status_code == 200, response.get_json()
+
+
+def test_unchanged_images_keep_their_rows(app, client, user, vehicle_id):
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=[IMAGE.format('a'), IMAGE.format('b')])
+    before = _images(app, maintenance_id)
+
+    _update_images(client, user, maintenance_id, [IMAGE.format('a'), IMAGE.format('b')])
+
+    assert _images(app, maintenance_id) == before
+    assert _outbox(app) == []
+
+
+def test_removed_images_and_their_thumbnails_go_to_the_outbox(app, client, user, vehicle_id):
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=[IMAGE.format('a'), IMAGE.format('b')])
+    _set_thumbnail(app, IMAGE.format('b'), THUMB.format('b'))
+    kept_row = _images(app, maintenance_id)[0]
+
+    _update_images(client, user, maintenance_id, [IMAGE.format('a'), IMAGE.format('c')])
+
+    images = _images(app, maintenance_id)
+    assert images[0] == kept_row  # Linha da imagem mantida não é recriada
+    assert [url for _, url in images] == [IMAGE.format('a'), IMAGE.format('c')]
+    assert _outbox(app) == sorted([IMAGE.format('b'), THUMB.format('b')])
+
+
+def test_urls_shared_with_another_maintenance_stay_in_storage(app, client, user, vehicle_id):
+    shared, own = IMAGE.format('shared'), IMAGE.format('own')
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=[shared, own])
+    other_id = create_maintenance(client, user, vehicle_id, images=[shared])
+    _set_thumbnail(app, shared, THUMB.format('shared'))
+
+    _update_images(client, user, maintenance_id, [])
+
+    assert _images(app, maintenance_id) == []
+    assert [url for _, url in _images(app, other_id)] == [shared]
+    assert _outbox(app) == [own]
+
+
+def test_duplicate_rows_are_collapsed_without_deleting_the_file(app, client, user, vehicle_id):
+    from extensions import db
+    from models import MaintenanceImage
+
+    url = IMAGE.format('a')
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=[url])
+    with app.app_context():
+        db.session.add(MaintenanceImage(maintenance_id=maintenance_id, image_url=url))
+        db.session.commit()
+
+    _update_images(client, user, maintenance_id, [url, url])
+
+    assert [image_url for _, image_url in _images(app, maintenance_id)] == [url]
+    assert _outbox(app) == []
+
+
+def test_updates_without_images_leave_them_alone(app, client, user, vehicle_id):
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=[IMAGE.format('a')])
+    before = _images(app, maintenance_id)
+
+    response = client.put(f'/api/maintenances/{maintenance_id}', headers=user, json={'mechanic': 'Ana'})
+
+    assert response.status_code == 200
+    assert _images(app, maintenance_id) == before
+    assert _outbox(app) == []
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from extensions import db
+from models import MaintenanceImage, StorageDeletion
+from services.storage import LocalStorageBackend
+from tests.helpers import create_maintenance, create_vehicle
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+class ThumbnailFailingBackend(LocalStorageBackend):
+    """Backend local que recusa as miniaturas: as imagens originais chegam a ser gravadas."""
+
+    def upload(self, path, data, content_type):
+        if '/thumbs/' in path:
+            raise ConnectionError('Storage indisponível')
+        return super().upload(path, data, content_type)
+
+
+def _jpeg(size=(64, 48)):
+    output = io.BytesIO()
+    PIL.new('RGB', size, (200, 30, 30)).save(output, format='JPEG')
+    return output.getvalue()
+
+
+def _upload(client, headers, maintenance_id, count=2):
+    files = [(io.BytesIO(_jpeg()), f'foto{i}.jpg') for i in range(count)]
+    return client.post(f'/api/maintenances/{maintenance_id}/images', headers=headers,
+                       data={'images': files}, content_type='multipart/form-data')
+
+
+@pytest.fixture
+def maintenance_id(client, user):
+    return create_maintenance(client, user, create_vehicle(client, user))
+
+
+def _state(app, maintenance_id):
+    with app.app_context():
+        images = MaintenanceImage.query.filter_by(maintenance_id=maintenance_id).count()
+        outbox = sorted(row.image_url for row in StorageDeletion.query.all())
+        return images, outbox
+
+
+def test_upload_stores_images_and_thumbnails(app, client, user, maintenance_id):
+    response = _upload(client, user, maintenance_id)
+
+    assert response.status_code == 201
+    stored = response.get_json()['images']
+    assert len(stored) == 2 and all('%2Fthumbs%2F' in image['thumbnail_url'] for image in stored)
+    assert _state(app, maintenance_id) == (2, [])
+
+
+def test_storage_failure_sends_uploaded_files_to_outbox(app, client, user, maintenance_id, tmp_path):
+    app.extensions['storage_backend'] = ThumbnailFailingBackend(tmp_path / 'storage', base_url='https://storage.test')
+
+    response = _upload(client, user, maintenance_id)
+
+    assert response.status_code == 500
+    images, outbox = _state(app, maintenance_id)
+    assert images == 0
+    # Só os originais chegaram ao Storage; ficam na outbox para exclusão
+    assert len(outbox) == 2 and not any('thumbs' in url for url in outbox)
+
+
+def test_database_failure_rolls_back_and_sends_files_to_outbox(app, client, user, maintenance_id, monkeypatch):
+    from routes import maintenance_routes
+
+    def fail(vehicle_id, user_id):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(maintenance_routes, 'touch_vehicle', fail)
+    response = _upload(client, user, maintenance_id)
+
+    assert response.status_code == 500
+    images, outbox = _state(app, maintenance_id)
+    # As linhas de imagem adicionadas antes da falha não entram junto com a outbox
+    assert images == 0
+    assert len(outbox) == 4
@@ -0,0 +1,121 @@
+import io
+
+from tests.helpers import auth_headers, create_maintenance, create_vehicle
+
+
+def _maintenances_by_type(client, headers, vehicle_id):
+    response = client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=headers)
+    assert response.status_code == 200
+    return {maintenance['service_type']: maintenance for maintenance in response.get_json()['maintenances']}
+
+
+def test_json_import_attaches_images_to_their_rows(client, user):
+    vehicle_id = create_vehicle(client, user)
+    # Uma manutenção já existente não pode receber as imagens da importação
+    create_maintenance(client, user, vehicle_id, service_date='2024-01-01 10:00:00')
+
+    response = client.post('/api/maintenances/import', headers=user, json={'maintenances': [
+        {'vehicle_id': vehicle_id, 'service_type': 'Freios', 'workshop': 'Oficina',
+         'service_date': '2024-02-01 10:00:00', 'images': ['https://storage.test/o/freios.jpg']},
+        {'vehicle_id': vehicle_id, 'service_type': 'Revisão', 'workshop': 'Oficina',
+         'service_date': '2024-03-01 10:00:00'},
+        {'vehicle_id': vehicle_id, 'service_type': 'Pneus', 'workshop': 'Oficina', 'labor_cost': '80.5',
+         'service_date': '2024-04-01 10:00:00',
+         'images': ['https://storage.test/o/pneu-1.jpg', 'https://storage.test/o/pneu-2.jpg']},
+    ]})
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['imported'] == 3
+    assert response.get_json()['errors'] == []
+    maintenances = _maintenances_by_type(client, user, vehicle_id)
+    assert maintenances['Troca de óleo']['images'] == []
+    assert maintenances['Freios']['images'] == ['https://storage.test/o/freios.jpg']
+    assert maintenances['Revisão']['images'] == []
+    assert maintenances['Pneus']['images'] == ['https://storage.test/o/pneu-1.jpg', 'https://storage.test/o/pneu-2.jpg']
+    assert maintenances['Pneus']['labor_cost'] == 80.5
+
+
+def test_images_follow_their_rows_across_chunks(app, client, user):
+    app.config['IMPORT_CHUNK_SIZE'] = 2
+    vehicle_id = create_vehicle(client, user)
+
+    response = client.post('/api/maintenances/import', headers=user, json={'maintenances': [
+        {'vehicle_id': vehicle_id, 'service_type': f'Serviço {n}', 'workshop': 'Oficina',
+         'images': [f'https://storage.test/o/{n}.jpg'] if n % 2 else []}
+        for n in range(5)
+    ]})
+
+    assert response.status_code == 201, response.get_json()
+    maintenances = _maintenances_by_type(client, user, vehicle_id)
+    assert {service_type: maintenance['images'] for service_type, maintenance in maintenances.items()} == {
+        f'Serviço {n}': [f'https://storage.test/o/{n}.jpg'] if n % 2 else [] for n in range(5)}
+
+
+def test_csv_import_from_body_and_file(client, user):
+    vehicle_id = create_vehicle(client, user)
+    csv_text = ('vehicle_id,service_type,workshop,labor_cost,service_date,labor_warranty_date,images\n'
+                f'{vehicle_id},Freios,Oficina,120,2024-02-01 10:00:00,15/08/2025,'
+                'https://storage.test/o/a.jpg|https://storage.test/o/b.jpg\n'
+                f'{vehicle_id},Revisão,Oficina,,2024-03-01 10:00:00,,\n')
+
+    response = client.post('/api/maintenances/import', headers=user, data=csv_text, content_type='text/csv')
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['imported'] == 2
+
+    response = client.post('/api/maintenances/import', headers=user, content_type='multipart/form-data', data={
+        'file': (io.BytesIO(('\ufeff' + csv_text.replace('Freios', 'Pneus').replace('Revisão', 'Bateria'))
+                            .encode('utf-8')), 'manutencoes.csv')})
+    assert response.status_code == 201, response.get_json()
+
+    maintenances = _maintenances_by_type(client, user, vehicle_id)
+    assert set(maintenances) == {'Freios', 'Revisão', 'Pneus', 'Bateria'}
+    assert maintenances['Freios']['images'] == ['https://storage.test/o/a.jpg', 'https://storage.test/o/b.jpg']
+    assert maintenances['Freios']['labor_warranty_date'] == '15/08/2025'
+    assert maintenances['Bateria']['images'] == []
+
+
+def test_invalid_rows_are_reported_and_skipped(client, user):
+    vehicle_id = create_vehicle(client, user)
+    other = auth_headers('user-2')
+    assert client.post('/api/auth/sync_user', headers=other, json={}).status_code == 201
+    other_vehicle_id = create_vehicle(client, other, plate='XYZ9Z99')
+
+    response = client.post('/api/maintenances/import', headers=user, json={'maintenances': [
+        {'vehicle_id': vehicle_id, 'service_type': 'Freios', 'workshop': 'Oficina',
+         'images': ['https://storage.test/o/ok.jpg']},
+        {'vehicle_id': vehicle_id, 'workshop': 'Oficina', 'labor_cost': 'caro'},
+        {'vehicle_id': other_vehicle_id, 'service_type': 'Revisão', 'workshop': 'Oficina'},
+        'não é um objeto',
+        {'vehicle_id': vehicle_id, 'service_type': 'Pneus', 'workshop': 'Oficina',
+         'service_date': '01/02/2024', 'images': 'https://storage.test/o/x.jpg'},
+    ]})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['imported'] == 1
+    assert body['failed'] == 4
+    assert [error['row'] for error in body['errors']] == [2, 3, 4, 5]
+    assert body['errors'][0]['errors'] == ['Campo service_type é obrigatório', 'labor_cost inválido']
+    assert body['errors'][1]['errors'] == ['Veículo não encontrado ou não pertence a este usuário']
+    assert body['errors'][2]['errors'] == ['Linha inválida (esperado um objeto)']
+    assert len(body['errors'][3]['errors']) == 2
+
+    maintenances = _maintenances_by_type(client, user, vehicle_id)
+    assert list(maintenances) == ['Freios']
+    assert maintenances['Freios']['images'] == ['https://storage.test/o/ok.jpg']
+    assert _maintenances_by_type(client, other, other_vehicle_id) == {}
+
+
+def test_import_rejects_bad_payloads(app, client, user):
+    app.config['IMPORT_MAX_ROWS'] = 2
+    vehicle_id = create_vehicle(client, user)
+    row = {'vehicle_id': vehicle_id, 'service_type': 'Freios', 'workshop': 'Oficina'}
+
+    for kwargs in ({'json': {'maintenances': []}}, {'json': {'rows': [row]}},
+                   {'json': {'maintenances': [row, row, row]}}):
+        response = client.post('/api/maintenances/import', headers=user, **kwargs)
+        assert response.status_code == 400, kwargs
+
+    response = client.post('/api/maintenances/import', headers=user, json={'maintenances': [{'vehicle_id': 'x'}]})
+    assert response.status_code == 400
+    assert response.get_json()['imported'] == 0
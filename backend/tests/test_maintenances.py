@@ -0,0 +1,50 @@
+import pytest
+
+from tests.helpers import create_maintenance, create_vehicle
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'data': 'não é json', 'content_type': 'application/json'},
+    {'json': {}},
+    {'json': ['mechanic']},
+])
+def test_update_without_body_is_rejected(client, user, kwargs):
+    maintenance_id = create_maintenance(client, user, create_vehicle(client, user))
+
+    response = client.put(f'/api/maintenances/{maintenance_id}', headers=user, **kwargs)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Nenhum dado fornecido para atualização'}
+
+
+def test_update_changes_fields_and_warranty(client, user):
+    maintenance_id = create_maintenance(client, user, create_vehicle(client, user))
+
+    response = client.put(f'/api/maintenances/{maintenance_id}', headers=user,
+                          json={'mechanic': 'João', 'labor_warranty_date': '15/08/2025'})
+    assert response.status_code == 200
+
+    maintenance = client.get(f'/api/maintenances/{maintenance_id}', headers=user).get_json()['maintenance']
+    assert maintenance['mechanic'] == 'João'
+    assert maintenance['labor_warranty_date'] == '15/08/2025'
+
+
+def test_list_returns_thumbnail_for_each_image(app, client, user):
+    from extensions import db
+    from models import MaintenanceImage
+
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=['https://storage.test/o/a.jpg?alt=media',
+                                                                          'https://storage.test/o/b.jpg?alt=media'])
+    with app.app_context():
+        image = MaintenanceImage.query.filter_by(maintenance_id=maintenance_id).order_by(MaintenanceImage.id).first()
+        image.thumbnail_url = 'https://storage.test/o/thumbs%2Fa.jpg?alt=media'
+        db.session.commit()
+
+    maintenance = client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=user).get_json()['maintenances'][0]
+
+    assert maintenance['images'] == ['https://storage.test/o/a.jpg?alt=media', 'https://storage.test/o/b.jpg?alt=media']
+    # Imagem sem miniatura (anterior ao pipeline de upload): a própria imagem
+    assert maintenance['thumbnails'] == ['https://storage.test/o/thumbs%2Fa.jpg?alt=media',
+                                         'https://storage.test/o/b.jpg?alt=media']
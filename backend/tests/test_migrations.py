@@ -0,0 +1,88 @@
+import pytest
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import inspect, text
+
+from extensions import db
+
+
+@pytest.fixture
+def app_config():
+    # O schema vem das migrações, como em produção
+    return {'DB_CREATE_ALL': False}
+
+
+def _insert_maintenances(rows):
+    db.session.execute(text("INSERT INTO user (id, firebase_uid, username, email) VALUES (1, 'uid-1', 'u', 'u@test.local')"))
+    db.session.execute(text("INSERT INTO vehicle (id, user_id, type, brand, model, year, license_plate) "
+                            "VALUES (1, 1, 'carro', 'Fiat', 'Uno', 2015, 'ABC1D23')"))
+    for row_id, labor, parts in rows:
+        db.session.execute(text(
+            "INSERT INTO maintenance (id, vehicle_id, service_type, workshop, service_date, labor_warranty_date, "
+            "parts_warranty_date) VALUES (:id, 1, 'Revisão', 'Oficina', '2024-05-10 10:00:00', :labor, :parts)"), {'id': row_id, 'labor': labor, 'parts': parts})
+    db.session.commit()
+
+
+def _warranties():
+    rows = db.session.execute(text(
+        'SELECT id, labor_warranty_date, parts_warranty_date FROM maintenance ORDER BY id')).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def test_warranty_conversion_keeps_unparseable_text(app):
+    with app.app_context():
+        upgrade(revision='0005')
+        _insert_maintenances([(1, '15/08/2025', None), (2, 'seis meses', '2025-01-31'), (3, None, '31/02/2025')])
+
+        upgrade(revision='0006')
+        assert _warranties() == [(1, '2025-08-15', None), (2, None, '2025-01-31'), (3, None, None)]
+        backup = db.session.execute(text(
+            'SELECT maintenance_id, column_name, original_value FROM maintenance_warranty_backup '
+            'ORDER BY maintenance_id')).fetchall()
+        assert [tuple(row) for row in backup] == [(2, 'labor_warranty_date', 'seis meses'),
+                                                  (3, 'parts_warranty_date', '31/02/2025')]
+        db.session.remove()
+
+        downgrade(revision='0005')
+        assert _warranties() == [(1, '15/08/2025', None), (2, 'seis meses', '31/01/2025'), (3, None, '31/02/2025')]
+        assert 'maintenance_warranty_backup' not in inspect(db.engine).get_table_names()
+
+
+def test_upgrade_and_downgrade_full_chain(app):
+    with app.app_context():
+        upgrade()
+        tables = set(inspect(db.engine).get_table_names())
+        assert {'maintenance', 'storage_deletion', 'sync_tombstone', 'maintenance_warranty_backup'} <= tables
+        db.session.remove()
+
+        # O esquema base (0001) não é desfeito; o resto sai todo
+        downgrade(revision='base')
+        tables = set(inspect(db.engine).get_table_names())
+        assert tables <= {'alembic_version', 'user', 'vehicle', 'maintenance', 'maintenance_image'}
+
+
+def test_autogenerate_matches_models(app):
+    from alembic import command
+    from alembic.util import AutogenerateDiffsDetected
+
+    with app.app_context():
+        upgrade()
+        config = app.extensions['migrate'].migrate.get_config()
+        try:
+            command.check(config)
+        except AutogenerateDiffsDetected as e:
+            pytest.fail(str(e))
+
+
+def test_search_triggers_survive_the_0008_downgrade(app):
+    with app.app_context():
+        upgrade()
+        db.session.remove()
+
+        downgrade(revision='0007')
+        triggers = {name for (name,) in db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'maintenance_fts_%'"))}
+        assert triggers == {'maintenance_fts_after_insert', 'maintenance_fts_after_delete',
+                            'maintenance_fts_after_update'}
+        _insert_maintenances([(1, None, None)])
+        assert db.session.execute(text(
+            "SELECT rowid FROM maintenance_fts WHERE maintenance_fts MATCH 'Revisão'")).fetchall() == [(1,)]
@@ -0,0 +1,56 @@
+import pytest
+
+OPS_TOKEN = 's3cr3t-ops-token'
+OPS_PATHS = ['/metrics', '/ops/cache-stats', '/ops/admission', '/ops/startup']
+
+
+@pytest.fixture
+def app_config():
+    return {'OPS_TOKEN': OPS_TOKEN, 'OPS_ALLOWED_IPS': '10.1.0.0/16, 192.168.0.10'}
+
+
+def _get(client, path, token=None, remote_addr='203.0.113.7'):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return client.get(path, headers=headers, environ_base={'REMOTE_ADDR': remote_addr})
+
+
+@pytest.mark.parametrize('path', OPS_PATHS)
+def test_ops_routes_require_operator(client, path):
+    assert _get(client, path).status_code == 403
+    assert _get(client, path, token='errado').status_code == 403
+    assert _get(client, path, token=OPS_TOKEN).status_code == 200
+
+
+def test_metrics_with_token(client):
+    response = _get(client, '/metrics', token=OPS_TOKEN)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+@pytest.mark.parametrize('path', ['/healthz', '/readyz'])
+def test_health_probes_stay_public(client, path):
+    assert _get(client, path).status_code == 200
+
+
+@pytest.mark.parametrize('remote_addr,status', [('10.1.2.3', 200), ('192.168.0.10', 200), ('192.168.0.11', 403)])
+def test_metrics_ip_allowlist(client, remote_addr, status):
+    assert _get(client, '/metrics', remote_addr=remote_addr).status_code == status
+
+
+@pytest.mark.parametrize('app_config', [{}])
+def test_metrics_closed_without_configuration(client):
+    # Sem token nem lista de IPs, nem o próprio host acessa
+    assert _get(client, '/metrics', remote_addr='127.0.0.1').status_code == 403
+
+
+def test_readyz_hides_database_error(client, monkeypatch):
+    from extensions import db
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('could not connect to server at db.internal:5432')
+
+    monkeypatch.setattr(db.session, 'execute', fail)
+    response = _get(client, '/readyz')
+
+    assert response.status_code == 503
+    assert response.get_json() == {'status': 'unavailable', 'database': 'unavailable'}
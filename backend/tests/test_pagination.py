@@ -0,0 +1,90 @@
+import pytest
+
+from services.pagination import MAX_PAGE_LIMIT, PaginationError, encode_cursor, parse_page_args
+from tests.helpers import create_maintenance, create_vehicle
+
+
+def _walk(client, headers, path, limit, key):
+    """Percorre todas as páginas seguindo next_cursor; devolve os ids na ordem."""
+    ids, cursor = [], None
+    while True:
+        params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        response = client.get(path, headers=headers, query_string=params)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        assert len(body[key]) <= limit
+        ids.extend(item['id'] for item in body[key])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_maintenance_cursor_round_trip(client, user):
+    vehicle_id = create_vehicle(client, user)
+    # Datas repetidas: o desempate pelo id mantém a ordem estável entre as páginas
+    dates = ['2024-05-10 10:00:00', '2024-03-01 08:00:00', '2024-05-10 10:00:00',
+             '2024-07-20 09:00:00', '2024-05-10 10:00:00', '2023-12-31 23:59:59']
+    ids = [create_maintenance(client, user, vehicle_id, service_date=date) for date in dates]
+    expected = [maintenance_id for _, maintenance_id in
+                sorted(zip(dates, ids), key=lambda pair: (pair[0], pair[1]), reverse=True)]
+
+    full = client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=user).get_json()
+    assert [item['id'] for item in full['maintenances']] == expected
+
+    for limit in (1, 2, 4, 6):
+        assert _walk(client, user, f'/api/maintenances/vehicle/{vehicle_id}', limit, 'maintenances') == expected
+
+
+def test_vehicle_cursor_round_trip(client, user):
+    ids = [create_vehicle(client, user, plate=f'PAG{n}A00') for n in range(5)]
+
+    assert _walk(client, user, '/api/vehicles/', 2, 'vehicles') == ids
+
+
+def test_no_limit_returns_everything(client, user, monkeypatch):
+    monkeypatch.setattr('services.pagination.MAX_PAGE_LIMIT', 2)
+    vehicle_id = create_vehicle(client, user)
+    for _ in range(3):
+        create_maintenance(client, user, vehicle_id)
+
+    # Clientes antigos (sem limit/cursor): lista completa, sem teto
+    body = client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=user).get_json()
+    assert len(body['maintenances']) == 3
+    assert body['next_cursor'] is None
+
+
+def test_limit_is_clamped(client, user, monkeypatch):
+    monkeypatch.setattr('services.pagination.MAX_PAGE_LIMIT', 2)
+    vehicle_id = create_vehicle(client, user)
+    for _ in range(3):
+        create_maintenance(client, user, vehicle_id)
+
+    body = client.get(f'/api/maintenances/vehicle/{vehicle_id}?limit=1000', headers=user).get_json()
+    assert len(body['maintenances']) == 2
+    assert body['next_cursor'] is not None
+
+
+@pytest.mark.parametrize('args, expected', [
+    ({}, (None, None)),
+    ({'limit': '10'}, (10, None)),
+    ({'limit': str(MAX_PAGE_LIMIT * 10)}, (MAX_PAGE_LIMIT, None)),
+    # Só o cursor: página do tamanho máximo
+    ({'cursor': encode_cursor(7)}, (MAX_PAGE_LIMIT, [7])),
+])
+def test_parse_page_args(args, expected):
+    assert parse_page_args(args, cursor_size=1) == expected
+
+
+@pytest.mark.parametrize('args', [{'limit': '0'}, {'limit': 'dez'}, {'cursor': 'não-é-base64'},
+                                  {'cursor': encode_cursor(1, 2)}])
+def test_parse_page_args_rejects_invalid_values(args):
+    with pytest.raises(PaginationError):
+        parse_page_args(args, cursor_size=1)
+
+
+def test_invalid_cursor_is_a_bad_request(client, user):
+    vehicle_id = create_vehicle(client, user)
+    for cursor in (encode_cursor('ontem', 1), encode_cursor(1)):
+        response = client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=user,
+                              query_string={'cursor': cursor})
+        assert response.status_code == 400
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from tests.helpers import create_maintenance, create_vehicle
+from tests.query_budget import QueryBudgetExceeded, query_budget
+
+# Máximo de comandos SQL por requisição (cache de respostas desligado). A busca do
+# usuário local conta uma query; o resto não pode crescer com o número de registros.
+BUDGETS = {
+    'vehicle_list': 2,         # usuário + veículos
+    'vehicle_detail': 2,       # usuário + veículo
+    'maintenance_list': 4,     # usuário + veículo + manutenções + imagens (uma query para todas)
+    'maintenance_page': 4,
+    'maintenance_detail': 3,   # usuário + manutenção com o dono + imagens
+    'dashboard': 5,            # usuário + veículos + agregados + último serviço + garantias
+    'sync': 4,                 # usuário + veículos + manutenções + imagens
+}
+
+
+@pytest.fixture
+def app_config():
+    # Com o cache de respostas a segunda leitura nem chega ao banco
+    return {'RESPONSE_CACHE_BACKEND': 'none'}
+
+
+def _seed(client, headers, vehicles, maintenances_per_vehicle):
+    data = {'vehicles': [], 'maintenances': []}
+    for v in range(vehicles):
+        vehicle_id = create_vehicle(client, headers, plate=f'TST{v:04d}')
+        data['vehicles'].append(vehicle_id)
+        for m in range(maintenances_per_vehicle):
+            images = [f'https://storage.test/o/maintenances%2F{v}-{m}-{i}.jpg?alt=media' for i in range(3)]
+            data['maintenances'].append(create_maintenance(
+                client, headers, vehicle_id, images=images, service_date=f'2024-01-{m % 28 + 1:02d} 10:00:00'))
+    return data
+
+
+def _urls(data):
+    vehicle_id = data['vehicles'][0]
+    return {
+        'vehicle_list': '/api/vehicles/',
+        'vehicle_detail': f'/api/vehicles/{vehicle_id}',
+        'maintenance_list': f'/api/maintenances/vehicle/{vehicle_id}',
+        'maintenance_page': f'/api/maintenances/vehicle/{vehicle_id}?limit=5',
+        'maintenance_detail': f"/api/maintenances/{data['maintenances'][0]}",
+        'dashboard': '/api/vehicles/dashboard',
+        'sync': '/api/sync',
+    }
+
+
+@pytest.mark.parametrize('endpoint', sorted(BUDGETS))
+@pytest.mark.parametrize('vehicles,maintenances', [(1, 1), (3, 12)])
+def test_endpoint_within_query_budget(client, user, endpoint, vehicles, maintenances):
+    url = _urls(_seed(client, user, vehicles, maintenances))[endpoint]
+
+    with query_budget(BUDGETS[endpoint]):
+        response = client.get(url, headers=user)
+
+    assert response.status_code == 200, response.get_json()
+
+
+def test_query_budget_fails_when_exceeded(client, user):
+    url = _urls(_seed(client, user, 1, 3))['maintenance_list']
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(BUDGETS['maintenance_list'] - 1):
+            client.get(url, headers=user)
+
+    # A mensagem lista os comandos executados, para achar a query a mais
+    assert 'FROM maintenance_image' in str(excinfo.value)
+
+
+def test_query_counter_ignores_other_threads(client, user):
+    data = _seed(client, user, 1, 1)
+    url = _urls(data)['vehicle_list']
+
+    with query_budget(0) as counter:
+        worker = threading.Thread(target=lambda: client.get(url, headers=user))
+        worker.start()
+        worker.join()
+
+    assert counter.count == 0
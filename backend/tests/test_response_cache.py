@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import text
+
+from tests.helpers import auth_headers, create_maintenance, create_vehicle
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def app_config(request):
+    # 'shared' sem URL usa o LocalSharedStore (mesma API do Redis, em memória)
+    return {'RESPONSE_CACHE_BACKEND': request.param}
+
+
+@pytest.fixture
+def cache():
+    from services.response_cache import response_cache
+    return response_cache
+
+
+def _get(client, headers, path):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_repeated_reads_are_served_from_cache(client, user, cache):
+    vehicle_id = create_vehicle(client, user)
+    create_maintenance(client, user, vehicle_id)
+    path = f'/api/maintenances/vehicle/{vehicle_id}'
+
+    first = _get(client, user, path)
+    hits = cache.hits
+    second = client.get(path, headers=user)
+
+    assert cache.hits == hits + 1
+    assert second.get_json() == first
+    assert second.headers['ETag']
+
+
+def test_writes_invalidate_after_commit(client, user, cache):
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = create_maintenance(client, user, vehicle_id)
+    path = f'/api/maintenances/{maintenance_id}'
+    _get(client, user, path)
+
+    invalidations = cache.invalidations
+    assert client.put(path, headers=user, json={'mechanic': 'Ana'}).status_code == 200
+
+    assert cache.invalidations == invalidations + 1
+    assert _get(client, user, path)['maintenance']['mechanic'] == 'Ana'
+
+
+def test_rolled_back_writes_do_not_invalidate(app, client, user, cache):
+    from extensions import db
+    from models import User
+    from services.etag import touch_user
+
+    _get(client, user, '/api/vehicles/')
+    invalidations = cache.invalidations
+    with app.test_request_context():
+        user_id = User.query.filter_by(firebase_uid='user-1').one().id
+        touch_user(user_id)
+        db.session.rollback()
+        db.session.commit()
+
+    assert cache.invalidations == invalidations
+
+
+def test_entries_are_never_shared_between_users(client, user):
+    vehicle_id = create_vehicle(client, user, plate='AAA1A11')
+    other = auth_headers('user-2')
+    assert client.post('/api/auth/sync_user', headers=other, json={}).status_code == 201
+    create_vehicle(client, other, plate='BBB2B22')
+
+    mine = _get(client, user, '/api/vehicles/')
+    theirs = _get(client, other, '/api/vehicles/')
+    assert [vehicle['license_plate'] for vehicle in mine['vehicles']] == ['AAA1A11']
+    assert [vehicle['license_plate'] for vehicle in theirs['vehicles']] == ['BBB2B22']
+
+    # A entrada em cache do dono não libera o recurso para outro usuário
+    _get(client, user, f'/api/vehicles/{vehicle_id}')
+    assert client.get(f'/api/vehicles/{vehicle_id}', headers=other).status_code == 404
+    assert client.get(f'/api/maintenances/vehicle/{vehicle_id}', headers=other).status_code == 404
+
+
+def test_stale_data_version_is_never_served(app, client, user, cache):
+    from extensions import db
+
+    vehicle_id = create_vehicle(client, user)
+    path = f'/api/vehicles/{vehicle_id}'
+    assert _get(client, user, path)['brand'] == 'Fiat'
+
+    # Escrita feita por outro processo: o cache deste não recebe a invalidação,
+    # mas a nova versão dos dados do usuário muda a chave
+    with app.app_context():
+        db.session.execute(text("UPDATE vehicle SET brand = 'Ford', data_version = data_version + 1"))
+        db.session.execute(text("UPDATE user SET data_version = data_version + 1"))
+        db.session.commit()
+    invalidations = cache.invalidations
+
+    assert _get(client, user, path)['brand'] == 'Ford'
+    assert cache.invalidations == invalidations
@@ -0,0 +1,116 @@
+from sqlalchemy import text
+
+from tests.helpers import auth_headers, create_vehicle
+
+
+def _add(client, headers, vehicle_id, service_type, workshop='Oficina', **fields):
+    response = client.post('/api/maintenances/add', headers=headers, json={
+        'vehicle_id': vehicle_id, 'service_type': service_type, 'workshop': workshop,
+        'service_date': '2024-05-10 10:00:00', **fields,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['maintenance']['id']
+
+
+def _search(client, headers, **params):
+    response = client.get('/api/maintenances/search', headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _ids(client, headers, q, **params):
+    return [result['id'] for result in _search(client, headers, q=q, **params)['results']]
+
+
+def test_results_are_ranked_by_column_weight(client, user):
+    vehicle_id = create_vehicle(client, user)
+    in_store = _add(client, user, vehicle_id, 'Revisão', parts_store='Freios & Cia')
+    in_type = _add(client, user, vehicle_id, 'Freios dianteiros')
+    in_workshop = _add(client, user, vehicle_id, 'Revisão', workshop='Centro de freios')
+
+    # Peso do tipo de serviço > oficina > loja; acentos e prefixos também casam
+    assert _ids(client, user, 'freio') == [in_type, in_workshop, in_store]
+    assert _ids(client, user, 'REVISAO') == [in_store, in_workshop]
+    assert _ids(client, user, 'freio centro') == [in_workshop]
+    assert _ids(client, user, '"*) OR') == []
+
+
+def test_search_is_scoped_to_the_user_and_vehicle(client, user):
+    car = create_vehicle(client, user, plate='AAA1A11')
+    bike = create_vehicle(client, user, plate='BBB2B22')
+    on_car = _add(client, user, car, 'Troca de óleo')
+    on_bike = _add(client, user, bike, 'Troca de óleo')
+    other = auth_headers('user-2')
+    assert client.post('/api/auth/sync_user', headers=other, json={}).status_code == 201
+    _add(client, other, create_vehicle(client, other, plate='CCC3C33'), 'Troca de óleo')
+
+    assert sorted(_ids(client, user, 'óleo')) == [on_car, on_bike]
+    assert _ids(client, user, 'óleo', vehicle_id=bike) == [on_bike]
+    assert len(_ids(client, other, 'óleo')) == 1
+    assert _ids(client, other, 'óleo', vehicle_id=car) == []
+
+
+def test_keyset_cursor_walks_every_result_once(client, user):
+    vehicle_id = create_vehicle(client, user)
+    strong = [_add(client, user, vehicle_id, 'Bateria') for _ in range(3)]
+    weak = [_add(client, user, vehicle_id, 'Revisão', parts='Bateria nova') for _ in range(4)]
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        page = _search(client, user, q='bateria', **params)
+        assert len(page['results']) <= 2
+        seen.extend(result['id'] for result in page['results'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    # Mesmo score: desempate pelo id; os mais relevantes primeiro
+    assert seen == strong + weak
+
+
+def test_invalid_search_requests(client, user):
+    assert client.get('/api/maintenances/search', headers=user).status_code == 400
+    for cursor in ('lixo', 'WzEwXQ', 'WyJ4IiwxXQ'):  # [10] (offset antigo) e ["x",1]
+        response = client.get('/api/maintenances/search', headers=user, query_string={'q': 'a', 'cursor': cursor})
+        assert response.status_code == 400, cursor
+
+
+def test_triggers_keep_index_in_sync(app, client, user):
+    from extensions import db
+
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = _add(client, user, vehicle_id, 'Alinhamento', mechanic='Carlos')
+    assert _ids(client, user, 'carlos') == [maintenance_id]
+
+    assert client.put(f'/api/maintenances/{maintenance_id}', headers=user,
+                      json={'mechanic': 'Roberto', 'service_type': 'Balanceamento'}).status_code == 200
+    assert _ids(client, user, 'carlos') == []
+    assert _ids(client, user, 'alinhamento') == []
+    assert _ids(client, user, 'roberto balanceamento') == [maintenance_id]
+
+    # Importação em lote também passa pelos triggers
+    response = client.post('/api/maintenances/import', headers=user, json={'maintenances': [
+        {'vehicle_id': vehicle_id, 'service_type': 'Embreagem', 'workshop': 'Oficina'}]})
+    assert response.status_code == 201
+    assert len(_ids(client, user, 'embreagem')) == 1
+
+    assert client.delete(f'/api/maintenances/{maintenance_id}', headers=user).status_code == 200
+    assert _ids(client, user, 'roberto') == []
+    with app.app_context():
+        indexed = db.session.execute(text('SELECT COUNT(*) FROM maintenance_fts')).scalar()
+        assert indexed == 1
+
+
+def test_rebuild_command_repopulates_the_index(app, client, user):
+    from extensions import db
+
+    maintenance_id = _add(client, user, create_vehicle(client, user), 'Suspensão')
+    with app.app_context():
+        db.session.execute(text('DELETE FROM maintenance_fts'))
+        db.session.commit()
+    assert _ids(client, user, 'suspensao') == []
+
+    result = app.test_cli_runner().invoke(args=['rebuild-search-index'])
+    assert 'reconstruído' in result.output
+    assert _ids(client, user, 'suspensao') == [maintenance_id]
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import StorageDeletion
+from services.storage import LocalStorageBackend
+from services.storage_outbox import drain_outbox, enqueue_storage_deletions, retry_delay, start_storage_outbox_worker
+
+BASE_URL = 'https://storage.test'
+
+
+class FlakyStorageBackend(LocalStorageBackend):
+    """Backend local cujas exclusões falham enquanto o caminho estiver em 'failing'."""
+
+    def __init__(self, root):
+        super().__init__(root, base_url=BASE_URL)
+        self.failing = set()
+        self.deleted = []
+
+    def delete(self, path):
+        if path in self.failing:
+            raise ConnectionError('Storage indisponível')
+        self.deleted.append(path)
+        return super().delete(path)
+
+
+@pytest.fixture
+def app_config():
+    return {'STORAGE_OUTBOX_MAX_ATTEMPTS': 3, 'STORAGE_OUTBOX_BACKOFF_SECONDS': 10,
+            'STORAGE_OUTBOX_MAX_BACKOFF_SECONDS': 30}
+
+
+@pytest.fixture
+def backend(app, tmp_path):
+    backend = app.extensions['storage_backend'] = FlakyStorageBackend(tmp_path / 'outbox-storage')
+    yield backend
+    backend.shutdown()
+
+
+def _store(backend, path):
+    """Grava um arquivo no backend e devolve a URL dele."""
+    return backend.upload(path, b'conteudo', 'image/jpeg')
+
+
+def _exists(backend, path):
+    return os.path.exists(os.path.join(backend.root, path))
+
+
+def _enqueue(app, urls):
+    with app.app_context():
+        enqueue_storage_deletions(urls)
+        db.session.commit()
+
+
+def _rows(app):
+    with app.app_context():
+        rows = StorageDeletion.query.order_by(StorageDeletion.id).all()
+        db.session.expunge_all()
+        return rows
+
+
+def _make_due(app):
+    """Antecipa as próximas tentativas, como se o backoff já tivesse passado."""
+    with app.app_context():
+        StorageDeletion.query.update({'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+
+def test_retry_delay_is_exponential_and_capped():
+    assert [retry_delay(attempts, 10, 60) for attempts in range(1, 6)] == [10, 20, 40, 60, 60]
+
+
+def test_drain_deletes_files_and_marks_rows_done(app, backend):
+    urls = [_store(backend, f'maintenances/1/img_{i}.jpg') for i in range(3)]
+    _enqueue(app, urls)
+
+    assert drain_outbox(app) == (3, 0)
+
+    assert sorted(backend.deleted) == [f'maintenances/1/img_{i}.jpg' for i in range(3)]
+    assert not any(_exists(backend, f'maintenances/1/img_{i}.jpg') for i in range(3))
+    rows = _rows(app)
+    assert {row.status for row in rows} == {StorageDeletion.STATUS_DONE}
+    assert all(row.attempts == 1 and row.processed_at is not None for row in rows)
+    # Nada mais pendente
+    assert drain_outbox(app) == (0, 0)
+
+
+def test_failed_deletion_is_retried_with_backoff(app, backend):
+    url = _store(backend, 'maintenances/1/img.jpg')
+    backend.failing.add('maintenances/1/img.jpg')
+    _enqueue(app, [url])
+
+    before = datetime.utcnow()
+    assert drain_outbox(app) == (0, 1)
+    row = _rows(app)[0]
+    assert row.status == StorageDeletion.STATUS_PENDING
+    assert row.attempts == 1
+    assert row.claimed_by is None
+    assert 'Storage indisponível' in row.last_error
+    assert before + timedelta(seconds=10) <= row.next_attempt_at <= datetime.utcnow() + timedelta(seconds=10)
+
+    # Antes do backoff vencer a linha não é tentada de novo
+    assert drain_outbox(app) == (0, 0)
+
+    # Segunda falha: o intervalo dobra
+    _make_due(app)
+    before = datetime.utcnow()
+    assert drain_outbox(app) == (0, 1)
+    row = _rows(app)[0]
+    assert row.attempts == 2
+    assert row.next_attempt_at >= before + timedelta(seconds=20)
+
+    # O Storage volta: a próxima tentativa conclui a exclusão
+    backend.failing.clear()
+    _make_due(app)
+    assert drain_outbox(app) == (1, 0)
+    row = _rows(app)[0]
+    assert row.status == StorageDeletion.STATUS_DONE
+    assert row.attempts == 3
+    assert row.last_error is None
+    assert not _exists(backend, 'maintenances/1/img.jpg')
+
+
+def test_deletion_goes_to_dead_letter_after_max_attempts(app, backend):
+    ok_url = _store(backend, 'maintenances/1/ok.jpg')
+    bad_url = _store(backend, 'maintenances/1/bad.jpg')
+    backend.failing.add('maintenances/1/bad.jpg')
+    _enqueue(app, [ok_url, bad_url])
+
+    assert drain_outbox(app) == (1, 1)
+    for _ in range(2):
+        _make_due(app)
+        assert drain_outbox(app) == (0, 1)
+
+    ok_row, bad_row = _rows(app)
+    assert ok_row.status == StorageDeletion.STATUS_DONE
+    assert bad_row.status == StorageDeletion.STATUS_DEAD
+    assert bad_row.attempts == 3
+    assert bad_row.processed_at is not None
+    assert 'ConnectionError' in bad_row.last_error
+
+    # Dead-letter não volta a ser processada, mesmo vencida
+    backend.failing.clear()
+    _make_due(app)
+    assert drain_outbox(app) == (0, 0)
+    assert _exists(backend, 'maintenances/1/bad.jpg')
+
+
+def test_url_outside_storage_is_dead_without_retry(app, backend):
+    _enqueue(app, ['https://example.com/foto.jpg'])
+
+    assert drain_outbox(app) == (0, 1)
+
+    row = _rows(app)[0]
+    assert row.status == StorageDeletion.STATUS_DEAD
+    assert row.attempts == 1
+    assert backend.deleted == []
+
+
+def _outbox_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'storage-outbox-worker']
+
+
+def test_create_app_does_not_start_worker(app):
+    # create_app() também roda nas migrações e nos comandos `flask`
+    assert app.extensions['storage_outbox_worker'] is not None
+    assert _outbox_threads() == []
+
+
+def test_started_worker_drains_when_notified(app, backend):
+    worker = app.extensions['storage_outbox_worker']
+    worker.poll_seconds = 3600
+    start_storage_outbox_worker(app)
+    try:
+        _enqueue(app, [_store(backend, 'maintenances/1/img.jpg')])
+        worker.notify()
+        deadline = time.monotonic() + 5
+        while _rows(app)[0].status != StorageDeletion.STATUS_DONE and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert _rows(app)[0].status == StorageDeletion.STATUS_DONE
+    finally:
+        worker.stop()
+    assert _outbox_threads() == []
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.helpers import auth_headers, create_maintenance, create_vehicle
+
+
+@pytest.fixture
+def app_config():
+    # Sem atraso na marca d'água: o que muda logo depois do sync já entra no próximo
+    return {'SYNC_WATERMARK_LAG_SECONDS': 0, 'SYNC_TOMBSTONE_RETENTION_DAYS': 30}
+
+
+def _sync(client, headers, since=None):
+    response = client.get('/api/sync', headers=headers, query_string={'since': since} if since else {})
+    assert response.status_code == 200, response.get_json()
+    assert response.headers['Cache-Control'] == 'no-store'
+    return response.get_json()
+
+
+def _ids(items):
+    return sorted(item['id'] for item in items)
+
+
+def test_first_sync_is_full(client, user):
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = create_maintenance(client, user, vehicle_id, images=['https://storage.test/o/a.jpg'])
+
+    payload = _sync(client, user)
+
+    assert payload['full'] is True
+    assert _ids(payload['vehicles']) == [vehicle_id]
+    assert _ids(payload['maintenances']) == [maintenance_id]
+    assert payload['maintenances'][0]['images'] == ['https://storage.test/o/a.jpg']
+    assert payload['deleted'] == {'vehicles': [], 'maintenances': []}
+    assert datetime.fromisoformat(payload['watermark'])
+
+
+def test_delta_sync_returns_changes_and_tombstones(client, user):
+    car = create_vehicle(client, user, plate='AAA1A11')
+    bike = create_vehicle(client, user, plate='BBB2B22')
+    kept = create_maintenance(client, user, car)
+    edited = create_maintenance(client, user, car)
+    removed = create_maintenance(client, user, car)
+    create_maintenance(client, user, bike)
+    watermark = _sync(client, user)['watermark']
+
+    assert client.put(f'/api/maintenances/{edited}', headers=user, json={'mechanic': 'Ana'}).status_code == 200
+    added = create_maintenance(client, user, car)
+    assert client.delete(f'/api/maintenances/{removed}', headers=user).status_code == 200
+    assert client.delete(f'/api/vehicles/{bike}', headers=user).status_code == 200
+
+    payload = _sync(client, user, watermark)
+    assert payload['full'] is False
+    # Mudar as manutenções não altera o próprio veículo
+    assert payload['vehicles'] == []
+    assert _ids(payload['maintenances']) == [edited, added]
+    assert kept not in _ids(payload['maintenances'])
+    assert payload['deleted'] == {'vehicles': [bike], 'maintenances': [removed]}
+
+    # Nada mudou desde a nova marca d'água
+    payload = _sync(client, user, payload['watermark'])
+    assert (payload['vehicles'], payload['maintenances']) == ([], [])
+    assert payload['deleted'] == {'vehicles': [], 'maintenances': []}
+
+
+def test_new_vehicle_is_synced(client, user):
+    create_vehicle(client, user, plate='AAA1A11')
+    watermark = _sync(client, user)['watermark']
+
+    vehicle_id = create_vehicle(client, user, plate='BBB2B22')
+
+    payload = _sync(client, user, watermark)
+    assert [(vehicle['id'], vehicle['license_plate']) for vehicle in payload['vehicles']] == [(vehicle_id, 'BBB2B22')]
+
+
+def test_sync_is_scoped_to_the_user(client, user):
+    watermark = _sync(client, user)['watermark']
+    other = auth_headers('user-2')
+    assert client.post('/api/auth/sync_user', headers=other, json={}).status_code == 201
+    other_vehicle = create_vehicle(client, other, plate='OUT1R00')
+    create_maintenance(client, other, other_vehicle)
+    assert client.delete(f'/api/vehicles/{other_vehicle}', headers=other).status_code == 200
+
+    for payload in (_sync(client, user), _sync(client, user, watermark)):
+        assert (payload['vehicles'], payload['maintenances']) == ([], [])
+        assert payload['deleted'] == {'vehicles': [], 'maintenances': []}
+
+
+def test_watermark_older_than_retention_falls_back_to_full_sync(client, user):
+    vehicle_id = create_vehicle(client, user)
+    maintenance_id = create_maintenance(client, user, vehicle_id)
+    removed = create_maintenance(client, user, vehicle_id)
+    assert client.delete(f'/api/maintenances/{removed}', headers=user).status_code == 200
+
+    since = (datetime.utcnow() - timedelta(days=31)).isoformat()
+    payload = _sync(client, user, since)
+
+    assert payload['full'] is True
+    assert _ids(payload['vehicles']) == [vehicle_id]
+    assert _ids(payload['maintenances']) == [maintenance_id]
+    # Sync completo: o cliente substitui tudo, as exclusões não são listadas
+    assert payload['deleted'] == {'vehicles': [], 'maintenances': []}
+
+
+def test_invalid_watermark_is_rejected(client, user):
+    response = client.get('/api/sync', headers=user, query_string={'since': 'ontem'})
+    assert response.status_code == 400
+
+
+def test_purge_removes_only_expired_tombstones(app, client, user):
+    from extensions import db
+    from models import SyncTombstone
+
+    vehicle_id = create_vehicle(client, user)
+    for _ in range(2):
+        maintenance_id = create_maintenance(client, user, vehicle_id)
+        assert client.delete(f'/api/maintenances/{maintenance_id}', headers=user).status_code == 200
+    with app.app_context():
+        expired = SyncTombstone.query.order_by(SyncTombstone.id).first()
+        expired.deleted_at = datetime.utcnow() - timedelta(days=31)
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['purge-sync-tombstones'])
+
+    assert '1 tombstone(s) removido(s).' in result.output
+    with app.app_context():
+        assert SyncTombstone.query.count() == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from services.token_cache import token_cache, token_cache_max_ttl
+
+
+@pytest.mark.parametrize('config,expected', [
+    ({}, None),
+    ({'FIREBASE_CHECK_REVOKED': True}, 300),
+    ({'FIREBASE_CHECK_REVOKED': True, 'TOKEN_CACHE_MAX_TTL': 60}, 60),
+    ({'FIREBASE_CHECK_REVOKED': True, 'TOKEN_CACHE_MAX_TTL': 0}, None),
+    ({'TOKEN_CACHE_MAX_TTL': 120}, 120),
+])
+def test_max_ttl_follows_app_config(config, expected):
+    assert token_cache_max_ttl(config) == expected
+
+
+@pytest.mark.parametrize('app_config', [{'FIREBASE_CHECK_REVOKED': True}])
+def test_check_revoked_override_limits_cache_ttl(app):
+    # Sobrescrito no create_app (e não pela variável de ambiente): o limite vale do mesmo jeito
+    assert token_cache.max_ttl == 300
+
+
+def test_cached_token_expires_after_max_ttl(monkeypatch):
+    import services.token_cache as module
+
+    now = [1000.0]
+    monkeypatch.setattr(module.time, 'time', lambda: now[0])
+    token_cache.configure(max_ttl=300)
+    try:
+        token_cache.put('token-a', {'uid': 'u', 'exp': now[0] + 3600})
+        assert token_cache.get('token-a') is not None
+        now[0] += 301
+        assert token_cache.get('token-a') is None
+    finally:
+        token_cache.configure(max_ttl=None)
+        token_cache.clear()
@@ -0,0 +1,14 @@
+# Ponto de entrada WSGI para produção:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Com PRELOAD_APP (padrão no gunicorn.conf.py) o app é criado uma vez no processo
+# mestre e herdado pelos workers no fork; cada worker só descarta as conexões
+# herdadas e inicia suas threads (init_worker_process, chamado no post_fork).
+# Sem preload cada worker importa este módulo e inicia as threads aqui mesmo.
+# O schema não é criado no boot: aplique as migrações antes (python migrate_db.py).
+from app import create_app
+from services.storage_outbox import start_storage_outbox_worker
+
+app = create_app()
+if not app.config['PRELOAD_APP']:
+    start_storage_outbox_worker(app)
@@ -12,6 +12,8 @@ class ServiceModel {
   final double? partsCost;
   final DateTime dateTime;
   final List<String> imagePaths;
+  // Miniaturas das imagens (mesma ordem de imagePaths), usadas nas listagens
+  final List<String> thumbnailPaths;
 
   ServiceModel({
     this.id,
@@ -27,8 +29,13 @@ class ServiceModel {
     this.partsCost,
     required this.dateTime,
     this.imagePaths = const [],
+    this.thumbnailPaths = const [],
   });
 
+  // Miniatura de cada imagem; sem miniaturas (ex.: imagens antigas), a própria imagem
+  List<String> get previewPaths =>
+      thumbnailPaths.length == imagePaths.length ? thumbnailPaths : imagePaths;
+
   // Converte o modelo para um mapa para facilitar a exibição e serialização
   Map<String, dynamic> toMap() {
     return {
@@ -45,6 +52,7 @@ class ServiceModel {
       'partsCost': partsCost,
       'dateTime': dateTime,
       'imagePaths': imagePaths,
+      'thumbnailPaths': thumbnailPaths,
     };
   }
 
@@ -66,6 +74,7 @@ class ServiceModel {
           ? map['dateTime'] 
           : DateTime.parse(map['dateTime']),
       imagePaths: List<String>.from(map['imagePaths'] ?? []),
+      thumbnailPaths: List<String>.from(map['thumbnailPaths'] ?? []),
     );
   }
 }
\ No newline at end of file
@@ -67,7 +67,7 @@ class ServiceDetailsScreen extends StatelessWidget {
               const SizedBox(height: 16),
               Text('Imagens', style: AppTheme.titleSmall),
               const SizedBox(height: 12),
-              _buildImageGallery(context, service.imagePaths),
+              _buildImageGallery(context, service.imagePaths, service.previewPaths),
             ],
           ],
         ),
@@ -138,11 +138,14 @@ class ServiceDetailsScreen extends StatelessWidget {
     }
   }
 
-  Widget _buildImageGallery(BuildContext context, List<String> imageUrls) {
+  // Grade com as miniaturas; a imagem original só é baixada ao abrir ou fazer download
+  Widget _buildImageGallery(BuildContext context, List<String> imageUrls, List<String> previewUrls) {
     return Wrap(
       spacing: 8.0,
       runSpacing: 8.0,
-      children: imageUrls.map((url) {
+      children: List.generate(imageUrls.length, (index) {
+        final url = imageUrls[index];
+        final previewUrl = previewUrls[index];
         return Stack( // Usar Stack para sobrepor o botão
           children: [
             GestureDetector(
@@ -181,7 +184,7 @@ class ServiceDetailsScreen extends StatelessWidget {
               child: ClipRRect(
                 borderRadius: BorderRadius.circular(8.0),
                 child: Image.network(
-                  url,
+                  previewUrl,
                   width: 80,
                   height: 80,
                   fit: BoxFit.cover,
@@ -233,7 +236,7 @@ class ServiceDetailsScreen extends StatelessWidget {
             ),
           ],
         );
-      }).toList(),
+      }),
     );
   }
 }
@@ -148,6 +148,8 @@ class AuthService {
   // Método para fazer logout do Firebase Auth
   Future<void> logout() async {
     try {
+      // Revoga os tokens no backend antes de sair (descarta também o cache de tokens do servidor)
+      await _revokeTokensOnBackend();
       await _firebaseAuth.signOut();
       // Limpar dados adicionais salvos localmente, se houver
       final prefs = await SharedPreferences.getInstance();
@@ -157,6 +159,23 @@ class AuthService {
     }
   }
 
+  // Método privado para revogar os tokens do usuário no backend (falha não impede o logout)
+  Future<void> _revokeTokensOnBackend() async {
+    try {
+      String? token = await getToken();
+      if (token == null) return;
+      final response = await http.post(
+        Uri.parse('$baseUrl/auth/revoke'),
+        headers: {'Authorization': 'Bearer $token'},
+      );
+      if (response.statusCode != 200) {
+        print("Erro ao revogar tokens no backend: ${response.statusCode} - ${response.body}");
+      }
+    } catch (e) {
+      print("Exceção ao revogar tokens no backend: $e");
+    }
+  }
+
   // Método privado para sincronizar com o backend
   Future<void> _syncUserWithBackend({String? cpf, String? phone}) async {
     try {
@@ -46,6 +46,7 @@ class MaintenanceService {
             partsCost: json['parts_cost'] != null ? double.parse(json['parts_cost'].toString()) : null,
             dateTime: DateTime.parse(json['service_date']),
             imagePaths: List<String>.from(json['images'] ?? []),
+            thumbnailPaths: List<String>.from(json['thumbnails'] ?? []),
           );
         }).toList();
       } else {
@@ -119,6 +120,7 @@ class MaintenanceService {
               : null,
           dateTime: DateTime.parse(maintenanceData['service_date']),
           imagePaths: List<String>.from(maintenanceData['images'] ?? []), // Expecting URLs back
+          thumbnailPaths: List<String>.from(maintenanceData['thumbnails'] ?? []),
         );
       } else {
         final responseData = jsonDecode(response.body);
@@ -197,6 +199,7 @@ class MaintenanceService {
           partsCost: json['parts_cost'] != null ? double.parse(json['parts_cost'].toString()) : null,
           dateTime: DateTime.parse(json['service_date']),
           imagePaths: List<String>.from(json['images'] ?? []),
+          thumbnailPaths: List<String>.from(json['thumbnails'] ?? []),
         );
       } else {
         final data = jsonDecode(response.body);